@@ -0,0 +1 @@
+"""Benchmarks do núcleo de cálculo (``python -m benchmarks``)."""
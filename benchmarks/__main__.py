@@ -0,0 +1,172 @@
+"""Executa os benchmarks e compara com a linha de base versionada.
+
+Para cada caso de ``benchmarks.casos`` mede o tempo (melhor e mediana de
+``--repeticoes`` execuções, depois de uma de aquecimento), o pico de memória
+(``tracemalloc``, que também enxerga os arrays do NumPy) e as linhas/s. Os
+valores de referência de cada caso são conferidos contra os da linha de
+base: diferença além de ``--tolerancia-valores`` é erro, não lentidão.
+
+Uso::
+
+    python -m benchmarks                       # mede e compara com baseline.json
+    python -m benchmarks --filtro projecao     # só os casos com "projecao" no nome
+    python -m benchmarks --salvar              # grava a nova linha de base
+
+Sai com código 1 se algum valor divergir ou, com ``--estrito``, se algum
+caso ficar mais lento que a linha de base além de ``--tolerancia-tempo``.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.casos import casos
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+REPETICOES = 5
+AMOSTRA_MINIMA_S = 0.05
+# fração de tempo a mais que conta como regressão
+TOLERANCIA_TEMPO = 0.25
+# tolerância relativa dos valores de referência
+TOLERANCIA_VALORES = 1e-9
+
+
+def medir(caso, repeticoes=REPETICOES):
+    """Tempo, pico de memória, linhas/s e valores de referência de um caso.
+
+    Como no ``timeit``, casos rápidos rodam várias vezes por amostra (até
+    somar ``AMOSTRA_MINIMA_S``) e o tempo é o de uma execução.
+    """
+    inicio = time.perf_counter()
+    valores, linhas = caso()  # aquecimento (imports, caches de calendário...)
+    execucoes = max(1, int(AMOSTRA_MINIMA_S / max(time.perf_counter() - inicio, 1e-9)))
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for _ in range(execucoes):
+            caso()
+        tempos.append((time.perf_counter() - inicio) / execucoes)
+
+    tracemalloc.start()
+    try:
+        caso()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    melhor = min(tempos)
+    return {
+        "tempo_s": melhor,
+        "tempo_mediano_s": statistics.median(tempos),
+        "pico_mb": pico / 2**20,
+        "linhas": linhas,
+        "linhas_por_segundo": linhas / melhor if melhor > 0 else math.inf,
+        "valores": valores,
+    }
+
+
+def divergencias(valores, referencia, tolerancia=TOLERANCIA_VALORES):
+    """Chaves cujo valor difere do de ``referencia`` além da tolerância."""
+    erradas = []
+    for chave in sorted(set(valores) | set(referencia)):
+        if chave not in valores or chave not in referencia:
+            erradas.append(chave)
+        elif not math.isclose(valores[chave], referencia[chave], rel_tol=tolerancia, abs_tol=tolerancia):
+            erradas.append(chave)
+    return erradas
+
+
+def ambiente():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+    }
+
+
+def ler_baseline(caminho=BASELINE):
+    if not os.path.exists(caminho):
+        return {"ambiente": {}, "casos": {}}
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def gravar_baseline(resultados, caminho=BASELINE):
+    base = ler_baseline(caminho)
+    base["ambiente"] = ambiente()
+    base["casos"].update(resultados)
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(base, arquivo, ensure_ascii=False, indent=2, sort_keys=True)
+        arquivo.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Mede projeção, Monte Carlo, impostos e tabelas e compara com a linha de base.",
+    )
+    parser.add_argument("--filtro", default="", help="roda só os casos com este texto no nome")
+    parser.add_argument("--repeticoes", type=int, default=REPETICOES)
+    parser.add_argument("--baseline", default=BASELINE, help="arquivo JSON da linha de base")
+    parser.add_argument("--salvar", action="store_true",
+                        help="grava os resultados como nova linha de base (inclusive os valores)")
+    parser.add_argument("--estrito", action="store_true",
+                        help="falha também quando um caso fica mais lento que a linha de base")
+    parser.add_argument("--tolerancia-tempo", type=float, default=TOLERANCIA_TEMPO)
+    parser.add_argument("--tolerancia-valores", type=float, default=TOLERANCIA_VALORES)
+    args = parser.parse_args(argv)
+
+    selecionados = {nome: fabrica for nome, fabrica in casos().items() if args.filtro in nome}
+    if not selecionados:
+        parser.error(f"nenhum caso com {args.filtro!r} no nome")
+    base = ler_baseline(args.baseline)["casos"]
+
+    print(f"{'caso':<26} {'tempo':>10} {'base':>10} {'Δ':>7} {'pico MB':>9} {'linhas/s':>14}  valores")
+    resultados = {}
+    falhas = []
+    for nome, fabrica in selecionados.items():
+        medido = medir(fabrica(), args.repeticoes)
+        resultados[nome] = medido
+        anterior = base.get(nome)
+        delta = situacao = ""
+        if anterior is None:
+            situacao = "novo"
+        else:
+            variacao = medido["tempo_s"] / anterior["tempo_s"] - 1
+            delta = f"{variacao:+.0%}"
+            erradas = divergencias(medido["valores"], anterior["valores"], args.tolerancia_valores)
+            if erradas:
+                situacao = "DIVERGE: " + ", ".join(erradas)
+                falhas.append(nome)
+            elif variacao > args.tolerancia_tempo:
+                situacao = "mais lento"
+                if args.estrito:
+                    falhas.append(nome)
+            else:
+                situacao = "ok"
+        tempo_base = f"{anterior['tempo_s'] * 1e3:.2f}ms" if anterior else "—"
+        print(
+            f"{nome:<26} {medido['tempo_s'] * 1e3:>8.2f}ms {tempo_base:>10} {delta:>7} "
+            f"{medido['pico_mb']:>9.1f} {medido['linhas_por_segundo']:>14,.0f}  {situacao}"
+        )
+
+    if args.salvar:
+        gravar_baseline(resultados, args.baseline)
+        print(f"linha de base gravada em {args.baseline}")
+        return 0
+    if falhas:
+        print(f"{len(falhas)} caso(s) com problema: {', '.join(falhas)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""Casos medidos pelo ``python -m benchmarks``.
+
+Cada caso é uma função sem argumentos que devolve ``(valores, linhas)``:
+``valores`` são os números de referência (golden) conferidos contra a linha
+de base, para que um ganho de velocidade não mude o resultado em silêncio, e
+``linhas`` é a quantidade de linhas (serviço × mês, caminho × mês...)
+processadas, usada no cálculo de linhas/s.
+
+Os parâmetros dos serviços saem de um gerador com semente fixa, então cada
+caso calcula sempre a mesma coisa.
+"""
+import os
+import tempfile
+from functools import partial
+
+import numpy as np
+
+from dre.api import projetar_dre
+from dre.carteira import Carteira
+from dre.cenarios import Cenario, projetar_cenarios
+from dre.exibicao import formato_coluna, para_tabela
+from dre.financeiro import tir
+from dre.impostos import IMPOSTO_ANEXO_V, IMPOSTO_FAIXA, IMPOSTO_PRESUMIDO, aliquota_mensal
+from dre.incremental import Projetor
+from dre.lote import executar
+from dre.montecarlo import Distribuicao, simular
+from dre.periodos import PERIODOS, agrupar
+from dre.projecao import tabela_de_params
+from dre.resultados import caminho_particao, comparar, ler
+
+SEMENTE = 20240501
+SERVICOS = (1, 10, 100, 1_000)
+MESES = (12, 60)
+CAMINHOS = 10_000
+SERVICOS_MONTE_CARLO = 10
+# receitas mensais (linhas × meses) na resolução das faixas de imposto
+LINHAS_IMPOSTO = 10_000
+# fluxos de caixa (linhas × meses) da TIR
+LINHAS_TIR = 100_000
+SERVICOS_TABELAS = 100
+SERVICOS_ARMAZEM = 1_000
+CENARIOS = 20
+SERVICOS_CENARIOS = 100
+GRUPOS = 5
+CLINICAS = 50
+SERVICOS_CLINICA = 20
+
+
+def servicos(n, semente=SEMENTE):
+    """``params`` de ``n`` serviços com valores variados e reprodutíveis."""
+    rng = np.random.default_rng(semente + n)
+    venda = rng.uniform(50.0, 400.0, n).round(2)
+    qtd = rng.integers(20, 300, n)
+    colunas = {
+        "valor_venda_base": venda,
+        "custo_unitario_base": (venda * rng.uniform(0.1, 0.4, n)).round(2),
+        "qtd_inicial": qtd,
+        "qtd_maxima": qtd * rng.integers(2, 8, n),
+        "repasse_percentual": rng.uniform(10.0, 40.0, n).round(1),
+        "crescimento_percentual": rng.uniform(0.0, 8.0, n).round(1),
+        "investimento_inicial": rng.uniform(5_000.0, 50_000.0, n).round(2),
+    }
+    return {
+        f"Serviço {i + 1}": {campo: valores[i].item() for campo, valores in colunas.items()}
+        for i in range(n)
+    }
+
+
+def _resumo(proj, linha=0):
+    """Totais de uma linha da ``Projecao`` usados como golden."""
+    return {
+        "receita_bruta": float(proj.receita_bruta[linha].sum()),
+        "impostos": float(proj.impostos[linha].sum()),
+        "lucro_acumulado": float(proj.lucro_acumulado[linha, -1]),
+        "payback": int(proj.payback[linha]),
+    }
+
+
+def caso_projecao(n, meses):
+    params = servicos(n)
+
+    def caso():
+        res = projetar_dre(params, meses, IMPOSTO_FAIXA, cache=False)
+        valores = _resumo(res.consolidado)
+        valores["lucro_servicos"] = float(res.servicos.lucro_acumulado[:, -1].sum())
+        return valores, n * meses
+
+    return caso
+
+
+def caso_monte_carlo():
+    params = servicos(SERVICOS_MONTE_CARLO)
+
+    def caso():
+        mc = simular(
+            params, 60, IMPOSTO_FAIXA, CAMINHOS,
+            crescimento=Distribuicao("normal", 0.0, 2.0),
+            inflacao=Distribuicao("triangular", 0.08, 0.13, 0.20),
+            repasse=Distribuicao("uniforme", -5.0, 5.0),
+        )
+        valores = {
+            "lucro_final_medio": float(mc.lucro_acumulado[:, -1].astype(float).mean()),
+            "payback_mediano": float(np.median(mc.payback)),
+        }
+        return valores, CAMINHOS * SERVICOS_MONTE_CARLO * 60
+
+    return caso
+
+
+def caso_cenarios():
+    params = servicos(SERVICOS_CENARIOS)
+    cenarios = [
+        Cenario(f"Cenário {i + 1}", (0.05 * i, 0.04 * i, 0.03 * i), (0.01 * i,), (0.0, 0.02 * i))
+        for i in range(CENARIOS)
+    ]
+
+    def caso():
+        proj = projetar_cenarios(params, cenarios, 60, IMPOSTO_FAIXA)
+        valores = {
+            "lucro_acumulado": float(proj.lucro_acumulado[:, -1].sum()),
+            "impostos": float(proj.impostos.sum()),
+            "payback": int(proj.payback.sum()),
+        }
+        return valores, CENARIOS * SERVICOS_CENARIOS * 60
+
+    return caso
+
+
+def estrutura(grupos=GRUPOS, clinicas=CLINICAS, servicos_clinica=SERVICOS_CLINICA):
+    """Carteira com ``clinicas`` clínicas distribuídas entre ``grupos`` grupos."""
+    estrutura = {}
+    for k in range(clinicas):
+        params = servicos(servicos_clinica, SEMENTE + k)
+        estrutura.setdefault(f"Grupo {k % grupos + 1}", {})[f"Clínica {k + 1}"] = params
+    return estrutura
+
+
+def _resumo_carteira(carteira):
+    valores = _resumo(carteira.total)
+    valores["impostos_clinicas"] = float(carteira.clinicas.impostos.sum())
+    return valores
+
+
+def caso_carteira():
+    """A carteira inteira: todas as folhas numa passada e os totais por nível."""
+    dados = estrutura()
+
+    def caso():
+        carteira = Carteira(dados, 60, IMPOSTO_FAIXA)
+        return _resumo_carteira(carteira), CLINICAS * SERVICOS_CLINICA * 60
+
+    return caso
+
+
+def caso_carteira_atualizar():
+    """Edição de uma clínica: refaz só ela, o seu grupo e o total."""
+    dados = estrutura()
+    carteira = Carteira(dados, 60, IMPOSTO_FAIXA)
+    grupo, clinicas = next(iter(dados.items()))
+    clinica, params = next(iter(clinicas.items()))
+    editado = {tipo: {**p, "repasse_percentual": p["repasse_percentual"] + 1} for tipo, p in params.items()}
+
+    def caso():
+        carteira.atualizar(grupo, clinica, editado)
+        return _resumo_carteira(carteira), SERVICOS_CLINICA * 60
+
+    return caso
+
+
+def caso_incremental(campo, n=SERVICOS[-1], meses=60):
+    """Edição de ``campo`` de um serviço com o ``Projetor``, ida e volta.
+
+    As linhas são as da projeção entregue (serviços × meses, duas vezes),
+    para comparar com ``projecao/<n>x<meses>``.
+    """
+    params = servicos(n)
+    projetor = Projetor()
+    projetor.projetar(params, meses, IMPOSTO_FAIXA)
+    tipo = next(iter(params))
+    original = params[tipo][campo]
+
+    def caso():
+        for valor in (original * 1.1, original):
+            params[tipo] = {**params[tipo], campo: valor}
+            res = projetor.projetar(params, meses, IMPOSTO_FAIXA)
+        valores = _resumo(res.consolidado)
+        valores["lucro_servicos"] = float(res.servicos.lucro_acumulado[:, -1].sum())
+        return valores, 2 * n * meses
+
+    return caso
+
+
+def caso_imposto(tipo_imposto):
+    rng = np.random.default_rng(SEMENTE)
+    receita = rng.lognormal(11.0, 1.2, (LINHAS_IMPOSTO, 60))
+
+    def caso():
+        aliq = aliquota_mensal(receita, tipo_imposto)
+        return {"imposto_total": float((receita * aliq).sum())}, receita.size
+
+    return caso
+
+
+def caso_tir():
+    """TIR de fluxos sorteados (alguns com meses negativos) e de dois fluxos difíceis:
+    um não convencional, com VPL negativo em −90%, 0% e 100% ao mês e duas
+    TIRs entre eles, e um de 720 meses, cujo VPL em −90% ao mês não é finito."""
+    rng = np.random.default_rng(SEMENTE)
+    investimento = rng.uniform(5_000.0, 50_000.0, (LINHAS_TIR, 1))
+    fluxo = np.concatenate([-investimento, rng.normal(2_000.0, 800.0, (LINHAS_TIR, 60))], axis=1)
+    nao_convencional = np.r_[-1_000.0, np.full(24, 300.0), -6_000.0, -6_000.0]
+    horizonte_longo = np.r_[-1_000.0, np.full(720, 50.0)]
+
+    def caso():
+        taxas = tir(fluxo)
+        valores = {
+            "tir_media": float(np.nanmean(taxas)),
+            "sem_tir": int(np.isnan(taxas).sum()),
+            "tir_nao_convencional": float(tir(nao_convencional)),
+            "tir_horizonte_longo": float(tir(horizonte_longo)),
+        }
+        return valores, fluxo.size
+
+    return caso
+
+
+def caso_tabelas():
+    """Tabelas das páginas: uma por serviço, a consolidada e os períodos,
+    com rótulos, formatos e a conversão para Arrow do ``st.dataframe``."""
+    import pyarrow as pa
+
+    params = servicos(SERVICOS_TABELAS)
+    res = projetar_dre(params, 60, IMPOSTO_FAIXA, inicio="2025-01", cache=False)
+
+    def caso():
+        consolidada = res.tabela()
+        tabelas = [res.tabela(tipo) for tipo in res.tipos] + [consolidada]
+        tabelas += [agrupar(consolidada, periodo) for periodo in PERIODOS]
+        linhas = colunas = 0
+        for df in tabelas:
+            exibida = para_tabela(df)
+            formatos = {coluna: formato_coluna(coluna) for coluna in exibida.columns}
+            linhas += pa.Table.from_pandas(exibida).num_rows
+            colunas += len(formatos)
+        valores = {
+            "linhas": linhas,
+            "colunas": colunas,
+            "receita_consolidada": float(consolidada["Receita Bruta"].sum()),
+        }
+        return valores, linhas
+
+    return caso
+
+
+def caso_armazem():
+    """Duas execuções noturnas do ``dre.lote`` no armazém e o ``comparar`` entre elas.
+
+    A entrada usa a coluna de identificação padrão do CLI (``tipo``); ``ler``
+    e ``comparar`` precisam achá-la como ``servico``.
+    """
+    params = servicos(SERVICOS_ARMAZEM)
+    primeiro = next(iter(params))
+
+    def caso():
+        with tempfile.TemporaryDirectory(prefix="dre-armazem-") as diretorio:
+            entrada = os.path.join(diretorio, "parametros.csv")
+            tabela_de_params(params).to_csv(entrada, index=False)
+            raiz = os.path.join(diretorio, "resultados")
+            for execucao, inflacao in (("2024-05-01", 0.13), ("2024-05-02", 0.10)):
+                executar(entrada, caminho_particao(raiz, execucao), 60, IMPOSTO_FAIXA,
+                         inflacao, log=None)
+            largo = comparar(raiz, "2024-05-01", "2024-05-02")
+            valores = {
+                "diferenca_lucro": float(largo["diferenca"].sum()),
+                "linhas_comparadas": len(largo),
+                "linhas_servico": ler(raiz, servicos=primeiro).num_rows,
+            }
+        return valores, 2 * SERVICOS_ARMAZEM * 60
+
+    return caso
+
+
+def casos():
+    """Nome -> fábrica do caso (monta os dados só quando o caso vai rodar)."""
+    todos = {}
+    for n in SERVICOS:
+        for meses in MESES:
+            todos[f"projecao/{n}x{meses}"] = partial(caso_projecao, n, meses)
+    todos[f"montecarlo/{SERVICOS_MONTE_CARLO}x60x{CAMINHOS}"] = caso_monte_carlo
+    todos[f"cenarios/{CENARIOS}x{SERVICOS_CENARIOS}x60"] = caso_cenarios
+    todos[f"carteira/{CLINICAS}x{SERVICOS_CLINICA}x60"] = caso_carteira
+    todos["carteira/atualizar"] = caso_carteira_atualizar
+    for campo, nome in (("repasse_percentual", "repasse"), ("valor_venda_base", "venda")):
+        todos[f"incremental/{SERVICOS[-1]}x60/{nome}"] = partial(caso_incremental, campo)
+    for nome, tipo in (("faixa", IMPOSTO_FAIXA), ("anexo5", IMPOSTO_ANEXO_V), ("presumido", IMPOSTO_PRESUMIDO)):
+        todos[f"imposto/{nome}"] = partial(caso_imposto, tipo)
+    todos[f"tir/{LINHAS_TIR}x60"] = caso_tir
+    todos[f"tabelas/{SERVICOS_TABELAS}x60"] = caso_tabelas
+    todos[f"armazem/{SERVICOS_ARMAZEM}x60"] = caso_armazem
+    return todos
@@ -0,0 +1,55 @@
+"""Núcleo de cálculo do Simulador de Projeção de DRE (sem Streamlit)."""
+from dre.api import Resultado, projetar_dre
+from dre.impostos import REGIMES, TabelaImposto, rbt12
+from dre.projecao import (
+    ALIQUOTA_UNICA,
+    CAMPOS,
+    COLUNAS_AGG,
+    FAIXAS,
+    IMPOSTO_FAIXA,
+    IMPOSTO_UNICO,
+    INFLACAO_ANUAL,
+    PADRAO,
+    Projecao,
+    aliquota,
+    aplicar_fatores,
+    apurar,
+    colunas,
+    consolidar,
+    fechar_consolidado,
+    mes_payback,
+    params_de_tabela,
+    projetar,
+    projetar_colunas,
+    tabela_consolidada,
+    tabela_de_params,
+)
+
+__all__ = [
+    "ALIQUOTA_UNICA",
+    "CAMPOS",
+    "COLUNAS_AGG",
+    "FAIXAS",
+    "IMPOSTO_FAIXA",
+    "IMPOSTO_UNICO",
+    "INFLACAO_ANUAL",
+    "PADRAO",
+    "Projecao",
+    "Resultado",
+    "REGIMES",
+    "TabelaImposto",
+    "aliquota",
+    "aplicar_fatores",
+    "apurar",
+    "colunas",
+    "consolidar",
+    "fechar_consolidado",
+    "mes_payback",
+    "params_de_tabela",
+    "projetar",
+    "projetar_colunas",
+    "projetar_dre",
+    "rbt12",
+    "tabela_consolidada",
+    "tabela_de_params",
+]
@@ -0,0 +1,173 @@
+"""API estável da projeção: a mesma chamada para páginas, CLI e notebooks.
+
+``projetar_dre`` projeta os serviços, fecha a DRE de cada um e a
+consolidada e devolve um ``Resultado``. As séries ficam em arrays NumPy;
+DataFrames só são montados quando pedidos (``Resultado.tabela``), e importar
+este módulo não importa pandas nem Streamlit.
+
+O imposto segue uma regra só: a alíquota de cada mês vem do RBT12 da
+receita consolidada (``RBT12_CONSOLIDADO``) e é aplicada a cada serviço, então
+a soma dos serviços fecha com o consolidado. ``RBT12_SERVICO`` trata cada
+serviço como se faturasse sozinho (o comportamento antigo do ``teste2.py``).
+
+Uso::
+
+    from dre.api import projetar_dre
+
+    res = projetar_dre(params, 60, IMPOSTO_FAIXA)
+    res.tabela()            # df_agg consolidado
+    res.tabela("Consulta")  # um serviço
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Mapping, Optional
+
+import numpy as np
+
+from dre.cache import bases_cache
+from dre.impostos import IMPOSTO_UNICO, acima_do_teto, aliquota_mensal
+from dre.projecao import (
+    INFLACAO_ANUAL,
+    Projecao,
+    colunas,
+    fechar,
+    fechar_consolidado,
+    projetar_bases,
+    tabela_consolidada,
+)
+from dre.sazonalidade import SEM_CALENDARIO, fatores_params
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# params: serviço -> campos de ``dre.projecao.CAMPOS`` (mais os ``OPCIONAIS``)
+Params = Mapping[str, Mapping[str, Any]]
+
+RBT12_CONSOLIDADO = "consolidado"
+RBT12_SERVICO = "servico"
+
+# colunas da tabela mensal de um serviço, por série da ``Projecao``
+COLUNAS_SERVICO = {
+    "quantidade": "Quantidade",
+    "valor_venda": "Valor Venda (R$)",
+    "custo_unitario": "Custo Unitário (R$)",
+    "receita_bruta": "Receita Bruta (R$)",
+    "custo_total": "Custo Total (R$)",
+    "repasse": "Repasse Médico (R$)",
+    "impostos": "Impostos (R$)",
+    "receita_liquida": "Receita Líquida (R$)",
+    "lucro_bruto": "Lucro Bruto (R$)",
+    "lucro_acumulado": "Lucro Acumulado (R$)",
+}
+
+
+@dataclass(frozen=True)
+class Resultado:
+    """DRE projetada: por serviço (``servicos``) e consolidada (``consolidado``)."""
+
+    servicos: Projecao
+    consolidado: Projecao
+    tipo_imposto: str
+    rbt12: str = RBT12_CONSOLIDADO
+    inicio: Any = None
+
+    @property
+    def meses(self) -> int:
+        return self.consolidado.meses
+
+    @property
+    def tipos(self) -> list:
+        return list(self.servicos.tipos)
+
+    def _linha(self, tipo: Optional[str]) -> tuple:
+        if tipo is None:
+            return self.consolidado, 0
+        return self.servicos, self.tipos.index(tipo)
+
+    def payback(self, tipo: Optional[str] = None) -> int:
+        """Mês (1-based) do payback do serviço ou do consolidado; 0 = não atingido."""
+        proj, linha = self._linha(tipo)
+        return int(proj.payback[linha])
+
+    def rotulo_payback(self, tipo: Optional[str] = None) -> str:
+        """Payback para exibição: "M3 (12/2026)" ou "Não atingido"."""
+        from dre.calendario import rotulo_mes
+
+        mes = self.payback(tipo)
+        return rotulo_mes(mes, self.inicio) if mes else "Não atingido"
+
+    def aliquota_efetiva(self, tipo: Optional[str] = None) -> float:
+        proj, linha = self._linha(tipo)
+        return float(proj.aliquota_efetiva()[linha])
+
+    def acima_do_teto(self, tipo: Optional[str] = None) -> bool:
+        """RBT12 acima do teto do regime em algum mês (o do consolidado, salvo ``RBT12_SERVICO``)."""
+        if tipo is None or self.rbt12 == RBT12_CONSOLIDADO:
+            return bool(acima_do_teto(self.consolidado.receita_bruta[0], self.tipo_imposto))
+        proj, linha = self._linha(tipo)
+        return bool(acima_do_teto(proj.receita_bruta[linha], self.tipo_imposto))
+
+    def tabela(self, tipo: Optional[str] = None) -> "pd.DataFrame":
+        """Tabela mensal: ``df_agg`` consolidado (sem ``tipo``) ou as séries de um serviço."""
+        if tipo is None:
+            return tabela_consolidada(self.consolidado, inicio=self.inicio)
+
+        import pandas as pd
+
+        from dre.calendario import indice_meses
+
+        proj, linha = self._linha(tipo)
+        return pd.DataFrame(
+            {rotulo: getattr(proj, serie)[linha] for serie, rotulo in COLUNAS_SERVICO.items()},
+            index=indice_meses(self.meses, self.inicio),
+        )
+
+
+def projetar_dre(
+    params: Params,
+    meses: int,
+    tipo_imposto: str = IMPOSTO_UNICO,
+    inflacao_anual: float = INFLACAO_ANUAL,
+    *,
+    inicio: Any = None,
+    calendario: Optional[str] = None,
+    rbt12: str = RBT12_CONSOLIDADO,
+    receita_consolidada: Optional[np.ndarray] = None,
+    cache: bool = True,
+) -> Resultado:
+    """Projeta a DRE de ``params`` por ``meses`` meses.
+
+    - ``inicio``: mês de início (date, "2025-03"...); dá datas reais ao índice
+      das tabelas e, com ``calendario``, o ajuste por dias úteis;
+    - ``calendario``: um de ``dre.sazonalidade.CALENDARIOS`` (None = sem
+      ajuste); o perfil de sazonalidade de cada serviço vem de
+      ``params[tipo]["sazonalidade"]``;
+    - ``receita_consolidada``: receita bruta mensal da carteira inteira quando
+      ``params`` é só uma parte dela (um bloco de ``dre.lote``); com
+      ``RBT12_CONSOLIDADO``, a alíquota sai dela, e o ``consolidado`` do
+      resultado continua sendo a soma de ``params``;
+    - ``cache``: reaproveita as séries-base por serviço de ``dre.cache``.
+    """
+    if rbt12 not in (RBT12_CONSOLIDADO, RBT12_SERVICO):
+        raise ValueError(f"rbt12 deve ser {RBT12_CONSOLIDADO!r} ou {RBT12_SERVICO!r}")
+    fatores = fatores_params(params, meses, inicio, calendario or SEM_CALENDARIO)
+    if cache:
+        bases = bases_cache(params, meses, inflacao_anual, fatores)
+    else:
+        bases = projetar_bases(colunas(params), meses, inflacao_anual, fatores)
+    investimento = np.array([float(p["investimento_inicial"]) for p in params.values()])
+
+    quantidade, _, _, receita_bruta, custo_total, repasse = bases
+    consolidado = fechar_consolidado(
+        quantidade.sum(axis=0), receita_bruta.sum(axis=0), custo_total.sum(axis=0),
+        repasse.sum(axis=0), investimento.sum(), tipo_imposto,
+    )
+    aliq = None
+    if rbt12 == RBT12_CONSOLIDADO:
+        aliq = consolidado.aliquota
+        if receita_consolidada is not None:
+            receita = np.asarray(receita_consolidada, dtype=float).reshape(1, -1)
+            aliq = aliquota_mensal(receita, tipo_imposto)
+    servicos = fechar(list(params), bases, investimento, tipo_imposto, aliq)
+    return Resultado(servicos, consolidado, tipo_imposto, rbt12, inicio)
@@ -0,0 +1,47 @@
+"""Imagens estáticas das páginas, reduzidas uma única vez para a largura exibida.
+
+O ``st.image`` recebe o caminho do arquivo já reduzido: o Streamlit só o lê e
+registra no media cache, sem decodificar nem recodificar a imagem a cada rerun.
+"""
+import os
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOGO = os.path.join(RAIZ, "m2inova_upscayl_4x_ultrasharp.png")
+# largura útil do layout "centered" do Streamlit
+LARGURA_LOGO = 704
+PASTA_CACHE = os.path.join(tempfile.gettempdir(), "dre_assets")
+
+
+def imagem_reduzida(caminho, largura, formato="WEBP", qualidade=90):
+    """Caminho de uma cópia de ``caminho`` com no máximo ``largura`` px.
+
+    A cópia é gerada uma vez por (arquivo, mtime, largura, formato); reruns
+    seguintes só fazem um ``stat`` no original.
+    """
+    mtime = os.stat(caminho).st_mtime_ns
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    destino = os.path.join(
+        PASTA_CACHE, f"{nome}_{largura}w_{mtime}.{formato.lower()}"
+    )
+    if os.path.exists(destino):
+        return destino
+
+    from PIL import Image  # Pillow já vem como dependência do Streamlit
+
+    os.makedirs(PASTA_CACHE, exist_ok=True)
+    with Image.open(caminho) as imagem:
+        if imagem.width > largura:
+            altura = round(imagem.height * largura / imagem.width)
+            imagem = imagem.resize((largura, altura), Image.LANCZOS)
+        if formato.upper() == "WEBP":
+            opcoes = {"quality": qualidade, "method": 6}
+        else:
+            opcoes = {"optimize": True}
+        # grava em arquivo temporário e renomeia: reruns concorrentes nunca
+        # enxergam um arquivo pela metade
+        fd, temporario = tempfile.mkstemp(dir=PASTA_CACHE, suffix=".tmp")
+        with os.fdopen(fd, "wb") as saida:
+            imagem.save(saida, formato.upper(), **opcoes)
+    os.replace(temporario, destino)
+    return destino
@@ -0,0 +1,141 @@
+"""Memoização da projeção entre reruns do Streamlit.
+
+A chave é um snapshot imutável (``congelar``) dos parâmetros. O cache é por
+serviço: editar um serviço só recalcula a linha dele, as demais vêm prontas.
+Entradas são limitadas em quantidade (LRU) e expiram após ``TTL_SEGUNDOS``.
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+
+from dre.projecao import (
+    CAMPOS,
+    INFLACAO_ANUAL,
+    aplicar_fatores,
+    colunas,
+    fechar,
+    projetar_bases,
+)
+
+# campos que determinam as séries-base (o investimento só afeta o payback)
+_CAMPOS_BASE = tuple(c for c in CAMPOS if c != "investimento_inicial")
+
+MAX_ENTRADAS = 1024
+TTL_SEGUNDOS = 3600
+# limite para os DataFrames montados pelas páginas via st.cache_data
+MAX_ENTRADAS_PAGINA = 64
+
+
+def congelar(valor):
+    """Converte dicts/listas (e escalares NumPy) num snapshot hashable."""
+    if isinstance(valor, dict):
+        return tuple((k, congelar(v)) for k, v in valor.items())
+    if isinstance(valor, (list, tuple)):
+        return tuple(congelar(v) for v in valor)
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+
+class CacheTTL:
+    """Dicionário LRU com limite de entradas e expiração por tempo."""
+
+    def __init__(self, max_entradas=MAX_ENTRADAS, ttl=TTL_SEGUNDOS):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, chave):
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is not None and time.monotonic() - item[0] <= self.ttl:
+                self._dados.move_to_end(chave)
+                self.acertos += 1
+                return item[1]
+            if item is not None:
+                del self._dados[chave]
+            self.falhas += 1
+            return None
+
+    def guardar(self, chave, valor):
+        with self._lock:
+            self._dados[chave] = (time.monotonic(), valor)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_entradas:
+                self._dados.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+            self.acertos = self.falhas = 0
+
+    def __len__(self):
+        return len(self._dados)
+
+
+def memoizar(max_entradas=MAX_ENTRADAS, ttl=TTL_SEGUNDOS):
+    """Decorador: memoiza uma função de argumentos hashable num ``CacheTTL``."""
+    def decorador(func):
+        cache = CacheTTL(max_entradas, ttl)
+
+        @wraps(func)
+        def envoltorio(*args):
+            valor = cache.obter(args)
+            if valor is None:
+                valor = func(*args)
+                cache.guardar(args, valor)
+            return valor
+
+        envoltorio.cache = cache
+        return envoltorio
+    return decorador
+
+
+@memoizar()
+def _bases_servico(snapshot, meses, inflacao_anual):
+    bases = projetar_bases(colunas({None: dict(snapshot)}, _CAMPOS_BASE), meses, inflacao_anual)
+    for serie in bases:
+        serie.setflags(write=False)  # compartilhada entre sessões
+    return bases
+
+
+def bases_cache(params, meses, inflacao_anual=INFLACAO_ANUAL, fatores=None):
+    """Mesmo resultado de ``projetar_bases``, reaproveitando serviços já calculados.
+
+    Os ``fatores`` de volume ficam fora do cache por serviço: são aplicados
+    sobre as séries-base prontas, numa multiplicação só.
+    """
+    # o investimento não entra nas séries-base, então fica fora da chave
+    linhas = [
+        _bases_servico(congelar({c: p[c] for c in _CAMPOS_BASE}), meses, inflacao_anual)
+        for p in params.values()
+    ]
+    if linhas:
+        bases = tuple(np.vstack(series) for series in zip(*linhas))
+    else:
+        bases = projetar_bases(colunas({}, _CAMPOS_BASE), meses, inflacao_anual)
+    return aplicar_fatores(bases, fatores)
+
+
+def projetar_cache(params, meses, tipo_imposto, inflacao_anual=INFLACAO_ANUAL, fatores=None):
+    """Mesmo resultado de ``projetar``, reaproveitando serviços já calculados."""
+    investimento = np.array([float(p["investimento_inicial"]) for p in params.values()])
+    return fechar(
+        list(params), bases_cache(params, meses, inflacao_anual, fatores), investimento, tipo_imposto
+    )
+
+
+def estatisticas_cache():
+    """Acertos, falhas e entradas do cache de séries-base por serviço."""
+    cache = _bases_servico.cache
+    return {
+        "cache_bases_acertos": cache.acertos,
+        "cache_bases_falhas": cache.falhas,
+        "cache_bases_entradas": len(cache),
+    }
@@ -0,0 +1,55 @@
+"""Eixo de meses da projeção.
+
+O motor trabalha com o mês como posição inteira nos arrays (0-based) e as
+tabelas usam o número do mês (1-based) como índice inteiro. Com um mês de
+início, o índice vira um ``PeriodIndex`` mensal com datas reais. Rótulos de
+texto ("M3", "03/2025") só são gerados na exibição, então nada no caminho
+de cálculo cria strings nem precisa reordenar meses.
+"""
+import numpy as np
+
+
+def periodo_inicial(inicio):
+    """``pd.Period`` mensal de ``inicio`` (date, "2025-03", Period...); None fica None."""
+    import pandas as pd
+
+    return None if inicio is None else pd.Period(inicio, freq="M")
+
+
+def indice_meses(meses, inicio=None, nome="Mês"):
+    """Índice dos meses: inteiros 1..meses ou, com ``inicio``, um ``PeriodIndex``."""
+    import pandas as pd
+
+    if inicio is None:
+        return pd.RangeIndex(1, meses + 1, name=nome)
+    return pd.period_range(periodo_inicial(inicio), periods=meses, freq="M", name=nome)
+
+
+def meses_do_ano(meses, inicio=None):
+    """Mês do calendário (1..12) de cada mês da projeção; sem início, M1 = janeiro."""
+    primeiro = 0 if inicio is None else periodo_inicial(inicio).month - 1
+    return (primeiro + np.arange(meses)) % 12 + 1
+
+
+# formato dos rótulos por frequência do ``PeriodIndex`` e prefixo do índice inteiro
+# por nome do índice (meses, e os trimestres/anos de ``dre.periodos``)
+_FORMATOS = {"M": "%m/%Y", "Q": "T%q/%Y", "Y": "%Y"}
+_PREFIXOS = {"Trimestre": "T", "Ano": "Ano "}
+
+
+def rotulos_meses(indice):
+    """Rótulos de exibição de um índice de ``indice_meses`` (ou de trimestres/anos)."""
+    import pandas as pd
+
+    if isinstance(indice, pd.PeriodIndex):
+        return indice.strftime(_FORMATOS[indice.freqstr[0]])
+    prefixo = _PREFIXOS.get(indice.name, "M")
+    return pd.Index([f"{prefixo}{int(m)}" for m in indice], name=indice.name)
+
+
+def rotulo_mes(numero, inicio=None):
+    """Rótulo de um mês 1-based: "M3" ou, com início, "M3 (03/2025)"."""
+    if inicio is None:
+        return f"M{int(numero)}"
+    periodo = periodo_inicial(inicio) + (int(numero) - 1)
+    return f"M{int(numero)} ({periodo.strftime('%m/%Y')})"
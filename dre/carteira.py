@@ -0,0 +1,332 @@
+"""Carteira de clínicas: grupo → clínica → serviço, com a DRE de cada nível.
+
+A ``estrutura`` é um dict ``grupo -> clínica -> params`` (o ``params`` de
+cada clínica é o mesmo das páginas: serviço -> campos de
+``dre.projecao.CAMPOS``). Todos os serviços da carteira (as folhas) são
+projetados numa passada vetorizada só, empilhados clínica a clínica; como
+as linhas de cada clínica (e as clínicas de cada grupo) ficam contíguas, os
+totais de cada nível são somas por segmento (``np.add.reduceat``) sobre
+índices inteiros, sem agrupar por rótulo.
+
+Cada clínica apura o imposto pelo próprio RBT12 (é a empresa que fatura);
+os serviços recebem a alíquota da sua clínica, como no
+``dre.api.RBT12_CONSOLIDADO``, e grupos e total somam as DREs das clínicas.
+
+``Carteira.atualizar`` troca o catálogo de uma clínica e recalcula só os
+serviços dela, a própria clínica, o seu grupo e o total; as demais linhas
+são apenas copiadas. ``Carteira.sincronizar`` descobre sozinha as clínicas
+alteradas de uma estrutura nova (e refaz tudo se a árvore mudou).
+
+Uso::
+
+    carteira = Carteira({"Grupo A": {"Clínica 1": params1, "Clínica 2": params2}}, 60)
+    carteira.tabela()                          # df_agg do total
+    carteira.tabela(("Grupo A", "Clínica 1"))  # df_agg de uma clínica
+    carteira.resumo("clinicas")
+    carteira.atualizar("Grupo A", "Clínica 1", params1_editado)
+"""
+import numpy as np
+
+from dre.cache import congelar
+from dre.impostos import IMPOSTO_UNICO
+from dre.projecao import (
+    CAMPOS,
+    INFLACAO_ANUAL,
+    Projecao,
+    colunas,
+    fechar,
+    mes_payback,
+    params_de_tabela,
+    projetar_bases,
+    tabela_consolidada,
+    tabela_de_params,
+)
+from dre.sazonalidade import SEM_CALENDARIO, fatores_params
+
+GRUPO = "grupo"
+CLINICA = "clinica"
+TOTAL = "Total"
+NIVEIS = ("grupos", "clinicas", "servicos")
+# rótulos do índice do ``resumo``, por profundidade na árvore
+ROTULOS_NIVEIS = ("Grupo", "Clínica", "Serviço")
+
+# séries da ``Projecao`` que se somam de um nível para o de cima
+_ADITIVAS = (
+    "quantidade",
+    "receita_bruta",
+    "custo_total",
+    "repasse",
+    "impostos",
+    "receita_liquida",
+    "lucro_bruto",
+    "lucro_acumulado",
+)
+_SERIES = _ADITIVAS + ("valor_venda", "custo_unitario", "aliquota", "investimento", "payback")
+
+
+def somar_segmentos(valores, contagens):
+    """Soma linhas consecutivas de ``valores``: o segmento i tem ``contagens[i]`` linhas.
+
+    Segmentos vazios somam zero (o ``reduceat`` sozinho devolveria uma linha).
+    """
+    valores = np.asarray(valores, dtype=float)
+    contagens = np.asarray(contagens, dtype=int)
+    soma = np.zeros((len(contagens),) + valores.shape[1:])
+    cheios = contagens > 0
+    if cheios.any():
+        inicios = np.cumsum(contagens) - contagens
+        soma[cheios] = np.add.reduceat(valores, inicios[cheios], axis=0)
+    return soma
+
+
+def _precos_medios(quantidade, receita_bruta, custo_total):
+    """Preços médios ponderados pela quantidade (informativos)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        valor_venda = np.where(quantidade > 0, receita_bruta / quantidade, 0.0)
+        custo_unitario = np.where(quantidade > 0, custo_total / quantidade, 0.0)
+    return valor_venda, custo_unitario
+
+
+def somar_projecao(proj, contagens, tipos):
+    """Uma linha por segmento de ``proj`` com as DREs já fechadas somadas.
+
+    O imposto é o apurado em cada linha; a alíquota do nível de cima é a
+    efetiva de cada mês (impostos / receita).
+    """
+    soma = {serie: somar_segmentos(getattr(proj, serie), contagens) for serie in _ADITIVAS}
+    investimento = somar_segmentos(proj.investimento, contagens)
+    soma["valor_venda"], soma["custo_unitario"] = _precos_medios(
+        soma["quantidade"], soma["receita_bruta"], soma["custo_total"]
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        aliq = np.where(soma["receita_bruta"] > 0, soma["impostos"] / soma["receita_bruta"], 0.0)
+    return Projecao(
+        tipos=list(tipos),
+        aliquota=aliq,
+        investimento=investimento,
+        payback=mes_payback(soma["lucro_acumulado"], investimento),
+        **soma,
+    )
+
+
+def _trocar_linhas(proj, inicio, fim, nova):
+    """``proj`` com as linhas ``inicio:fim`` trocadas pelas de ``nova`` (cópia)."""
+    series = {
+        serie: np.concatenate([getattr(proj, serie)[:inicio], getattr(nova, serie),
+                               getattr(proj, serie)[fim:]])
+        for serie in _SERIES
+    }
+    return Projecao(tipos=proj.tipos[:inicio] + nova.tipos + proj.tipos[fim:], **series)
+
+
+class Carteira:
+    """DRE de uma carteira de clínicas em quatro níveis.
+
+    - ``servicos``: uma linha por serviço, ``tipos`` = (grupo, clínica, serviço);
+    - ``clinicas``: uma linha por clínica, ``tipos`` = (grupo, clínica);
+    - ``grupos``: uma linha por grupo, ``tipos`` = nomes dos grupos;
+    - ``total``: a carteira inteira, uma linha.
+
+    ``inicio`` e ``calendario`` têm o sentido de ``dre.api.projetar_dre``.
+    """
+
+    def __init__(self, estrutura, meses, tipo_imposto=IMPOSTO_UNICO,
+                 inflacao_anual=INFLACAO_ANUAL, *, inicio=None, calendario=None):
+        self.meses = meses
+        self.tipo_imposto = tipo_imposto
+        self.inflacao_anual = inflacao_anual
+        self.inicio = inicio
+        self.calendario = calendario or SEM_CALENDARIO
+        self._projetar(estrutura)
+
+    # ---- cálculo ----
+
+    def _fechar_clinicas(self, folhas, tipos_folhas, contagens, tipos_clinicas):
+        """Projeta as folhas dadas e fecha serviços e clínicas (imposto por clínica)."""
+        fatores = fatores_params(folhas, self.meses, self.inicio, self.calendario) if folhas else None
+        bases = projetar_bases(colunas(folhas), self.meses, self.inflacao_anual, fatores)
+        quantidade, _, _, receita_bruta, custo_total, repasse = bases
+        investimento = np.array([float(p["investimento_inicial"]) for p in folhas.values()])
+
+        somas = [somar_segmentos(s, contagens) for s in (quantidade, receita_bruta, custo_total)]
+        precos = _precos_medios(*somas)
+        clinicas = fechar(
+            list(tipos_clinicas),
+            (somas[0], *precos, somas[1], somas[2], somar_segmentos(repasse, contagens)),
+            somar_segmentos(investimento, contagens),
+            self.tipo_imposto,
+        )
+        aliq = np.repeat(clinicas.aliquota, contagens, axis=0)
+        servicos = fechar(list(tipos_folhas), bases, investimento, self.tipo_imposto, aliq)
+        return servicos, clinicas
+
+    @staticmethod
+    def _folhas(estrutura, clinicas):
+        folhas = {}
+        for grupo, clinica in clinicas:
+            for servico, p in estrutura[grupo][clinica].items():
+                folhas[(grupo, clinica, servico)] = p
+        return folhas
+
+    def _projetar(self, estrutura):
+        """Projeta a carteira inteira: todas as folhas numa passada só."""
+        self.estrutura = {g: {c: dict(params) for c, params in cs.items()} for g, cs in estrutura.items()}
+        tipos_clinicas = [(g, c) for g, cs in self.estrutura.items() for c in cs]
+        folhas = self._folhas(self.estrutura, tipos_clinicas)
+        self._servicos_por_clinica = np.array(
+            [len(self.estrutura[g][c]) for g, c in tipos_clinicas], dtype=int
+        )
+        self._clinicas_por_grupo = np.array([len(cs) for cs in self.estrutura.values()], dtype=int)
+        self._snapshots = {(g, c): congelar(self.estrutura[g][c]) for g, c in tipos_clinicas}
+
+        self.servicos, self.clinicas = self._fechar_clinicas(
+            folhas, list(folhas), self._servicos_por_clinica, tipos_clinicas
+        )
+        self.grupos = somar_projecao(self.clinicas, self._clinicas_por_grupo, self.estrutura)
+        self.total = somar_projecao(self.grupos, [len(self.estrutura)], [TOTAL])
+
+    def atualizar(self, grupo, clinica, params):
+        """Troca os serviços de uma clínica existente e recalcula só o caminho até a raiz.
+
+        Devolve os nós recalculados: a clínica, o grupo e o total (``()``).
+        """
+        if clinica not in self.estrutura.get(grupo, {}):
+            raise KeyError(f"clínica não encontrada na carteira: {grupo} / {clinica}")
+        params = dict(params)
+        indice = self.clinicas.tipos.index((grupo, clinica))
+        inicio = int(self._servicos_por_clinica[:indice].sum())
+        fim = inicio + int(self._servicos_por_clinica[indice])
+
+        folhas = {(grupo, clinica, servico): p for servico, p in params.items()}
+        servicos, linha_clinica = self._fechar_clinicas(
+            folhas, list(folhas), [len(folhas)], [(grupo, clinica)]
+        )
+        self.servicos = _trocar_linhas(self.servicos, inicio, fim, servicos)
+        self.clinicas = _trocar_linhas(self.clinicas, indice, indice + 1, linha_clinica)
+        self._servicos_por_clinica[indice] = len(folhas)
+        self.estrutura[grupo][clinica] = params
+        self._snapshots[(grupo, clinica)] = congelar(params)
+
+        # o grupo é refeito só a partir das suas clínicas; o total, dos grupos
+        g = list(self.estrutura).index(grupo)
+        primeira = int(self._clinicas_por_grupo[:g].sum())
+        ultima = primeira + int(self._clinicas_por_grupo[g])
+        linha_grupo = somar_projecao(
+            _linhas(self.clinicas, primeira, ultima), [ultima - primeira], [grupo]
+        )
+        self.grupos = _trocar_linhas(self.grupos, g, g + 1, linha_grupo)
+        self.total = somar_projecao(self.grupos, [len(self.estrutura)], [TOTAL])
+        return [(grupo, clinica), (grupo,), ()]
+
+    def sincronizar(self, estrutura):
+        """Leva a carteira a ``estrutura`` recalculando o mínimo; devolve os nós recalculados.
+
+        Com os mesmos grupos e clínicas (na mesma ordem), só as clínicas cujos
+        serviços mudaram são refeitas (``atualizar``); se a árvore mudou,
+        a carteira inteira é projetada de novo.
+        """
+        clinicas = [(g, c) for g, cs in estrutura.items() for c in cs]
+        if clinicas != self.clinicas.tipos or list(estrutura) != self.grupos.tipos:
+            self._projetar(estrutura)
+            return list(self.clinicas.tipos) + [(g,) for g in self.grupos.tipos] + [()]
+        recalculados = []
+        for grupo, clinica in clinicas:
+            if congelar(dict(estrutura[grupo][clinica])) != self._snapshots[(grupo, clinica)]:
+                for no in self.atualizar(grupo, clinica, estrutura[grupo][clinica]):
+                    if no not in recalculados:
+                        recalculados.append(no)
+        return recalculados
+
+    # ---- consulta ----
+
+    def _linha(self, no):
+        """(``Projecao``, linha) de um nó: ``()`` total, ``(g,)``, ``(g, c)`` ou ``(g, c, s)``."""
+        no = tuple(no)
+        if not no:
+            return self.total, 0
+        if len(no) == 1:
+            return self.grupos, self.grupos.tipos.index(no[0])
+        proj = self.clinicas if len(no) == 2 else self.servicos
+        return proj, proj.tipos.index(no)
+
+    def payback(self, no=()):
+        """Mês (1-based) do payback do nó; 0 = não atingido."""
+        proj, linha = self._linha(no)
+        return int(proj.payback[linha])
+
+    def rotulo_payback(self, no=()):
+        from dre.calendario import rotulo_mes
+
+        mes = self.payback(no)
+        return rotulo_mes(mes, self.inicio) if mes else "Não atingido"
+
+    def tabela(self, no=()):
+        """DRE mensal do nó no layout do ``df_agg`` (o total, sem ``no``)."""
+        proj, linha = self._linha(no)
+        return tabela_consolidada(proj, linha, self.inicio)
+
+    def resumo(self, nivel="clinicas"):
+        """Totais do horizonte, uma linha por nó de ``nivel`` (um de ``NIVEIS``)."""
+        import pandas as pd
+
+        from dre.calendario import rotulo_mes
+
+        if nivel not in NIVEIS:
+            raise ValueError(f"nível deve ser um de: {', '.join(NIVEIS)}")
+        proj = getattr(self, nivel)
+        profundidade = NIVEIS.index(nivel) + 1
+        nos = [(t,) if profundidade == 1 else t for t in proj.tipos]
+        return pd.DataFrame(
+            {
+                "Receita Bruta": proj.receita_bruta.sum(axis=1),
+                "Impostos": proj.impostos.sum(axis=1),
+                "Lucro Bruto": proj.lucro_bruto.sum(axis=1),
+                "Lucro Acumulado": proj.lucro_acumulado[:, -1],
+                "Alíquota Efetiva (%)": proj.aliquota_efetiva() * 100,
+                "Investimento": proj.investimento,
+                "Payback": [rotulo_mes(m, self.inicio) if m else "Não atingido" for m in proj.payback],
+            },
+            index=pd.MultiIndex.from_tuples(nos, names=ROTULOS_NIVEIS[:profundidade]),
+        )
+
+
+def _linhas(proj, inicio, fim):
+    """As linhas ``inicio:fim`` de ``proj`` (vistas, sem cópia)."""
+    return Projecao(
+        tipos=proj.tipos[inicio:fim], **{serie: getattr(proj, serie)[inicio:fim] for serie in _SERIES}
+    )
+
+
+def estrutura_de_tabela(tabela, coluna_id="tipo"):
+    """``estrutura`` a partir de um DataFrame com uma linha por serviço.
+
+    Além das colunas de ``dre.projecao.params_de_tabela``, tem ``grupo`` e
+    ``clinica``; linhas sem grupo ou clínica são ignoradas. A ordem de
+    grupos, clínicas e serviços é a da primeira aparição.
+    """
+    faltando = [c for c in (GRUPO, CLINICA) if c not in tabela.columns]
+    if faltando:
+        raise ValueError(f"colunas ausentes na tabela da carteira: {', '.join(faltando)}")
+
+    nomes = tabela[[GRUPO, CLINICA]].astype("string").apply(lambda s: s.str.strip())
+    validas = (nomes.notna() & (nomes != "")).all(axis=1).to_numpy(dtype=bool)
+    estrutura = {}
+    linhas = tabela.loc[validas].assign(**{GRUPO: nomes[GRUPO][validas], CLINICA: nomes[CLINICA][validas]})
+    for (grupo, clinica), parte in linhas.groupby([GRUPO, CLINICA], sort=False):
+        estrutura.setdefault(grupo, {})[clinica] = params_de_tabela(parte, coluna_id)
+    return estrutura
+
+
+def tabela_de_estrutura(estrutura, coluna_id="tipo"):
+    """Inverso de ``estrutura_de_tabela``: DataFrame com uma linha por serviço."""
+    import pandas as pd
+
+    partes = [
+        tabela_de_params(params, coluna_id).assign(**{GRUPO: grupo, CLINICA: clinica})
+        for grupo, clinicas in estrutura.items()
+        for clinica, params in clinicas.items()
+    ]
+    if not partes:
+        return pd.DataFrame(columns=(GRUPO, CLINICA, coluna_id) + CAMPOS)
+    tabela = pd.concat(partes, ignore_index=True)
+    return tabela[[GRUPO, CLINICA] + [c for c in tabela.columns if c not in (GRUPO, CLINICA)]]
@@ -0,0 +1,200 @@
+"""Cenários da aba "Cenários de Crescimento".
+
+Um ``Cenario`` muda, ano a ano, o crescimento da quantidade e os preços de
+venda e custo dos serviços. ``projetar_cenarios`` projeta todos os
+cenários de uma vez — um array (cenários × serviços × meses), sem laço por
+cenário — e fecha a DRE consolidada de cada um (imposto pelo RBT12 do
+cenário, lucro e payback). O resultado é uma ``Projecao`` com um cenário
+por linha.
+
+Valores por ano são frações (0.25 = 25%); anos além dos informados repetem
+o último. O crescimento do ano vale para a passagem de cada mês daquele ano
+para o seguinte, como no laço original das páginas.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from dre.montecarlo import quantidades_caminho
+from dre.projecao import INFLACAO_ANUAL, colunas, fator_inflacao, fechar, taxa_mensal
+
+# crescimento anual do cenário conservador e ajuste (em fração ao ano) do
+# otimista e do pessimista sobre ele
+CRESCIMENTO_CONSERVADOR = (0.25, 0.20, 0.20)
+AJUSTE_CENARIOS = 0.20
+LIMITE_ELEMENTOS = 4_000_000
+
+CENARIO = "Cenário"
+# prefixo das colunas da tabela de cenários, por campo do ``Cenario``
+COLUNAS_ANO = {
+    "crescimento": "Crescimento",
+    "preco": "Preço",
+    "custo": "Custo",
+}
+
+
+@dataclass(frozen=True)
+class Cenario:
+    """Um cenário nomeado; cada campo tem um valor por ano (tupla de frações).
+
+    - ``crescimento``: crescimento anual da quantidade; vazio ou NaN no ano
+      mantém o crescimento mensal de cada serviço;
+    - ``preco`` / ``custo``: reajuste do preço de venda / custo unitário
+      sobre o projetado naquele ano (0.05 = 5% acima); vazio = sem reajuste.
+    """
+
+    nome: str
+    crescimento: tuple = ()
+    preco: tuple = ()
+    custo: tuple = ()
+
+
+def cenarios_padrao(crescimento_conservador=CRESCIMENTO_CONSERVADOR, ajuste=AJUSTE_CENARIOS):
+    """Conservador, Otimista (+``ajuste``) e Pessimista (−``ajuste``, mínimo 0)."""
+    conservador = tuple(float(c) for c in crescimento_conservador)
+    return [
+        Cenario("Conservador", conservador),
+        Cenario("Otimista", tuple(c + ajuste for c in conservador)),
+        Cenario("Pessimista", tuple(max(c - ajuste, 0.0) for c in conservador)),
+    ]
+
+
+def por_ano(valores, anos, padrao=0.0):
+    """(cenários × anos) a partir de uma sequência de valores anuais por cenário.
+
+    Sequências curtas repetem o último valor; vazias ficam com ``padrao``.
+    """
+    matriz = np.full((len(valores), anos), padrao, dtype=float)
+    for i, v in enumerate(valores):
+        v = np.asarray(v, dtype=float)[:anos]
+        if len(v):
+            matriz[i, :len(v)] = v
+            matriz[i, len(v):] = v[-1]
+    return matriz
+
+
+def _bases(col, cenarios, meses, inflacao_anual, fatores):
+    """Séries de todos os serviços em cada cenário, somadas por cenário."""
+    anos = -(-meses // 12)
+    # ano que rege a passagem do mês t-1 para t (o índice 0 não cresce)
+    ano = np.maximum(np.arange(meses) - 1, 0) // 12
+    cresc = taxa_mensal(por_ano([c.crescimento for c in cenarios], anos, np.nan))[:, ano] * 100
+    preco = 1 + por_ano([c.preco for c in cenarios], anos)[:, np.arange(meses) // 12]
+    custo = 1 + por_ano([c.custo for c in cenarios], anos)[:, np.arange(meses) // 12]
+
+    # (cenários, serviços, meses): serviços no eixo do meio
+    g = np.where(
+        np.isnan(cresc)[:, None, :], col["crescimento_percentual"][None, :, None], cresc[:, None, :]
+    )
+    quantidade = quantidades_caminho(
+        col["qtd_inicial"][None, :, None], col["qtd_maxima"][None, :, None], g
+    )
+    if fatores is not None:
+        quantidade *= np.asarray(fatores, dtype=float)[None]
+    inflacao = fator_inflacao(meses, inflacao_anual)
+    venda = col["valor_venda_base"][None, :, None] * inflacao * preco[:, None, :]
+    custo_unitario = col["custo_unitario_base"][None, :, None] * inflacao * custo[:, None, :]
+
+    receita = quantidade * venda
+    repasse = receita * (col["repasse_percentual"][None, :, None] / 100)
+    return (
+        quantidade.sum(axis=1), receita.sum(axis=1),
+        (quantidade * custo_unitario).sum(axis=1), repasse.sum(axis=1),
+    )
+
+
+def projetar_cenarios(params, cenarios, meses, tipo_imposto, inflacao_anual=INFLACAO_ANUAL,
+                      fatores=None, limite_elementos=LIMITE_ELEMENTOS):
+    """DRE consolidada dos serviços de ``params`` em cada um dos ``cenarios``.
+
+    Devolve uma ``Projecao`` com um cenário por linha (``tipos`` = nomes);
+    ``fatores`` (serviços × meses) são os de ``dre.sazonalidade``. Os
+    cenários são processados em blocos de até ``limite_elementos``
+    elementos (cenários × serviços × meses).
+    """
+    col = colunas(params)
+    n_cen, n_serv = len(cenarios), len(params)
+    quantidade, receita, custo, repasse = (np.zeros((n_cen, meses)) for _ in range(4))
+    bloco = max(1, limite_elementos // max(1, n_serv * meses))
+    for inicio in range(0, n_cen, bloco):
+        fatia = slice(inicio, inicio + bloco)
+        somas = _bases(col, cenarios[fatia], meses, inflacao_anual, fatores)
+        for destino, soma in zip((quantidade, receita, custo, repasse), somas):
+            destino[fatia] = soma
+
+    # preços médios ponderados pela quantidade (informativos)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        valor_venda = np.where(quantidade > 0, receita / quantidade, 0.0)
+        custo_unitario = np.where(quantidade > 0, custo / quantidade, 0.0)
+    bases = (quantidade, valor_venda, custo_unitario, receita, custo, repasse)
+    investimento = np.full(n_cen, col["investimento_inicial"].sum())
+    return fechar([c.nome for c in cenarios], bases, investimento, tipo_imposto)
+
+
+def tabela_de_cenarios(cenarios, anos):
+    """DataFrame editável: uma linha por cenário e colunas "<campo> Ano k (%)"."""
+    import pandas as pd
+
+    dados = {CENARIO: [c.nome for c in cenarios]}
+    for campo, prefixo in COLUNAS_ANO.items():
+        padrao = np.nan if campo == "crescimento" else 0.0
+        matriz = por_ano([getattr(c, campo) for c in cenarios], anos, padrao) * 100
+        for k in range(anos):
+            dados[f"{prefixo} Ano {k + 1} (%)"] = matriz[:, k]
+    return pd.DataFrame(dados)
+
+
+def cenarios_de_tabela(tabela):
+    """Inverso de ``tabela_de_cenarios``; linhas sem nome são ignoradas.
+
+    Crescimento vazio fica NaN (o de cada serviço); preço e custo vazios, 0.
+    """
+    if CENARIO not in tabela.columns:
+        raise ValueError(f"coluna ausente na tabela de cenários: {CENARIO}")
+    nomes = tabela[CENARIO].astype("string").str.strip()
+    validas = (nomes.notna() & (nomes != "")).to_numpy(dtype=bool)
+    repetidos = sorted(set(nomes[validas][nomes[validas].duplicated()]))
+    if repetidos:
+        raise ValueError(f"cenários repetidos: {', '.join(repetidos)}")
+
+    linhas = tabela.loc[validas]
+    campos = {}
+    for campo, prefixo in COLUNAS_ANO.items():
+        anos = [c for c in linhas.columns if c.startswith(f"{prefixo} Ano ")]
+        anos.sort(key=lambda c: int(c.split()[2]))
+        valores = linhas[anos].astype(float).to_numpy() / 100
+        campos[campo] = valores if campo == "crescimento" else np.nan_to_num(valores)
+    return [
+        Cenario(nome, *(tuple(campos[campo][i].tolist()) for campo in COLUNAS_ANO))
+        for i, nome in enumerate(nomes[validas])
+    ]
+
+
+def resumo_cenarios(proj, inicio=None):
+    """Totais do horizonte por cenário (uma linha por cenário)."""
+    import pandas as pd
+
+    from dre.calendario import rotulo_mes
+
+    return pd.DataFrame(
+        {
+            "Receita Bruta": proj.receita_bruta.sum(axis=1),
+            "Impostos": proj.impostos.sum(axis=1),
+            "Lucro Bruto": proj.lucro_bruto.sum(axis=1),
+            "Lucro Acumulado": proj.lucro_acumulado[:, -1],
+            "Alíquota Efetiva (%)": proj.aliquota_efetiva() * 100,
+            "Payback": [rotulo_mes(m, inicio) if m else "Não atingido" for m in proj.payback],
+        },
+        index=pd.Index(proj.tipos, name=CENARIO),
+    )
+
+
+def comparar(proj, serie="lucro_acumulado", inicio=None):
+    """Uma série da ``Projecao`` lado a lado: meses nas linhas, cenários nas colunas."""
+    import pandas as pd
+
+    from dre.calendario import indice_meses
+
+    return pd.DataFrame(
+        getattr(proj, serie).T, columns=list(proj.tipos), index=indice_meses(proj.meses, inicio)
+    )
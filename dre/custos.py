@@ -0,0 +1,213 @@
+"""Razão de custos e despesas (abas Custos e Despesas).
+
+Cada lançamento é um custo/despesa fixo recorrente, um custo em degraus
+(um degrau a cada ``volume`` atendimentos no mês) ou um valor pontual, com
+reajuste anual próprio. Os lançamentos ficam em colunas (``Razao``) e são
+compilados de uma vez em séries mensais densas por grupo; a DRE completa é
+só soma/subtração dessas séries nas colunas do ``df_agg``, então centenas de
+linhas não pesam na projeção.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+FIXO = "Fixo"
+DEGRAU = "Degrau"
+PONTUAL = "Pontual"
+TIPOS = (FIXO, DEGRAU, PONTUAL)
+
+CUSTO = "custo"
+DESPESA = "despesa"
+DEPRECIACAO = "Depreciação"
+
+# coluna do df_agg com os custos do razão (dre_completa)
+CUSTOS_RAZAO = "Custos do Razão"
+
+CATEGORIAS_DESPESA = ("Pessoal", "Aluguel", "Administrativas", "Marketing", DEPRECIACAO, "Outras")
+
+# colunas da tabela editável nas abas (uma linha por lançamento)
+COLUNAS = {
+    "descricao": "Descrição",
+    "categoria": "Categoria",
+    "tipo": "Tipo",
+    "valor": "Valor (R$)",
+    "inicio": "Início (mês)",
+    "fim": "Fim (mês)",
+    "reajuste": "Reajuste (% a.a.)",
+    "volume": "Volume por Degrau",
+}
+
+
+@dataclass
+class Lancamento:
+    """Um item do razão.
+
+    - ``tipo``: ``FIXO`` (todo mês entre ``inicio`` e ``fim``), ``DEGRAU``
+      (``valor`` por degrau; ceil(quantidade do mês / ``volume``) degraus) ou
+      ``PONTUAL`` (só no mês ``inicio``);
+    - ``fim`` = 0 vai até o fim do horizonte;
+    - ``reajuste``: % ao ano, aplicado a cada 12 meses a partir do M1 (os
+      valores são informados em moeda do M1).
+    """
+
+    descricao: str
+    valor: float
+    tipo: str = FIXO
+    grupo: str = DESPESA
+    categoria: str = ""
+    inicio: int = 1
+    fim: int = 0
+    reajuste: float = 0.0
+    volume: float = 0.0
+
+
+@dataclass
+class Razao:
+    """Lançamentos em colunas (um array por campo), prontos para compilar."""
+
+    grupo: np.ndarray      # CUSTO / DESPESA
+    depreciacao: np.ndarray
+    tipo: np.ndarray
+    valor: np.ndarray
+    inicio: np.ndarray
+    fim: np.ndarray
+    reajuste: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self):
+        return len(self.valor)
+
+
+def razao(lancamentos):
+    """``Razao`` a partir de uma lista de ``Lancamento``."""
+    lancamentos = list(lancamentos)
+    return Razao(
+        grupo=np.array([l.grupo for l in lancamentos], dtype=object),
+        depreciacao=np.array([l.categoria == DEPRECIACAO for l in lancamentos], dtype=bool),
+        tipo=np.array([l.tipo for l in lancamentos], dtype=object),
+        valor=np.array([l.valor for l in lancamentos], dtype=float),
+        inicio=np.array([l.inicio for l in lancamentos], dtype=int),
+        fim=np.array([l.fim for l in lancamentos], dtype=int),
+        reajuste=np.array([l.reajuste for l in lancamentos], dtype=float),
+        volume=np.array([l.volume for l in lancamentos], dtype=float),
+    )
+
+
+def razao_de_tabela(df, grupo):
+    """``Razao`` a partir da tabela editável (colunas de ``COLUNAS``).
+
+    Linhas sem valor são ignoradas; campos vazios assumem os padrões de
+    ``Lancamento``.
+    """
+    df = df[df[COLUNAS["valor"]].notna()]
+
+    def coluna(campo, padrao, dtype):
+        nome = COLUNAS[campo]
+        if nome not in df.columns:
+            return np.full(len(df), padrao, dtype=dtype)
+        return df[nome].fillna(padrao).to_numpy(dtype=dtype)
+
+    return Razao(
+        grupo=np.full(len(df), grupo, dtype=object),
+        depreciacao=coluna("categoria", "", object) == DEPRECIACAO,
+        tipo=coluna("tipo", FIXO, object),
+        valor=coluna("valor", 0.0, float),
+        inicio=coluna("inicio", 1, float).astype(int),
+        fim=coluna("fim", 0, float).astype(int),
+        reajuste=coluna("reajuste", 0.0, float),
+        volume=coluna("volume", 0.0, float),
+    )
+
+
+def juntar(*razoes):
+    """Concatena razões (ex.: a da aba Custos e a da aba Despesas)."""
+    return Razao(**{
+        campo: np.concatenate([getattr(r, campo) for r in razoes])
+        for campo in Razao.__dataclass_fields__
+    })
+
+
+def _valores(razao, meses):
+    """Valor de cada lançamento por mês (lançamentos × meses), degraus ainda por unidade."""
+    t = np.arange(1, meses + 1)
+    fim = np.where(razao.fim > 0, razao.fim, meses)[:, None]
+    ativo = (t >= razao.inicio[:, None]) & (t <= fim)
+    pontual = razao.tipo == PONTUAL
+    ativo[pontual] = t == razao.inicio[pontual, None]
+
+    fator = (1 + razao.reajuste[:, None] / 100) ** ((t - 1) // 12)
+    return np.where(ativo, razao.valor[:, None] * fator, 0.0)
+
+
+def _degraus(volume_degrau, quantidade):
+    """Degraus ativos, ``ceil(quantidade / volume)``, por lançamento e mês.
+
+    ``volume_degrau`` tem um valor por lançamento (volume <= 0 não cobra
+    nada); ``quantidade`` (..., meses) ganha o eixo dos lançamentos antes dos
+    meses, então o resultado é (..., lançamentos, meses).
+    """
+    volume_degrau = volume_degrau[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        degraus = np.ceil(quantidade[..., None, :] / volume_degrau)
+    return np.where(volume_degrau > 0, degraus, 0.0)
+
+
+def compilar(razao, meses, quantidade=None):
+    """Séries mensais densas ``{"custo", "despesa", "depreciacao"}`` do razão.
+
+    Monta a matriz (lançamentos × meses) de uma vez e reduz por grupo;
+    ``quantidade`` é o volume consolidado de cada mês (usado pelos degraus).
+    """
+    valores = _valores(razao, meses)
+    degrau = razao.tipo == DEGRAU
+    if degrau.any():
+        volume = np.zeros(meses) if quantidade is None else np.asarray(quantidade, dtype=float)
+        valores[degrau] *= _degraus(razao.volume[degrau], volume)
+
+    custo = razao.grupo == CUSTO
+    despesa = ~custo & ~razao.depreciacao
+    depreciacao = ~custo & razao.depreciacao
+    return {
+        "custo": valores[custo].sum(axis=0),
+        "despesa": valores[despesa].sum(axis=0),
+        "depreciacao": valores[depreciacao].sum(axis=0),
+    }
+
+
+def custos_operacionais(razao, quantidade):
+    """Custos + despesas do razão (o que separa o Lucro Bruto do EBITDA) por linha.
+
+    ``quantidade`` é o volume consolidado (linhas × meses), ex.: uma linha
+    por variante da sensibilidade; os degraus seguem o volume de cada linha.
+    """
+    quantidade = np.atleast_2d(np.asarray(quantidade, dtype=float))
+    valores = _valores(razao, quantidade.shape[1])
+    operacional = (razao.grupo == CUSTO) | ~razao.depreciacao
+    degrau = razao.tipo == DEGRAU
+
+    # fixos e pontuais uma vez; degraus contra o volume de todas as linhas de uma vez
+    total = np.broadcast_to(valores[operacional & ~degrau].sum(axis=0), quantidade.shape)
+    escalonado = operacional & degrau
+    if escalonado.any():
+        degraus = _degraus(razao.volume[escalonado], quantidade)  # linhas × degraus × meses
+        total = total + np.einsum("ldm,dm->lm", degraus, valores[escalonado])
+    return total
+
+
+def dre_completa(df_agg, series):
+    """``df_agg`` com custos do razão, despesas, EBITDA e resultado operacional.
+
+    ``series`` é o retorno de ``compilar``. Os custos do razão (fixos, em
+    degraus e pontuais) entram no Lucro Bruto (e no Lucro Acumulado); as
+    despesas operacionais e a depreciação ficam abaixo dele.
+    """
+    df = df_agg.copy()
+    df.insert(df.columns.get_loc("Lucro Bruto"), CUSTOS_RAZAO, series["custo"])
+    df["Lucro Bruto"] -= series["custo"]
+    df["Lucro Acumulado"] = df["Lucro Bruto"].cumsum()
+    df["Despesas Operacionais"] = series["despesa"]
+    df["EBITDA"] = df["Lucro Bruto"] - series["despesa"]
+    df["EBITDA Acumulado"] = df["EBITDA"].cumsum()
+    df["Depreciação"] = series["depreciacao"]
+    df["Resultado Operacional"] = df["EBITDA"] - series["depreciacao"]
+    return df
@@ -0,0 +1,216 @@
+"""Instrumentação de uma execução (rerun) das páginas, sem Streamlit.
+
+``Diagnostico`` cronometra etapas (``with diag.etapa("Projeção") as e``),
+que podem ser aninhadas, e registra as linhas processadas e a variação de
+blocos de memória alocados (``sys.getallocatedblocks``, de custo
+desprezível) em cada uma. Opcionalmente, para a execução inteira:
+
+- ``perfil=True``: cProfile (``resumo_perfil``);
+- ``memoria=True``: tracemalloc, com o pico de memória de cada etapa e as
+  linhas de código que mais alocaram (``maiores_alocacoes``).
+
+O resultado sai como tabela, como JSON (uma linha por execução em
+``execucoes.jsonl``) ou no formato texto do Prometheus (um ``.prom`` por
+página, para o textfile collector do node_exporter).
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+
+DIRETORIO = "diagnostico"
+ARQUIVO_JSON = "execucoes.jsonl"
+LINHAS_PERFIL = 25
+LINHAS_ALOCACOES = 10
+PREFIXO_METRICAS = "dre"
+
+
+@dataclass
+class Etapa:
+    nome: str
+    nivel: int = 0
+    segundos: float = 0.0
+    linhas: int = 0
+    blocos: int = 0  # variação de blocos alocados (líquida)
+    pico_mb: float = None  # só com tracemalloc
+
+
+@dataclass
+class Diagnostico:
+    """Etapas, contadores e capturas opcionais de uma execução de ``pagina``."""
+
+    pagina: str
+    perfil: bool = False
+    memoria: bool = False
+    etapas: list = field(default_factory=list)
+    contadores: dict = field(default_factory=dict)
+    avisos: list = field(default_factory=list)
+    total: float = None
+
+    def __post_init__(self):
+        self._inicio = time.perf_counter()
+        self._nivel = 0
+        self._perfil = self._alocacoes = None
+        self._iniciou_tracemalloc = False
+        if self.perfil:
+            self._perfil = cProfile.Profile()
+            try:
+                self._perfil.enable()
+            except ValueError:
+                # só um profiler por processo (outra sessão já está medindo)
+                self._perfil = None
+                self.avisos.append("cProfile ocupado por outra execução; perfil não capturado.")
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._iniciou_tracemalloc = True
+
+    @contextmanager
+    def etapa(self, nome, linhas=0):
+        """Cronometra o bloco; ``linhas`` pode ser definido depois, na etapa devolvida."""
+        registro = Etapa(nome, self._nivel, linhas=linhas)
+        self.etapas.append(registro)
+        self._nivel += 1
+        blocos = sys.getallocatedblocks()
+        rastreando = tracemalloc.is_tracing() and self.memoria
+        if rastreando:
+            atual, _ = tracemalloc.get_traced_memory()
+            if registro.nivel == 0:
+                tracemalloc.reset_peak()
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro.segundos = time.perf_counter() - inicio
+            registro.blocos = sys.getallocatedblocks() - blocos
+            if rastreando:
+                # pico desde o início da etapa de nível 0 que a contém
+                registro.pico_mb = max(0, tracemalloc.get_traced_memory()[1] - atual) / 2**20
+            self._nivel -= 1
+
+    def contar(self, nome, valor):
+        self.contadores[nome] = valor
+
+    def finalizar(self):
+        """Encerra a medição (tempo total e capturas); pode ser chamado uma vez."""
+        if self.total is not None:
+            return self
+        self.total = time.perf_counter() - self._inicio
+        if self._perfil is not None:
+            self._perfil.disable()
+        if self.memoria and tracemalloc.is_tracing():
+            self._alocacoes = tracemalloc.take_snapshot().statistics("lineno")[:LINHAS_ALOCACOES]
+            if self._iniciou_tracemalloc:
+                tracemalloc.stop()
+        return self
+
+    def resumo_perfil(self, linhas=LINHAS_PERFIL, ordem="cumulative"):
+        """Funções mais caras do cProfile (texto do ``pstats``); None sem perfil."""
+        if self._perfil is None:
+            return None
+        saida = io.StringIO()
+        pstats.Stats(self._perfil, stream=saida).strip_dirs().sort_stats(ordem).print_stats(linhas)
+        return saida.getvalue()
+
+    def maiores_alocacoes(self):
+        """Linhas de código com mais memória alocada e viva no fim da execução."""
+        return [str(estatistica) for estatistica in self._alocacoes or []]
+
+    def registro(self):
+        """Dicionário serializável da execução."""
+        return {
+            "pagina": self.pagina,
+            "momento": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "total_segundos": self.total,
+            "etapas": [asdict(e) for e in self.etapas],
+            "contadores": dict(self.contadores),
+        }
+
+    def tabela(self):
+        """DataFrame com uma linha por etapa (aninhadas recuadas no nome)."""
+        import pandas as pd
+
+        total = self.total or time.perf_counter() - self._inicio
+        df = pd.DataFrame({
+            "Etapa": ["    " * e.nivel + e.nome for e in self.etapas],
+            "Tempo (ms)": [e.segundos * 1e3 for e in self.etapas],
+            "Total (%)": [e.segundos / total * 100 if total else 0.0 for e in self.etapas],
+            "Linhas": [e.linhas for e in self.etapas],
+            "Linhas/s": [e.linhas / e.segundos if e.segundos and e.linhas else 0.0 for e in self.etapas],
+            "Blocos alocados (Δ)": [e.blocos for e in self.etapas],
+        })
+        if self.memoria:
+            df["Pico (MB)"] = [e.pico_mb for e in self.etapas]
+        return df
+
+    def _por_nome(self, atributo):
+        """Soma de ``atributo`` por nome de etapa (uma série por etapa no Prometheus)."""
+        somas = {}
+        for e in self.etapas:
+            somas[e.nome] = somas.get(e.nome, 0) + getattr(e, atributo)
+        return somas
+
+    def para_json(self):
+        return json.dumps(self.registro(), ensure_ascii=False)
+
+    def para_prometheus(self):
+        """Métricas da execução no formato texto de exposição do Prometheus."""
+        pagina = _rotulo(self.pagina)
+        linhas = [
+            f"# HELP {PREFIXO_METRICAS}_execucao_segundos Duração da última execução da página.",
+            f"# TYPE {PREFIXO_METRICAS}_execucao_segundos gauge",
+            f'{PREFIXO_METRICAS}_execucao_segundos{{pagina="{pagina}"}} {self.total or 0.0:.6f}',
+        ]
+        metricas = (
+            ("etapa_segundos", "Duração da etapa na última execução.", "segundos"),
+            ("etapa_linhas", "Linhas processadas pela etapa na última execução.", "linhas"),
+            ("etapa_blocos_alocados", "Variação de blocos alocados pela etapa.", "blocos"),
+        )
+        for nome, ajuda, atributo in metricas:
+            linhas += [
+                f"# HELP {PREFIXO_METRICAS}_{nome} {ajuda}",
+                f"# TYPE {PREFIXO_METRICAS}_{nome} gauge",
+            ]
+            for etapa, valor in self._por_nome(atributo).items():
+                linhas.append(
+                    f'{PREFIXO_METRICAS}_{nome}{{pagina="{pagina}",etapa="{_rotulo(etapa)}"}} {valor}'
+                )
+        if self.contadores:
+            linhas += [
+                f"# HELP {PREFIXO_METRICAS}_contador Contadores da última execução (ex.: cache).",
+                f"# TYPE {PREFIXO_METRICAS}_contador gauge",
+            ]
+            for nome, valor in self.contadores.items():
+                linhas.append(
+                    f'{PREFIXO_METRICAS}_contador{{pagina="{pagina}",nome="{_rotulo(nome)}"}} {valor}'
+                )
+        return "\n".join(linhas) + "\n"
+
+    def gravar_json(self, diretorio=DIRETORIO):
+        """Acrescenta a execução em ``diretorio/execucoes.jsonl``; devolve o caminho."""
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = os.path.join(diretorio, ARQUIVO_JSON)
+        with open(caminho, "a", encoding="utf-8") as arquivo:
+            arquivo.write(self.para_json() + "\n")
+        return caminho
+
+    def gravar_prometheus(self, diretorio=DIRETORIO):
+        """Grava ``diretorio/<pagina>.prom`` (troca atômica: o coletor nunca lê pela metade)."""
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = os.path.join(diretorio, f"{self.pagina}.prom")
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            arquivo.write(self.para_prometheus())
+        os.replace(temporario, caminho)
+        return caminho
+
+
+def _rotulo(valor):
+    """Valor de rótulo do Prometheus com \\, aspas e quebras de linha escapados."""
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,106 @@
+"""Apoio à exibição de tabelas e gráficos nas páginas.
+
+As páginas formatam os números com ``st.column_config`` sobre a tabela crua
+(formatação feita no navegador) em vez de ``DataFrame.style.format``, que
+formata cada célula em Python e envia o HTML/Arrow inteiro a cada rerun.
+
+Importar este módulo não importa o Streamlit; só ``painel_diagnostico``, o
+expander comum ao fim das páginas, o importa quando é chamado.
+"""
+import numpy as np
+
+from dre.cache import estatisticas_cache
+from dre.calendario import rotulos_meses
+from dre.diagnostico import DIRETORIO
+
+# formato printf do ``st.column_config.NumberColumn``
+FORMATO_MOEDA = "R$ %.2f"
+FORMATO_INTEIRO = "%d"
+FORMATO_PERCENTUAL = "%.2f%%"
+
+# acima disso os gráficos de linha recebem pontos igualmente espaçados
+MAX_PONTOS_GRAFICO = 120
+# até quantos serviços a saída por serviço usa abas; acima, um seletor
+LIMITE_ABAS = 8
+
+
+def formato_coluna(coluna):
+    """Formato de exibição de uma coluna pelo nome: percentual, contagem ou moeda."""
+    if "(%)" in coluna:
+        return FORMATO_PERCENTUAL
+    if coluna in ("Meses", "Quantidade"):
+        return FORMATO_INTEIRO
+    return FORMATO_MOEDA
+
+
+def reduzir_pontos(df, max_pontos=MAX_PONTOS_GRAFICO):
+    """Até ``max_pontos`` linhas igualmente espaçadas de ``df`` (sempre com a última)."""
+    n = len(df)
+    if n <= max_pontos:
+        return df
+    indices = np.arange(0, n, -(-n // max_pontos))
+    if indices[-1] != n - 1:
+        indices = np.append(indices, n - 1)
+    return df.iloc[indices]
+
+
+def para_tabela(df):
+    """``df`` com o índice de meses trocado pelos rótulos de exibição."""
+    return df.set_axis(rotulos_meses(df.index), axis=0)
+
+
+def para_grafico(df, max_pontos=MAX_PONTOS_GRAFICO):
+    """``df`` pronto para ``st.line_chart``: datas reais no eixo x e pontos reduzidos.
+
+    Índice inteiro vira eixo numérico e ``PeriodIndex`` vira datas, então o
+    gráfico já sai em ordem cronológica sem ordenar rótulos de texto.
+    """
+    import pandas as pd
+
+    if isinstance(df.index, pd.PeriodIndex):
+        df = df.to_timestamp()
+    return reduzir_pontos(df, max_pontos)
+
+
+def painel_diagnostico(diag):
+    """Fecha ``diag`` e mostra o expander "Diagnóstico" no fim da página.
+
+    Os toggles valem para o próximo rerun (as chaves ``diag_*`` que a página
+    lê ao criar o ``Diagnostico``); com "Gravar", a execução vai para
+    ``DIRETORIO`` em JSON e no ``<pagina>.prom``.
+    """
+    import streamlit as st
+
+    diag.contadores.update(estatisticas_cache())
+    diag.finalizar()
+    with st.expander("🩺 Diagnóstico desta execução"):
+        d1, d2, d3 = st.columns(3)
+        d1.toggle("Perfil (cProfile)", key="diag_perfil",
+                  help="Captura o perfil de funções do próximo rerun inteiro.")
+        d2.toggle("Memória (tracemalloc)", key="diag_memoria",
+                  help="Pico de memória por etapa e as linhas que mais alocam "
+                       "(deixa o rerun mais lento).")
+        d3.toggle(f"Gravar em {DIRETORIO}/", key="diag_gravar",
+                  help="Uma linha JSON por execução e as métricas no formato texto do Prometheus.")
+        st.metric("Tempo total do rerun", f"{diag.total * 1e3:,.1f} ms")
+        for aviso in diag.avisos:
+            st.warning(aviso)
+        st.dataframe(diag.tabela(), hide_index=True, column_config={
+            "Tempo (ms)": st.column_config.NumberColumn(format="%.2f"),
+            "Total (%)": st.column_config.NumberColumn(format=FORMATO_PERCENTUAL),
+            "Linhas/s": st.column_config.NumberColumn(format=FORMATO_INTEIRO),
+            "Pico (MB)": st.column_config.NumberColumn(format="%.2f"),
+        })
+        st.caption(" · ".join(f"{nome}: {valor:,}" for nome, valor in diag.contadores.items()))
+        if diag.perfil:
+            st.code(diag.resumo_perfil() or "", language="text")
+        if diag.memoria:
+            st.code("\n".join(diag.maiores_alocacoes()), language="text")
+        j1, j2 = st.columns(2)
+        j1.download_button("⬇️ JSON", diag.para_json(), "diagnostico.json", "application/json")
+        j2.download_button(
+            "⬇️ Prometheus", diag.para_prometheus(), f"{diag.pagina}.prom", "text/plain"
+        )
+    if st.session_state.get("diag_gravar"):
+        diag.gravar_json()
+        diag.gravar_prometheus()
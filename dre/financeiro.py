@@ -0,0 +1,203 @@
+"""Indicadores financeiros: VPL, TIR, TIRM e payback descontado.
+
+O fluxo de caixa de cada série é −investimento no mês 0 seguido do lucro de
+cada mês (1..meses). Tudo é vetorizado sobre as linhas (serviços, caminhos
+do Monte Carlo, variantes): a TIR de milhares de séries sai de um único
+Newton com salvaguarda por bisseção, sem laço Python por série. As linhas
+são processadas em blocos de até ``LIMITE_ELEMENTOS`` elementos, então a
+memória de trabalho não cresce com o número de séries.
+
+As taxas são mensais nos cálculos; ``indicadores`` recebe e devolve taxas
+anuais.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from dre.projecao import mes_payback, taxa_mensal
+
+TAXA_DESCONTO = 0.15
+ITERACOES = 100
+TOLERANCIA = 1e-9
+# taxas mensais em que o VPL é testado para cercar a TIR, em ordem; depois do
+# teto, ele é ampliado (×4) até AMPLIACOES vezes para fluxos muito rentáveis
+TAXA_MINIMA = -0.9
+TAXA_MAXIMA = 1.0
+GRADE = (TAXA_MINIMA, -0.5, -0.2, 0.0, 0.02, 0.05, 0.1, 0.2, 0.5, TAXA_MAXIMA)
+AMPLIACOES = 8
+LIMITE_ELEMENTOS = 4_000_000
+
+
+@dataclass
+class Indicadores:
+    """Indicadores por linha; taxas anuais em fração e NaN quando indefinidas."""
+
+    vpl: np.ndarray
+    tir: np.ndarray
+    tirm: np.ndarray
+    payback_descontado: np.ndarray  # mês 1-based; 0 = não atingido
+    taxa_desconto: float
+
+
+def fluxos(lucro, investimento):
+    """Fluxo de caixa (..., meses + 1): −investimento no mês 0 e o lucro mensal."""
+    lucro = np.asarray(lucro, dtype=float)
+    investimento = np.broadcast_to(np.asarray(investimento, dtype=float), lucro.shape[:-1])
+    return np.concatenate([-investimento[..., None], lucro], axis=-1)
+
+
+def anualizar(taxa):
+    """Taxa mensal -> anual equivalente."""
+    return (1 + np.asarray(taxa, dtype=float)) ** 12 - 1
+
+
+def _descontos(taxa, periodos):
+    return (1 + np.asarray(taxa, dtype=float))[..., None] ** -np.arange(periodos, dtype=float)
+
+
+def vpl(fluxo, taxa):
+    """Valor presente líquido de cada linha de ``fluxo`` a uma ``taxa`` mensal
+    (escalar ou uma por linha)."""
+    fluxo = np.asarray(fluxo, dtype=float)
+    return (fluxo * _descontos(taxa, fluxo.shape[-1])).sum(axis=-1)
+
+
+def _vpl_derivada(colunas, taxa):
+    """VPL e dVPL/dtaxa por Horner em x = 1/(1 + taxa); ``colunas`` é (períodos × linhas)."""
+    x = 1 / (1 + taxa)
+    valor = colunas[-1].copy()
+    derivada = np.zeros_like(valor)
+    for coluna in colunas[-2::-1]:
+        derivada = derivada * x + valor
+        valor = valor * x + coluna
+    return valor, -derivada * x * x
+
+
+def _cercar(colunas):
+    """Trecho da grade com troca de sinal no VPL mais próximo de 0% ao mês, por linha.
+
+    Os trechos ligam pontos vizinhos de ``GRADE``; as ampliações do teto só
+    são avaliadas enquanto alguma linha não tem troca de sinal. Pontos em que
+    o VPL não é finito (ex.: −90% ao mês num horizonte longo) são pulados, e
+    o trecho liga os pontos finitos vizinhos. Devolve ``(lo, hi, f_lo, valido)``.
+    """
+    n = colunas.shape[1]
+    pontos = GRADE + tuple(TAXA_MAXIMA * 4 ** k for k in range(1, AMPLIACOES + 1))
+    lo, hi, f_lo = np.full(n, np.nan), np.full(n, np.nan), np.full(n, np.nan)
+    distancia = np.full(n, np.inf)
+    anterior, f_anterior = np.full(n, np.nan), np.full(n, np.nan)
+    with np.errstate(over="ignore", invalid="ignore"):
+        for ponto in pontos:
+            if ponto > TAXA_MAXIMA and np.isfinite(distancia).all():
+                break
+            f_ponto = _vpl_derivada(colunas, np.full(n, ponto))[0]
+            finito = np.isfinite(f_ponto)
+            troca = finito & np.isfinite(f_anterior) & (np.sign(f_anterior) != np.sign(f_ponto))
+            melhor = troca & (np.abs(anterior + ponto) / 2 < distancia)
+            lo = np.where(melhor, anterior, lo)
+            hi = np.where(melhor, ponto, hi)
+            f_lo = np.where(melhor, f_anterior, f_lo)
+            distancia = np.where(melhor, np.abs(anterior + ponto) / 2, distancia)
+            anterior = np.where(finito, ponto, anterior)
+            f_anterior = np.where(finito, f_ponto, f_anterior)
+    return lo, hi, f_lo, np.isfinite(distancia)
+
+
+def _tir_bloco(fluxo, iteracoes, tolerancia):
+    colunas = np.ascontiguousarray(fluxo.T)
+    n = len(fluxo)
+    lo, hi, f_lo, valido = _cercar(colunas)
+    taxa = np.full(n, np.nan)
+    # só as linhas ainda sem convergência seguem iterando
+    ativas = np.flatnonzero(valido)
+    lo, hi, f_lo, colunas = lo[ativas], hi[ativas], f_lo[ativas], colunas[:, ativas]
+    atual = np.clip(np.full(len(ativas), 0.01), lo, hi)
+    for _ in range(iteracoes):
+        valor, derivada = _vpl_derivada(colunas, atual)
+        # mantém o intervalo com troca de sinal em volta da raiz
+        lado_lo = np.sign(valor) == np.sign(f_lo)
+        lo = np.where(lado_lo, atual, lo)
+        f_lo = np.where(lado_lo, valor, f_lo)
+        hi = np.where(lado_lo, hi, atual)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = atual - valor / derivada
+        fora = ~np.isfinite(newton) | (newton <= lo) | (newton >= hi)
+        nova = np.where(valor == 0, atual, np.where(fora, (lo + hi) / 2, newton))
+        convergiu = np.abs(nova - atual) <= tolerancia * (1 + np.abs(atual))
+        taxa[ativas[convergiu]] = nova[convergiu]
+        seguem = ~convergiu
+        if not seguem.any():
+            break
+        ativas, atual = ativas[seguem], nova[seguem]
+        lo, hi, f_lo, colunas = lo[seguem], hi[seguem], f_lo[seguem], colunas[:, seguem]
+    else:
+        taxa[ativas] = atual
+    return taxa
+
+
+def tir(fluxo, iteracoes=ITERACOES, tolerancia=TOLERANCIA, limite_elementos=LIMITE_ELEMENTOS):
+    """TIR mensal de cada linha de ``fluxo`` (NaN sem troca de sinal no VPL).
+
+    Newton sobre o VPL, com a raiz sempre cercada por um intervalo: passos
+    que saem dele viram bisseção. O intervalo sai dos pontos de ``GRADE``
+    (e das ampliações do teto), não só dos extremos, então fluxos não
+    convencionais (várias trocas de sinal, ex.: meses finais muito negativos)
+    também são cercados; com mais de uma TIR, devolve a do trecho com troca
+    de sinal mais próximo de 0% ao mês.
+    """
+    fluxo = np.asarray(fluxo, dtype=float)
+    forma, periodos = fluxo.shape[:-1], fluxo.shape[-1]
+    linhas = fluxo.reshape(-1, periodos)
+    resultado = np.empty(len(linhas))
+    bloco = max(1, limite_elementos // max(1, periodos))
+    for inicio in range(0, len(linhas), bloco):
+        fatia = slice(inicio, inicio + bloco)
+        resultado[fatia] = _tir_bloco(linhas[fatia], iteracoes, tolerancia)
+    return resultado.reshape(forma)
+
+
+def tirm(fluxo, taxa_financiamento, taxa_reinvestimento=None):
+    """TIR modificada mensal: saídas descontadas a ``taxa_financiamento`` e
+    entradas capitalizadas a ``taxa_reinvestimento`` (padrão: a mesma)."""
+    fluxo = np.asarray(fluxo, dtype=float)
+    if taxa_reinvestimento is None:
+        taxa_reinvestimento = taxa_financiamento
+    periodos = fluxo.shape[-1]
+    n = periodos - 1
+    saidas = -(np.minimum(fluxo, 0) * _descontos(taxa_financiamento, periodos)).sum(axis=-1)
+    capitalizacao = (1 + np.asarray(taxa_reinvestimento, dtype=float))[..., None] ** (
+        n - np.arange(periodos, dtype=float)
+    )
+    entradas = (np.maximum(fluxo, 0) * capitalizacao).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where((saidas > 0) & (entradas > 0) & (n > 0), (entradas / saidas) ** (1 / n) - 1, np.nan)
+
+
+def payback_descontado(lucro, investimento, taxa):
+    """Primeiro mês (1-based) em que o lucro descontado acumulado cobre o investimento."""
+    lucro = np.asarray(lucro, dtype=float)
+    descontado = lucro * _descontos(taxa, lucro.shape[-1] + 1)[..., 1:]
+    return mes_payback(np.cumsum(descontado, axis=-1), investimento)
+
+
+def indicadores(lucro, investimento, taxa_anual=TAXA_DESCONTO, taxa_reinvestimento_anual=None):
+    """VPL, TIR e TIRM (anuais) e payback descontado de cada linha de ``lucro``.
+
+    ``lucro`` tem os meses no último eixo (ex.: ``Projecao.lucro_bruto`` ou a
+    coluna de lucro/EBITDA do ``df_agg``) e ``investimento`` é do mês 0.
+    """
+    taxa = taxa_mensal(taxa_anual)
+    reinvestimento = None if taxa_reinvestimento_anual is None else taxa_mensal(taxa_reinvestimento_anual)
+    fluxo = fluxos(lucro, investimento)
+    return Indicadores(
+        vpl=vpl(fluxo, taxa),
+        tir=anualizar(tir(fluxo)),
+        tirm=anualizar(tirm(fluxo, taxa, reinvestimento)),
+        payback_descontado=payback_descontado(lucro, investimento, taxa),
+        taxa_desconto=float(taxa_anual),
+    )
+
+
+def indicadores_projecao(proj, taxa_anual=TAXA_DESCONTO, taxa_reinvestimento_anual=None):
+    """``indicadores`` de cada linha de uma ``Projecao`` (lucro bruto mensal)."""
+    return indicadores(proj.lucro_bruto, proj.investimento, taxa_anual, taxa_reinvestimento_anual)
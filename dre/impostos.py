@@ -0,0 +1,139 @@
+"""Regimes de tributação com alíquota mês a mês.
+
+No Simples Nacional a faixa de cada mês vem da receita bruta acumulada nos
+12 meses anteriores (RBT12), e a alíquota efetiva é
+``(RBT12 × alíquota nominal − parcela a deduzir) / RBT12``. O RBT12 de todas
+as linhas e meses sai de uma soma acumulada (janela deslizante em O(meses)) e
+a faixa de um ``searchsorted`` nos limites, numa passada vetorizada só.
+
+As tabelas são plugáveis: ``REGIMES`` mapeia o nome exibido nas páginas para
+uma ``TabelaImposto``, e qualquer função que recebe ``tipo_imposto`` aceita
+também uma ``TabelaImposto`` avulsa.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+IMPOSTO_UNICO = "Imposto Único (12%)"
+IMPOSTO_FAIXA = "Por Faixa de Faturamento"
+IMPOSTO_ANEXO_V = "Simples Nacional — Anexo V"
+IMPOSTO_PRESUMIDO = "Lucro Presumido"
+ALIQUOTA_UNICA = 0.12
+
+# Simples Nacional, Anexo III (LC 123/2006, redação da LC 155/2016)
+# (limite inferior, limite superior, alíquota nominal, parcela a deduzir) — vale inf < RBT12 <= sup
+FAIXAS = [
+    (0, 180000, 0.06, 0),
+    (180000, 360000, 0.112, 9360),
+    (360000, 720000, 0.135, 17640),
+    (720000, 1800000, 0.16, 35640),
+    (1800000, 3600000, 0.21, 125640),
+    (3600000, 4800000, 0.33, 648000),
+]
+
+# Simples Nacional, Anexo V
+FAIXAS_ANEXO_V = [
+    (0, 180000, 0.155, 0),
+    (180000, 360000, 0.18, 4500),
+    (360000, 720000, 0.195, 9900),
+    (720000, 1800000, 0.205, 17100),
+    (1800000, 3600000, 0.23, 62100),
+    (3600000, 4800000, 0.305, 540000),
+]
+
+# Lucro Presumido de serviços: PIS 0,65% + COFINS 3% + IRPJ 15% e CSLL 9%
+# sobre a presunção de 32% + ISS de 5% (sem o adicional de IRPJ)
+ALIQUOTA_PRESUMIDO = 0.0065 + 0.03 + 0.15 * 0.32 + 0.09 * 0.32 + 0.05
+
+
+@dataclass(frozen=True)
+class TabelaImposto:
+    """Tabela progressiva sobre o RBT12; com uma faixa só vira alíquota fixa.
+
+    ``faixas`` segue o formato de ``FAIXAS``. Acima do último limite (teto do
+    Simples) vale a última faixa.
+    """
+
+    nome: str
+    faixas: tuple
+
+    @property
+    def fixa(self):
+        return len(self.faixas) == 1 and self.faixas[0][3] == 0
+
+    @property
+    def teto(self):
+        return float(self.faixas[-1][1])
+
+    def limites(self):
+        return np.array([sup for _, sup, _, _ in self.faixas[:-1]], dtype=float)
+
+    def nominais(self):
+        return np.array([nominal for _, _, nominal, _ in self.faixas], dtype=float)
+
+    def deducoes(self):
+        return np.array([deducao for _, _, _, deducao in self.faixas], dtype=float)
+
+
+def aliquota_fixa(nome, aliquota):
+    return TabelaImposto(nome, ((0, np.inf, aliquota, 0),))
+
+
+REGIMES = {
+    IMPOSTO_UNICO: aliquota_fixa(IMPOSTO_UNICO, ALIQUOTA_UNICA),
+    IMPOSTO_FAIXA: TabelaImposto(IMPOSTO_FAIXA, tuple(FAIXAS)),
+    IMPOSTO_ANEXO_V: TabelaImposto(IMPOSTO_ANEXO_V, tuple(FAIXAS_ANEXO_V)),
+    IMPOSTO_PRESUMIDO: aliquota_fixa(IMPOSTO_PRESUMIDO, ALIQUOTA_PRESUMIDO),
+}
+
+
+def tabela(tipo_imposto):
+    """``TabelaImposto`` de um nome de ``REGIMES`` (ou a própria tabela)."""
+    if isinstance(tipo_imposto, TabelaImposto):
+        return tipo_imposto
+    try:
+        return REGIMES[tipo_imposto]
+    except KeyError:
+        raise ValueError(f"regime de imposto desconhecido: {tipo_imposto!r}") from None
+
+
+def rbt12(receita_mensal):
+    """Receita bruta dos 12 meses anteriores a cada mês (último eixo = meses).
+
+    Nos primeiros 12 meses de atividade vale a regra de início de atividade:
+    no 1º mês, a receita do próprio mês × 12; depois, a média dos meses
+    anteriores × 12. Uma soma acumulada dá todas as janelas em O(meses).
+    """
+    receita = np.asarray(receita_mensal, dtype=float)
+    meses = receita.shape[-1]
+    acumulada = np.zeros(receita.shape[:-1] + (meses + 1,))
+    np.cumsum(receita, axis=-1, out=acumulada[..., 1:])
+
+    t = np.arange(meses)
+    anteriores = acumulada[..., :-1]                             # soma dos meses 0..t-1
+    janela = anteriores - acumulada[..., np.maximum(t - 12, 0)]  # meses t-12..t-1
+    inicio = anteriores / np.maximum(t, 1) * 12
+    inicio[..., 0] = receita[..., 0] * 12
+    return np.where(t < 12, inicio, janela)
+
+
+def aliquota_mensal(receita_mensal, tipo_imposto):
+    """Alíquota efetiva de cada mês (mesmo formato de ``receita_mensal``)."""
+    tab = tabela(tipo_imposto)
+    receita = np.asarray(receita_mensal, dtype=float)
+    if tab.fixa:
+        return np.full(receita.shape, tab.faixas[0][2])
+
+    base = rbt12(receita)
+    faixa = np.searchsorted(tab.limites(), base, side="left")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        efetiva = (base * tab.nominais()[faixa] - tab.deducoes()[faixa]) / base
+    return np.where(base > 0, efetiva, 0.0)
+
+
+def acima_do_teto(receita_mensal, tipo_imposto):
+    """Se o RBT12 passa do teto da tabela em algum mês (por linha)."""
+    tab = tabela(tipo_imposto)
+    if tab.fixa:
+        return np.zeros(np.shape(receita_mensal)[:-1], dtype=bool)
+    return (rbt12(receita_mensal) > tab.teto).any(axis=-1)
@@ -0,0 +1,272 @@
+"""Avaliação incremental da projeção entre edições de uma mesma sessão.
+
+O ``Projetor`` guarda as séries da última projeção e, a cada chamada,
+compara os ``params`` com os anteriores campo a campo. Cada campo só
+recalcula o que depende dele:
+
+- ``qtd_inicial``, ``qtd_maxima``, ``crescimento_percentual`` e
+  ``sazonalidade``: quantidade e tudo o que vem depois;
+- ``valor_venda_base``: preço de venda, receita, repasse, imposto e lucro;
+- ``custo_unitario_base``: custo unitário, custo total e lucro;
+- ``repasse_percentual``: repasse e lucro;
+- ``investimento_inicial``: payback.
+
+Serviços sem alteração mantêm as suas linhas. Quando a receita consolidada
+muda, a alíquota do RBT12 consolidado é reapurada (uma linha só) e o imposto
+de todos os serviços é refeito a partir do primeiro mês em que ela mudou;
+lucro acumulado e payback são refeitos a partir do primeiro mês afetado de
+cada linha. Mudar o período, o regime, a inflação, o início, o calendário
+ou o conjunto de serviços refaz tudo com ``dre.api.projetar_dre``.
+
+Uso::
+
+    projetor = Projetor()
+    res = projetor.projetar(params, 60, IMPOSTO_FAIXA)  # completa
+    params["Consulta"]["repasse_percentual"] = 35.0
+    res = projetor.projetar(params, 60, IMPOSTO_FAIXA)  # só repasse e lucro
+    projetor.ultima_avaliacao  # {"modo": "incremental", "servicos": 1, ...}
+
+O ``Resultado`` devolvido compartilha os arrays do projetor: a próxima
+chamada os altera no lugar. Monte as tabelas (ou copie) antes de editar.
+"""
+import numpy as np
+
+from dre.api import RBT12_CONSOLIDADO, Resultado, projetar_dre
+from dre.impostos import IMPOSTO_UNICO
+from dre.projecao import (
+    INFLACAO_ANUAL,
+    fator_inflacao,
+    fechar_consolidado,
+    mes_payback,
+    projetar_quantidades,
+)
+from dre.sazonalidade import SEM_CALENDARIO, fatores_params
+
+# etapas do cálculo de uma linha, na ordem em que dependem umas das outras
+QUANTIDADE = "quantidade"
+VENDA = "venda"
+CUSTO = "custo"
+REPASSE = "repasse"
+INVESTIMENTO = "investimento"
+
+# etapa mais cedo afetada por cada campo de ``params[tipo]``; campos fora
+# daqui refazem a linha inteira
+DEPENDENCIAS = {
+    "qtd_inicial": QUANTIDADE,
+    "qtd_maxima": QUANTIDADE,
+    "crescimento_percentual": QUANTIDADE,
+    "sazonalidade": QUANTIDADE,
+    "valor_venda_base": VENDA,
+    "custo_unitario_base": CUSTO,
+    "repasse_percentual": REPASSE,
+    "investimento_inicial": INVESTIMENTO,
+}
+
+COMPLETA = "completa"
+INCREMENTAL = "incremental"
+NENHUMA = "nenhuma"
+
+# séries da ``Projecao`` guardadas (e alteradas) pelo projetor
+_SERIES = (
+    "quantidade",
+    "valor_venda",
+    "custo_unitario",
+    "receita_bruta",
+    "custo_total",
+    "repasse",
+    "impostos",
+    "receita_liquida",
+    "lucro_bruto",
+    "lucro_acumulado",
+    "aliquota",
+    "investimento",
+    "payback",
+)
+
+
+def etapas_alteradas(novo, antigo):
+    """Etapas de ``DEPENDENCIAS`` afetadas entre dois ``params[tipo]``."""
+    etapas = set()
+    for campo in set(novo) | set(antigo):
+        if novo.get(campo) != antigo.get(campo):
+            etapas.add(DEPENDENCIAS.get(campo, QUANTIDADE))
+    return etapas
+
+
+def acumular(lucro_bruto, lucro_acumulado, linhas, mes):
+    """Refaz ``lucro_acumulado[linhas, mes:]`` no lugar, continuando do mês anterior.
+
+    A soma segue a mesma ordem da ``np.cumsum`` da linha inteira.
+    """
+    linhas = np.asarray(linhas, dtype=int)  # índice por array: ``bloco`` é uma cópia
+    bloco = lucro_bruto[linhas, mes:]
+    if mes > 0:
+        bloco[:, 0] += lucro_acumulado[linhas, mes - 1]
+    lucro_acumulado[linhas, mes:] = np.cumsum(bloco, axis=1)
+
+
+def rever_payback(lucro_acumulado, investimento, payback, linhas, mes, investimento_mudou):
+    """Payback das ``linhas`` com o acumulado alterado a partir de ``mes`` (0-based).
+
+    Quem já tinha atingido o payback antes de ``mes`` (com o mesmo
+    investimento) não muda; as demais procuram só de ``mes`` em diante,
+    salvo as com investimento novo, que procuram na linha toda.
+    """
+    linhas = np.asarray(linhas, dtype=int)
+    manter = (payback[linhas] > 0) & (payback[linhas] <= mes) & ~investimento_mudou
+    inicio = np.where(investimento_mudou, 0, mes)
+    for desde in np.unique(inicio[~manter]):
+        grupo = linhas[~manter & (inicio == desde)]
+        achado = mes_payback(lucro_acumulado[grupo, desde:], investimento[grupo])
+        payback[grupo] = np.where(achado > 0, achado + desde, 0)
+
+
+class Projetor:
+    """Projeção com estado: refaz só o que a edição dos ``params`` afeta."""
+
+    def __init__(self):
+        self.resultado = None
+        self.ultima_avaliacao = {}
+        self._config = None
+        self._params = None
+
+    def projetar(self, params, meses, tipo_imposto=IMPOSTO_UNICO, inflacao_anual=INFLACAO_ANUAL,
+                 *, inicio=None, calendario=None):
+        """Mesmo resultado de ``projetar_dre`` (RBT12 consolidado), incremental quando possível."""
+        params = {tipo: dict(p) for tipo, p in params.items()}
+        config = (meses, tipo_imposto, inflacao_anual, inicio, calendario or SEM_CALENDARIO)
+        if self.resultado is None or config != self._config or list(params) != list(self._params):
+            return self._completa(params, config)
+
+        alteradas = {}
+        for linha, (tipo, p) in enumerate(params.items()):
+            if p != self._params[tipo]:
+                alteradas[linha] = etapas_alteradas(p, self._params[tipo])
+        self._params = params
+        if not alteradas:
+            self.ultima_avaliacao = {"modo": NENHUMA, "servicos": 0, "mes_inicial": meses}
+            return self.resultado
+        return self._incremental(params, alteradas)
+
+    def _completa(self, params, config):
+        meses, tipo_imposto, inflacao_anual, inicio, calendario = config
+        res = projetar_dre(
+            params, meses, tipo_imposto, inflacao_anual, inicio=inicio, calendario=calendario,
+        )
+        # cópias graváveis: o cache compartilha as séries-base e a alíquota é uma vista
+        for serie in _SERIES:
+            setattr(res.servicos, serie, np.array(getattr(res.servicos, serie)))
+        self.resultado, self._config, self._params = res, config, params
+        self.ultima_avaliacao = {"modo": COMPLETA, "servicos": len(params), "mes_inicial": 0}
+        return res
+
+    def _incremental(self, params, alteradas):
+        meses, tipo_imposto, inflacao_anual, inicio, calendario = self._config
+        servicos, anterior = self.resultado.servicos, self.resultado.consolidado
+        tipos = list(params)
+        inflacao = fator_inflacao(meses, inflacao_anual)
+
+        # 1) séries-base só das linhas alteradas, só das etapas afetadas
+        lucro_antes = {}
+        somas = set()
+        for linha, etapas in alteradas.items():
+            p = params[tipos[linha]]
+            lucro_antes[linha] = servicos.lucro_bruto[linha].copy()
+            if QUANTIDADE in etapas:
+                quantidade = projetar_quantidades(
+                    [float(p["qtd_inicial"])], [float(p["qtd_maxima"])],
+                    [float(p["crescimento_percentual"])], meses,
+                )[0]
+                fatores = fatores_params({tipos[linha]: p}, meses, inicio, calendario)
+                servicos.quantidade[linha] = quantidade if fatores is None else quantidade * fatores[0]
+                etapas |= {VENDA, CUSTO}
+                somas.add("quantidade")
+            if VENDA in etapas:
+                servicos.valor_venda[linha] = float(p["valor_venda_base"]) * inflacao
+                servicos.receita_bruta[linha] = servicos.quantidade[linha] * servicos.valor_venda[linha]
+                etapas.add(REPASSE)
+                somas.add("receita_bruta")
+            if CUSTO in etapas:
+                servicos.custo_unitario[linha] = float(p["custo_unitario_base"]) * inflacao
+                servicos.custo_total[linha] = servicos.quantidade[linha] * servicos.custo_unitario[linha]
+                somas.add("custo_total")
+            if REPASSE in etapas:
+                servicos.repasse[linha] = (
+                    servicos.receita_bruta[linha] * (float(p["repasse_percentual"]) / 100)
+                )
+                somas.add("repasse")
+            if INVESTIMENTO in etapas:
+                servicos.investimento[linha] = float(p["investimento_inicial"])
+
+        # 2) consolidado: soma de novo só das séries alteradas e fecha a linha única
+        bases = {}
+        for serie in ("quantidade", "receita_bruta", "custo_total", "repasse"):
+            if serie in somas:
+                bases[serie] = getattr(servicos, serie).sum(axis=0)
+            else:
+                bases[serie] = getattr(anterior, serie)[0]
+        consolidado = fechar_consolidado(
+            bases["quantidade"], bases["receita_bruta"], bases["custo_total"], bases["repasse"],
+            servicos.investimento.sum(), tipo_imposto,
+        )
+        # a alíquota dos serviços é a do consolidado: muda a partir do primeiro mês com RBT12 novo
+        mudou = np.flatnonzero(consolidado.aliquota[0] != anterior.aliquota[0])
+        mes_aliquota = int(mudou[0]) if len(mudou) else meses
+
+        # 3) imposto só onde a receita ou a alíquota mudou; nos demais, só o lucro
+        receita_nova = np.array(sorted(l for l, e in alteradas.items() if VENDA in e), dtype=int)
+        so_lucro = np.array(sorted(l for l, e in alteradas.items() if VENDA not in e), dtype=int)
+        aliquota = consolidado.aliquota[0]
+        if len(receita_nova):
+            self._apurar(servicos, aliquota, receita_nova, 0)
+        if len(so_lucro):
+            self._lucro(servicos, so_lucro, 0)
+        if mes_aliquota < meses:
+            self._apurar(servicos, aliquota, slice(None), mes_aliquota)
+
+        # 4) acumulado e payback a partir do primeiro mês afetado de cada linha
+        inicio_linha = np.full(len(tipos), mes_aliquota)
+        for linha in alteradas:
+            diferente = np.flatnonzero(servicos.lucro_bruto[linha] != lucro_antes[linha])
+            if len(diferente):
+                inicio_linha[linha] = min(inicio_linha[linha], diferente[0])
+        investimento_mudou = np.zeros(len(tipos), dtype=bool)
+        investimento_mudou[[l for l, e in alteradas.items() if INVESTIMENTO in e]] = True
+        for mes in np.unique(inicio_linha[inicio_linha < meses]):
+            grupo = np.flatnonzero(inicio_linha == mes)
+            acumular(servicos.lucro_bruto, servicos.lucro_acumulado, grupo, int(mes))
+        revisar = np.flatnonzero((inicio_linha < meses) | investimento_mudou)
+        for mes in np.unique(inicio_linha[revisar]):
+            grupo = revisar[inicio_linha[revisar] == mes]
+            rever_payback(
+                servicos.lucro_acumulado, servicos.investimento, servicos.payback,
+                grupo, int(mes), investimento_mudou[grupo],
+            )
+
+        self.resultado = Resultado(servicos, consolidado, tipo_imposto, RBT12_CONSOLIDADO, inicio)
+        self.ultima_avaliacao = {
+            "modo": INCREMENTAL,
+            "servicos": len(alteradas),
+            "mes_inicial": int(inicio_linha.min()),
+        }
+        return self.resultado
+
+    @staticmethod
+    def _apurar(servicos, aliquota, linhas, mes):
+        """Imposto, receita líquida e lucro de ``servicos[linhas, mes:]`` (no lugar)."""
+        aliq = aliquota[mes:]
+        servicos.aliquota[linhas, mes:] = aliq
+        servicos.impostos[linhas, mes:] = servicos.receita_bruta[linhas, mes:] * aliq
+        servicos.receita_liquida[linhas, mes:] = (
+            servicos.receita_bruta[linhas, mes:] - servicos.impostos[linhas, mes:]
+        )
+        Projetor._lucro(servicos, linhas, mes)
+
+    @staticmethod
+    def _lucro(servicos, linhas, mes):
+        """Lucro bruto de ``servicos[linhas, mes:]`` com o imposto já apurado (no lugar)."""
+        servicos.lucro_bruto[linhas, mes:] = (
+            servicos.receita_liquida[linhas, mes:]
+            - servicos.custo_total[linhas, mes:]
+            - servicos.repasse[linhas, mes:]
+        )
@@ -0,0 +1,318 @@
+"""Projeção em lote, sem interface, a partir de um CSV/Parquet de parâmetros.
+
+Cada linha do arquivo de entrada é um serviço com as colunas de ``CAMPOS``
+(as mesmas chaves de ``params[tipo]`` nas páginas, inclusive a opcional
+``sazonalidade``) e uma coluna de identificação (``--id``), gravada sempre
+como ``servico``. O resultado mês a mês é gravado em formato longo, em
+blocos, para que carteiras inteiras caibam em memória constante. O layout
+das colunas é o de ``dre.resultados``; com ``--execucao``, a saída é a raiz
+de um armazém particionado e o resultado é acrescentado como um arquivo novo
+da partição. O arquivo só aparece com o nome final depois de gravado por
+inteiro.
+
+Cada bloco passa por ``dre.api.projetar_dre``. Com ``--rbt12 consolidado``
+(o padrão, a regra das páginas), a alíquota vem da receita do arquivo
+inteiro; ``--rbt12 servico`` trata cada linha como se faturasse sozinha.
+
+Uso::
+
+    python -m dre.lote parametros.csv projecao.parquet --meses 60 --imposto faixa
+    python -m dre.lote parametros.csv resultados/ --execucao 2024-05-01 --cenario base
+    python -m dre.lote parametros.csv projecao.parquet --inicio 2025-03 --calendario nacional
+"""
+import argparse
+import os
+import sys
+import time
+from dataclasses import replace
+
+import numpy as np
+
+from dre.api import RBT12_CONSOLIDADO, RBT12_SERVICO, projetar_dre
+from dre.calendario import periodo_inicial
+from dre.impostos import IMPOSTO_ANEXO_V, IMPOSTO_FAIXA, IMPOSTO_PRESUMIDO, IMPOSTO_UNICO
+from dre.paralelo import em_ordem
+from dre.projecao import (
+    CAMPOS,
+    INFLACAO_ANUAL,
+    colunas,
+    fechar_consolidado,
+    params_de_tabela,
+    projetar_bases,
+    tabela_consolidada,
+)
+from dre.resultados import caminho_particao, caminho_temporario, colunas_longas
+from dre.sazonalidade import (
+    NACIONAL,
+    NACIONAL_FACULTATIVOS,
+    PERFIS,
+    SEM_CALENDARIO,
+    fatores_params,
+)
+
+TAMANHO_BLOCO = 10_000
+# séries somadas por mês para o RBT12 consolidado e o CSV --consolidado
+SOMADAS = ("quantidade", "receita_bruta", "custo_total", "repasse")
+_LINHA = "_linha"
+IMPOSTOS = {
+    "unico": IMPOSTO_UNICO,
+    "faixa": IMPOSTO_FAIXA,
+    "anexo5": IMPOSTO_ANEXO_V,
+    "presumido": IMPOSTO_PRESUMIDO,
+}
+CALENDARIOS = {
+    "nenhum": SEM_CALENDARIO,
+    "nacional": NACIONAL,
+    "facultativos": NACIONAL_FACULTATIVOS,
+}
+
+
+def _formato(caminho):
+    return "parquet" if caminho.lower().endswith((".parquet", ".pq")) else "csv"
+
+
+def ler_blocos(caminho, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera DataFrames de até ``tamanho_bloco`` linhas do CSV/Parquet."""
+    if _formato(caminho) == "parquet":
+        import pyarrow.parquet as pq
+
+        arquivo = pq.ParquetFile(caminho)
+        for lote in arquivo.iter_batches(batch_size=tamanho_bloco):
+            yield lote.to_pandas()
+    else:
+        import pandas as pd
+
+        yield from pd.read_csv(caminho, chunksize=tamanho_bloco)
+
+
+def _params_do_bloco(bloco, coluna_id):
+    """Identificações e ``params`` de um bloco, uma entrada por linha.
+
+    As chaves de ``params`` são as posições das linhas, para que
+    identificações repetidas não se fundam como em ``params_de_tabela``.
+    """
+    faltando = [c for c in (coluna_id,) + CAMPOS if c not in bloco.columns]
+    if faltando:
+        raise ValueError(f"colunas ausentes no arquivo de entrada: {', '.join(faltando)}")
+    if "sazonalidade" in bloco.columns:
+        perfis = bloco["sazonalidade"].dropna().astype(str).str.strip()
+        desconhecidos = sorted(set(perfis[perfis != ""]) - set(PERFIS))
+        if desconhecidos:
+            raise ValueError(f"perfis de sazonalidade desconhecidos: {', '.join(desconhecidos)}")
+
+    ids = bloco[coluna_id].astype(str).tolist()
+    linhas = bloco.assign(**{_LINHA: [str(i) for i in range(len(bloco))]})
+    return ids, params_de_tabela(linhas, _LINHA)
+
+
+def somar_bloco(bloco, meses, inflacao_anual=INFLACAO_ANUAL, coluna_id="tipo",
+                inicio=None, calendario=SEM_CALENDARIO):
+    """Séries-base do bloco somadas por mês (``SOMADAS``) e o investimento total."""
+    _, params = _params_do_bloco(bloco, coluna_id)
+    ajuste = fatores_params(params, meses, inicio, calendario)
+    quantidade, _, _, receita_bruta, custo_total, repasse = projetar_bases(
+        colunas(params), meses, inflacao_anual, ajuste
+    )
+    somas = dict(zip(SOMADAS, (quantidade, receita_bruta, custo_total, repasse)))
+    investimento = sum(float(p["investimento_inicial"]) for p in params.values())
+    return {serie: valores.sum(axis=0) for serie, valores in somas.items()}, investimento
+
+
+def projetar_bloco(bloco, meses, tipo_imposto, inflacao_anual=INFLACAO_ANUAL, coluna_id="tipo",
+                   inicio=None, calendario=SEM_CALENDARIO, rbt12=RBT12_CONSOLIDADO,
+                   receita_consolidada=None):
+    """Projeta um bloco de serviços com ``projetar_dre`` e devolve as colunas do formato longo.
+
+    A identificação vem de ``coluna_id`` e sai na coluna ``servico``, a que
+    ``dre.resultados.ler`` e ``comparar`` filtram. A coluna opcional
+    ``sazonalidade`` (nome de ``dre.sazonalidade.PERFIS``) e o ``calendario``
+    de dias úteis, a partir do mês ``inicio``, ajustam o volume como nas
+    páginas. Com ``RBT12_CONSOLIDADO``, a alíquota sai de
+    ``receita_consolidada`` (a do arquivo inteiro) ou, sem ela, do próprio bloco.
+    """
+    ids, params = _params_do_bloco(bloco, coluna_id)
+    resultado = projetar_dre(
+        params, meses, tipo_imposto, inflacao_anual, inicio=inicio, calendario=calendario,
+        rbt12=rbt12, receita_consolidada=receita_consolidada, cache=False,
+    )
+    return colunas_longas(replace(resultado.servicos, tipos=ids))
+
+
+class Gravador:
+    """Grava blocos do formato longo em Parquet (row groups) ou CSV (append).
+
+    Os blocos vão para um temporário oculto (``caminho_temporario``) que só
+    vira ``caminho`` ao fechar sem erro; com erro, o temporário é apagado.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.formato = _formato(caminho)
+        self.temporario = caminho_temporario(caminho)
+        self._escritor = None
+
+    def gravar(self, colunas):
+        import pyarrow as pa
+
+        tabela = pa.table(colunas)
+        if self._escritor is None:
+            if self.formato == "parquet":
+                import pyarrow.parquet as pq
+
+                self._escritor = pq.ParquetWriter(self.temporario, tabela.schema)
+            else:
+                import pyarrow.csv as pcsv
+
+                self._escritor = pcsv.CSVWriter(self.temporario, tabela.schema)
+        self._escritor.write_table(tabela)
+
+    def fechar(self, concluido=True):
+        """Fecha o arquivo; ``concluido`` publica em ``caminho``, senão descarta."""
+        if self._escritor is None:
+            return
+        self._escritor.close()
+        self._escritor = None
+        if concluido:
+            os.replace(self.temporario, self.caminho)  # leitores nunca veem um arquivo pela metade
+        else:
+            os.remove(self.temporario)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *exc):
+        self.fechar(concluido=tipo is None)
+
+
+def executar(entrada, saida, meses, tipo_imposto, inflacao_anual=INFLACAO_ANUAL,
+             coluna_id="tipo", tamanho_bloco=TAMANHO_BLOCO, trabalhadores=1,
+             consolidado=None, inicio=None, calendario=SEM_CALENDARIO,
+             rbt12=RBT12_CONSOLIDADO, log=sys.stderr):
+    """Projeta o arquivo ``entrada`` inteiro e grava em ``saida``; devolve estatísticas.
+
+    Com ``RBT12_CONSOLIDADO`` (a regra das páginas), a alíquota de cada mês
+    vem da receita do arquivo inteiro, então ele é lido duas vezes: a primeira
+    só soma as séries-base (``somar_bloco``). ``RBT12_SERVICO`` projeta cada
+    linha como se faturasse sozinha, numa leitura só.
+
+    Com ``consolidado``, grava também o CSV no layout do ``df_agg`` (soma de
+    todos os serviços por mês, RBT12 da receita total), indexado por período
+    quando há ``inicio``.
+    """
+    relogio = time.perf_counter()
+    servicos = 0
+    somas = {serie: np.zeros(meses) for serie in SOMADAS}
+    investimento = 0.0
+
+    # blocos na ordem de leitura, no máximo 2×trabalhadores em voo (dre.paralelo)
+    receita = None
+    if rbt12 == RBT12_CONSOLIDADO:
+        tarefas = (
+            (bloco, meses, inflacao_anual, coluna_id, inicio, calendario)
+            for bloco in ler_blocos(entrada, tamanho_bloco)
+        )
+        for _, (parciais, parcial_investimento) in em_ordem(somar_bloco, tarefas, trabalhadores):
+            for serie, soma in somas.items():
+                soma += parciais[serie]
+            investimento += parcial_investimento
+        receita = somas["receita_bruta"]
+        if log is not None:
+            decorrido = time.perf_counter() - relogio
+            print(f"receita consolidada somada em {decorrido:.2f}s", file=log)
+
+    tarefas = (
+        (bloco, meses, tipo_imposto, inflacao_anual, coluna_id, inicio, calendario, rbt12, receita)
+        for bloco in ler_blocos(entrada, tamanho_bloco)
+    )
+    with Gravador(saida) as gravador:
+        for (bloco, *_), longas in em_ordem(projetar_bloco, tarefas, trabalhadores):
+            gravador.gravar(longas)
+            servicos += len(bloco)
+            if consolidado and receita is None:
+                for serie, soma in somas.items():
+                    soma += longas[serie].reshape(-1, meses).sum(axis=0)
+                investimento += float(bloco["investimento_inicial"].sum())
+            if log is not None:
+                decorrido = time.perf_counter() - relogio
+                print(f"{servicos:>12,} serviços  {servicos / decorrido:>12,.0f} serv/s", file=log)
+
+    if consolidado:
+        total = fechar_consolidado(
+            somas["quantidade"], somas["receita_bruta"], somas["custo_total"],
+            somas["repasse"], investimento, tipo_imposto,
+        )
+        tabela_consolidada(total, inicio=inicio).to_csv(consolidado)
+
+    decorrido = time.perf_counter() - relogio
+    stats = {
+        "servicos": servicos,
+        "linhas": servicos * meses,
+        "segundos": decorrido,
+        "servicos_por_segundo": servicos / decorrido if decorrido else 0.0,
+        "linhas_por_segundo": servicos * meses / decorrido if decorrido else 0.0,
+    }
+    if log is not None:
+        print(
+            f"{stats['servicos']:,} serviços × {meses} meses = {stats['linhas']:,} linhas "
+            f"em {decorrido:.2f}s ({stats['linhas_por_segundo']:,.0f} linhas/s) -> {saida}",
+            file=log,
+        )
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m dre.lote",
+        description="Projeta a DRE de cada linha de um CSV/Parquet de parâmetros.",
+    )
+    parser.add_argument("entrada", help="CSV ou Parquet com uma linha por serviço")
+    parser.add_argument("saida", help="arquivo .parquet ou .csv com o resultado mês a mês")
+    parser.add_argument("--meses", type=int, default=60)
+    parser.add_argument("--imposto", choices=sorted(IMPOSTOS), default="unico")
+    parser.add_argument("--inflacao", type=float, default=INFLACAO_ANUAL,
+                        help="inflação anual (fração, ex.: 0.13)")
+    parser.add_argument("--id", dest="coluna_id", default="tipo",
+                        help="coluna que identifica o serviço (padrão: tipo); sai como servico")
+    parser.add_argument("--inicio", metavar="AAAA-MM",
+                        help="mês do M1; sem ele o M1 é tratado como janeiro")
+    parser.add_argument("--calendario", choices=list(CALENDARIOS), default="nenhum",
+                        help="ajuste do volume por dias úteis (exige --inicio)")
+    parser.add_argument("--rbt12", choices=(RBT12_CONSOLIDADO, RBT12_SERVICO),
+                        default=RBT12_CONSOLIDADO,
+                        help="RBT12 da receita de todo o arquivo (padrão, como nas páginas; "
+                             "lê o arquivo duas vezes) ou de cada serviço")
+    parser.add_argument("--bloco", type=int, default=TAMANHO_BLOCO,
+                        help="serviços processados por bloco")
+    parser.add_argument("--trabalhadores", type=int, default=1,
+                        help="processos em paralelo (0 = todos os núcleos)")
+    parser.add_argument("--consolidado", metavar="CSV",
+                        help="grava também a projeção consolidada (layout do df_agg)")
+    parser.add_argument("--execucao",
+                        help="trata a saída como armazém e acrescenta nesta partição de execução")
+    parser.add_argument("--cenario", default="base",
+                        help="partição de cenário dentro da execução (com --execucao)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.entrada):
+        parser.error(f"arquivo não encontrado: {args.entrada}")
+    if args.inicio:
+        try:
+            periodo_inicial(args.inicio)
+        except ValueError:
+            parser.error(f"--inicio inválido (use AAAA-MM): {args.inicio}")
+    if args.calendario != "nenhum" and not args.inicio:
+        parser.error("--calendario exige --inicio")
+    saida = args.saida
+    if args.execucao:
+        saida = caminho_particao(args.saida, args.execucao, args.cenario)
+    try:
+        executar(args.entrada, saida, args.meses, IMPOSTOS[args.imposto],
+                 args.inflacao, args.coluna_id, args.bloco,
+                 args.trabalhadores or os.cpu_count(), args.consolidado,
+                 args.inicio, CALENDARIOS[args.calendario], args.rbt12)
+    except ValueError as erro:
+        parser.error(str(erro))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Busca de meta (goal-seek) sobre a projeção consolidada.
+
+Encontra o valor de um parâmetro (preço, crescimento, repasse, quantidade
+inicial...) que faz o lucro acumulado consolidado atingir uma meta num mês —
+ou, equivalentemente, que leva o payback para um mês alvo. A busca é uma
+bisseção em K pontos: a cada iteração, K candidatos são avaliados de uma vez
+numa única projeção em lote (``consolidar_lote``) e o intervalo encolhe K-1
+vezes, então poucas iterações bastam.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from dre.projecao import CAMPOS, INFLACAO_ANUAL, colunas, consolidar_lote
+
+PONTOS = 32
+ITERACOES = 8
+TOLERANCIA = 1e-6
+
+
+@dataclass
+class Meta:
+    """Resultado da busca; ``valor`` é None quando a meta não cabe no intervalo."""
+
+    campo: str
+    tipo: object          # serviço alterado; None = fator sobre todos os serviços
+    valor: object
+    atual: float
+    lucro_no_mes: float   # lucro acumulado no mês alvo com o valor encontrado
+    mes: int
+
+
+def _intervalo_padrao(campo, atual):
+    if campo == "repasse_percentual":
+        return 0.0, 100.0
+    if campo == "crescimento_percentual":
+        return -50.0, 100.0
+    return 0.0, max(10 * abs(atual), 1.0)
+
+
+def _avaliar(col, n, indices, campo, candidatos, mes, meses, tipo_imposto, inflacao_anual,
+             fatores, razao):
+    """Lucro acumulado no ``mes`` para cada candidato (uma projeção para todos)."""
+    v = len(candidatos)
+    expandido = {c: np.tile(col[c], v) for c in CAMPOS}
+    valores = expandido[campo].reshape(v, n)
+    if indices is None:  # fator multiplicativo sobre todos os serviços
+        valores *= candidatos[:, None]
+    else:
+        valores[:, indices] = candidatos
+    _, _, acumulado, _ = consolidar_lote(
+        expandido, v, meses, tipo_imposto, inflacao_anual, fatores, razao
+    )
+    return acumulado[:, mes - 1]
+
+
+def buscar(params, meses, tipo_imposto, campo, mes=None, lucro_alvo=None,
+           tipo=None, intervalo=None, inflacao_anual=INFLACAO_ANUAL,
+           pontos=PONTOS, iteracoes=ITERACOES, tolerancia=TOLERANCIA, fatores=None,
+           razao=None):
+    """Valor de ``campo`` para que o lucro acumulado no ``mes`` alcance a meta.
+
+    - Meta de payback: informe só ``mes`` (o alvo passa a ser o investimento total).
+    - Meta de lucro: informe ``lucro_alvo`` (e ``mes``; padrão = último mês).
+    - ``tipo``: serviço cujo ``campo`` é alterado; com ``None`` o resultado é um
+      fator aplicado ao ``campo`` de todos os serviços (1.0 = valores atuais).
+    - ``fatores``: fatores de volume (serviços × meses) de ``dre.sazonalidade``.
+    - ``razao``: custos e despesas do razão (``dre.custos.Razao``); com ele, o
+      lucro acumulado é o EBITDA acumulado, a base do payback da aba Resumo.
+
+    Entre os valores que cumprem a meta, devolve o mais próximo da fronteira
+    (ex.: o menor preço ou o maior repasse que ainda a atingem).
+    """
+    if campo not in CAMPOS:
+        raise ValueError(f"campo desconhecido: {campo!r}")
+    mes = mes or meses
+    col = colunas(params)
+    n = len(params)
+    if lucro_alvo is None:
+        lucro_alvo = float(col["investimento_inicial"].sum())
+
+    if tipo is None:
+        indices, atual = None, 1.0
+        lo, hi = intervalo or (0.0, 10.0)
+    else:
+        indices = list(params).index(tipo)
+        atual = float(col[campo][indices])
+        lo, hi = intervalo or _intervalo_padrao(campo, atual)
+
+    def folga(candidatos):
+        return _avaliar(
+            col, n, indices, campo, candidatos, mes, meses, tipo_imposto, inflacao_anual,
+            fatores, razao,
+        ) - lucro_alvo
+
+    candidatos = np.linspace(lo, hi, pontos)
+    sobra = folga(candidatos)
+    ok = sobra >= 0
+    if not ok.any():
+        return _resultado(campo, tipo, None, atual, folga, lucro_alvo, mes)
+    if ok.all():  # meta cumprida no intervalo inteiro: devolve o ponto mais justo
+        valor = float(candidatos[np.argmin(sobra)])
+        return _resultado(campo, tipo, valor, atual, folga, lucro_alvo, mes)
+
+    for _ in range(iteracoes):
+        # primeira troca de lado (meta cumprida <-> não cumprida)
+        i = int(np.argmax(ok != ok[0]))
+        lo, hi = candidatos[i - 1], candidatos[i]
+        cumpre_em_hi = bool(ok[i])
+        if hi - lo <= tolerancia * max(1.0, abs(hi)):
+            break
+        candidatos = np.linspace(lo, hi, pontos)
+        ok = folga(candidatos) >= 0
+
+    valor = float(hi if cumpre_em_hi else lo)
+    return _resultado(campo, tipo, valor, atual, folga, lucro_alvo, mes)
+
+
+def _resultado(campo, tipo, valor, atual, folga, lucro_alvo, mes):
+    lucro = float(folga(np.array([valor]))[0] + lucro_alvo) if valor is not None else float("nan")
+    return Meta(campo=campo, tipo=tipo, valor=valor, atual=atual, lucro_no_mes=lucro, mes=mes)
@@ -0,0 +1,215 @@
+"""Simulação de Monte Carlo da DRE consolidada.
+
+Sorteia N caminhos de crescimento mensal, inflação e repasse e calcula a DRE
+completa de cada caminho em arrays (caminhos × serviços × meses). Os
+caminhos são processados em blocos cujo tamanho respeita ``LIMITE_ELEMENTOS``,
+então a memória de trabalho não cresce com N; só as séries finais por
+caminho (float32) e o mês de payback ficam guardados para as bandas.
+"""
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from dre.financeiro import anualizar, fluxos, tir
+from dre.projecao import INFLACAO_ANUAL, aliquota, colunas, mes_payback
+
+# elementos por array intermediário (caminhos × serviços × meses) em cada bloco
+LIMITE_ELEMENTOS = 4_000_000
+PERCENTIS = (5, 50, 95)
+# intervalo mínimo (s) entre resultados parciais entregues ao ``progresso``
+INTERVALO_PARCIAL = 2.0
+
+
+@dataclass
+class Distribuicao:
+    """Distribuição de um parâmetro sorteado.
+
+    ``tipo``: "fixa" (a), "normal" (média a, desvio b), "uniforme" (a, b)
+    ou "triangular" (mínimo a, moda b, máximo c).
+    """
+
+    tipo: str = "fixa"
+    a: float = 0.0
+    b: float = 0.0
+    c: float = 0.0
+
+    def amostrar(self, rng, tamanho):
+        if self.tipo == "fixa":
+            return np.full(tamanho, float(self.a))
+        if self.tipo == "normal":
+            return rng.normal(self.a, self.b, tamanho)
+        if self.tipo == "uniforme":
+            return rng.uniform(self.a, self.b, tamanho)
+        if self.tipo == "triangular":
+            return rng.triangular(self.a, self.b, self.c, tamanho)
+        raise ValueError(f"distribuição desconhecida: {self.tipo!r}")
+
+
+@dataclass
+class ResultadoMonteCarlo:
+    """Séries por caminho (float32) e bandas de percentis por mês."""
+
+    caminhos: int
+    meses: int
+    receita_bruta: np.ndarray    # (caminhos × meses), consolidada
+    lucro_acumulado: np.ndarray  # (caminhos × meses), consolidado
+    payback: np.ndarray          # (caminhos,), mês 1-based; 0 = não atingido
+    investimento: float
+    percentis: tuple = PERCENTIS
+    bandas: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        if not self.bandas:
+            self.bandas = {
+                "receita_bruta": np.percentile(self.receita_bruta, self.percentis, axis=0),
+                "lucro_acumulado": np.percentile(self.lucro_acumulado, self.percentis, axis=0),
+            }
+
+    def distribuicao_payback(self):
+        """Frequência relativa de cada mês de payback (índice 0 = não atingido)."""
+        return np.bincount(self.payback, minlength=self.meses + 1) / self.caminhos
+
+    def percentis_payback(self):
+        """Percentis do mês de payback entre os caminhos que o atingem."""
+        atingidos = self.payback[self.payback > 0]
+        if not len(atingidos):
+            return None
+        return dict(zip(self.percentis, np.percentile(atingidos, self.percentis)))
+
+    def tir_anual(self, limite_elementos=LIMITE_ELEMENTOS):
+        """TIR anual de cada caminho (−investimento no mês 0 e o lucro mensal consolidado).
+
+        Resolvida em blocos de caminhos, sem laço por caminho; NaN quando indefinida.
+        """
+        resultado = np.empty(self.caminhos)
+        bloco = max(1, limite_elementos // (self.meses + 1))
+        for inicio in range(0, self.caminhos, bloco):
+            acumulado = self.lucro_acumulado[inicio:inicio + bloco].astype(float)
+            lucro = np.diff(acumulado, axis=1, prepend=0.0)
+            resultado[inicio:inicio + bloco] = tir(fluxos(lucro, self.investimento))
+        return anualizar(resultado)
+
+    def percentis_tir(self):
+        """Percentis da TIR anual entre os caminhos em que ela existe."""
+        taxas = self.tir_anual()
+        taxas = taxas[np.isfinite(taxas)]
+        if not len(taxas):
+            return None
+        return dict(zip(self.percentis, np.percentile(taxas, self.percentis)))
+
+
+def quantidades_caminho(qtd_inicial, qtd_maxima, crescimento):
+    """Recorrência ``q = min(q * (1 + g_t), qtd_max)`` com taxa variável no tempo.
+
+    ``crescimento`` tem o último eixo nos meses (em %, o índice 0 é ignorado).
+    Com P_t = Π r_k: q_t = P_t · min(q0, qtd_max / max_{1<=j<=t} P_j).
+    """
+    r = 1 + np.asarray(crescimento, dtype=float) / 100
+    r[..., 0] = 1.0
+    produto = np.cumprod(r, axis=-1)
+    # máximo de P_j só para j >= 1; no primeiro mês não há limite
+    pico = produto.copy()
+    pico[..., 0] = 0.0
+    pico = np.maximum.accumulate(pico, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        limite = qtd_maxima / pico
+    limite = np.where(np.arange(r.shape[-1]) == 0, np.inf, limite)
+    return produto * np.minimum(qtd_inicial, limite)
+
+
+def simular(params, meses, tipo_imposto, caminhos=10_000,
+            crescimento=None, inflacao=None, repasse=None, semente=0,
+            limite_elementos=LIMITE_ELEMENTOS, fatores=None, progresso=None,
+            intervalo_parcial=INTERVALO_PARCIAL):
+    """Simula ``caminhos`` trajetórias da DRE consolidada dos serviços em ``params``.
+
+    - ``crescimento``: choque mensal, em pontos percentuais, somado ao
+      crescimento de cada serviço (sorteado por caminho e mês);
+    - ``inflacao``: inflação anual (sorteada por caminho e mês);
+    - ``repasse``: choque, em pontos percentuais, somado ao repasse de cada
+      serviço (sorteado por caminho);
+    - ``fatores``: fatores de volume (serviços × meses) de ``dre.sazonalidade``;
+    - ``progresso``: chamado após cada bloco como ``progresso(feitos, parcial)``,
+      com os caminhos já simulados; ``parcial`` é o ``ResultadoMonteCarlo``
+      deles no máximo a cada ``intervalo_parcial`` segundos e None nos outros
+      blocos, para que os percentis não sejam refeitos sobre todos os
+      caminhos a cada bloco. Uma exceção levantada nele interrompe a
+      simulação (cancelamento).
+    """
+    crescimento = crescimento or Distribuicao("fixa", 0.0)
+    inflacao = inflacao or Distribuicao("fixa", INFLACAO_ANUAL)
+    repasse = repasse or Distribuicao("fixa", 0.0)
+
+    col = colunas(params)
+    n_serv = len(params)
+    investimento = float(col["investimento_inicial"].sum())
+    # serviços no eixo do meio: (1, serviços, 1) para broadcast com (caminhos, 1, meses)
+    q0, qmax, g0, venda0, custo0, rep0 = (
+        col[c][None, :, None] for c in (
+            "qtd_inicial", "qtd_maxima", "crescimento_percentual",
+            "valor_venda_base", "custo_unitario_base", "repasse_percentual",
+        )
+    )
+
+    fatores = None if fatores is None else np.asarray(fatores, dtype=float)[None]
+
+    receita_total = np.empty((caminhos, meses), dtype=np.float32)
+    lucro_acumulado = np.empty((caminhos, meses), dtype=np.float32)
+    payback = np.empty(caminhos, dtype=np.int16)
+
+    bloco = max(1, limite_elementos // max(1, n_serv * meses))
+    ultimo_parcial = time.monotonic()
+    inicios = range(0, caminhos, bloco)
+    geradores = np.random.SeedSequence(semente).spawn(len(inicios))
+    for inicio, semente_bloco in zip(inicios, geradores):
+        rng = np.random.default_rng(semente_bloco)
+        k = min(bloco, caminhos - inicio)
+
+        choque_g = crescimento.amostrar(rng, (k, 1, meses))
+        infl = inflacao.amostrar(rng, (k, meses))
+        choque_r = repasse.amostrar(rng, (k, 1, 1))
+
+        quantidade = quantidades_caminho(q0, qmax, g0 + choque_g)
+        if fatores is not None:
+            quantidade *= fatores
+        mensal = (1 + infl) ** (1 / 12)
+        mensal[:, 0] = 1.0  # preço do primeiro mês é o preço base
+        fator = np.cumprod(mensal, axis=1)[:, None, :]
+        receita = quantidade * venda0 * fator
+        custo = quantidade * custo0 * fator
+        rep = receita * np.clip(rep0 + choque_r, 0.0, 100.0) / 100
+
+        # consolida os serviços; alíquota mês a mês pelo RBT12 de cada caminho
+        receita_c = receita.sum(axis=1)
+        aliq = aliquota(receita_c, tipo_imposto)
+        lucro = receita_c * (1 - aliq) - custo.sum(axis=1) - rep.sum(axis=1)
+        acumulado = np.cumsum(lucro, axis=1)
+
+        fim = inicio + k
+        receita_total[inicio:fim] = receita_c
+        lucro_acumulado[inicio:fim] = acumulado
+        payback[inicio:fim] = mes_payback(acumulado, np.full(k, investimento))
+        if progresso is not None and fim < caminhos:
+            parcial = None
+            if time.monotonic() - ultimo_parcial >= intervalo_parcial:
+                parcial = ResultadoMonteCarlo(
+                    caminhos=fim,
+                    meses=meses,
+                    receita_bruta=receita_total[:fim],
+                    lucro_acumulado=lucro_acumulado[:fim],
+                    payback=payback[:fim],
+                    investimento=investimento,
+                )
+            progresso(fim, parcial)
+            if parcial is not None:
+                ultimo_parcial = time.monotonic()
+
+    return ResultadoMonteCarlo(
+        caminhos=caminhos,
+        meses=meses,
+        receita_bruta=receita_total,
+        lucro_acumulado=lucro_acumulado,
+        payback=payback,
+        investimento=investimento,
+    )
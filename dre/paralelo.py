@@ -0,0 +1,109 @@
+"""Execução paralela do motor de projeção para catálogos grandes.
+
+Os parâmetros são divididos em blocos de tamanho fixo e enviados a um
+``ProcessPoolExecutor``. O resultado é determinístico: os blocos dependem só
+de ``tamanho_bloco`` (não do número de processos) e são recombinados sempre
+na ordem de entrada, então as somas em ponto flutuante não mudam com
+``trabalhadores``.
+
+``em_ordem`` é o único pool de processos do pacote: serve a projeção
+consolidada das páginas para catálogos grandes (``consolidar_paralelo``) e o
+``python -m dre.lote``, que lê o arquivo de entrada sob demanda.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dre.projecao import (
+    CAMPOS,
+    INFLACAO_ANUAL,
+    fechar_consolidado,
+    projetar_bases,
+)
+
+TAMANHO_BLOCO = 5_000
+# a partir de quantos serviços as páginas consolidam a projeção em processos
+LIMITE_PARALELO = 20_000
+
+
+def _como_arrays(col):
+    return {campo: np.asarray(col[campo], dtype=float) for campo in CAMPOS}
+
+
+def dividir(col, tamanho_bloco=TAMANHO_BLOCO):
+    """Fatia as colunas de parâmetros em blocos de até ``tamanho_bloco`` serviços."""
+    col = _como_arrays(col)
+    n = len(col[CAMPOS[0]])
+    return [
+        {campo: valores[inicio:inicio + tamanho_bloco] for campo, valores in col.items()}
+        for inicio in range(0, n, tamanho_bloco)
+    ]
+
+
+def em_ordem(funcao, tarefas, trabalhadores=1, em_voo=2):
+    """Gera ``(tarefa, funcao(*tarefa))`` para cada tarefa, na ordem de entrada.
+
+    ``tarefas`` é lido sob demanda e no máximo ``em_voo × trabalhadores``
+    ficam pendentes, então a memória não cresce com o tamanho da entrada.
+    Com ``trabalhadores`` <= 1 roda tudo no processo atual.
+    """
+    if trabalhadores <= 1:
+        for tarefa in tarefas:
+            yield tarefa, funcao(*tarefa)
+        return
+
+    with ProcessPoolExecutor(max_workers=trabalhadores) as executor:
+        pendentes = deque()
+        for tarefa in tarefas:
+            pendentes.append((tarefa, executor.submit(funcao, *tarefa)))
+            if len(pendentes) >= em_voo * trabalhadores:
+                anterior, futuro = pendentes.popleft()
+                yield anterior, futuro.result()
+        while pendentes:
+            anterior, futuro = pendentes.popleft()
+            yield anterior, futuro.result()
+
+
+def _fatias_fatores(fatores, n, tamanho_bloco):
+    """``fatores`` (serviços × meses) fatiado como ``dividir``; None em todos sem ajuste."""
+    if fatores is None:
+        return [None] * -(-n // tamanho_bloco)
+    return [fatores[inicio:inicio + tamanho_bloco] for inicio in range(0, n, tamanho_bloco)]
+
+
+def _somar_bloco(col, meses, inflacao_anual, fatores):
+    bases = projetar_bases(col, meses, inflacao_anual, fatores)
+    return tuple(b.sum(axis=0) for b in bases), float(col["investimento_inicial"].sum())
+
+
+def consolidar_paralelo(col, meses, tipo_imposto, inflacao_anual=INFLACAO_ANUAL,
+                        trabalhadores=None, tamanho_bloco=TAMANHO_BLOCO, rotulo="Total",
+                        fatores=None):
+    """Projeção consolidada (layout do ``df_agg``) somando os blocos nos processos.
+
+    Cada processo devolve só as somas mensais do seu bloco, então o tráfego
+    entre processos não cresce com o número de serviços. A alíquota de cada mês
+    vem do RBT12 da receita total, como em ``consolidar``.
+    """
+    trabalhadores = trabalhadores or os.cpu_count()
+    blocos = dividir(col, tamanho_bloco)
+    n = sum(len(bloco["investimento_inicial"]) for bloco in blocos)
+    tarefas = [
+        (bloco, meses, inflacao_anual, fatia)
+        for bloco, fatia in zip(blocos, _fatias_fatores(fatores, n, tamanho_bloco))
+    ]
+    partes = [parte for _, parte in em_ordem(_somar_bloco, tarefas, trabalhadores)]
+
+    somas = [np.zeros(meses) for _ in range(6)]
+    investimento = 0.0
+    for bases, inv in partes:  # ordem fixa => soma determinística
+        for acumulado, parcial in zip(somas, bases):
+            acumulado += parcial
+        investimento += inv
+
+    quantidade, _, _, receita_bruta, custo_total, repasse = somas
+    return fechar_consolidado(
+        quantidade, receita_bruta, custo_total, repasse, investimento, tipo_imposto, rotulo
+    )
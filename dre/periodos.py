@@ -0,0 +1,137 @@
+"""DRE trimestral e anual a partir da DRE mensal.
+
+Os meses consecutivos de um mesmo trimestre/ano formam um segmento do eixo
+de meses e cada coluna é reduzida por segmento de uma vez
+(``np.add.reduceat`` sobre o array meses × colunas), sem ``groupby`` por
+rótulo. Fluxos (receitas, custos, lucro) são somados; saldos (colunas
+acumuladas) ficam com o valor do último mês do período. Por cima entram as
+margens sobre a receita líquida e o crescimento contra o mesmo período do
+ano anterior.
+
+Com índice inteiro (sem mês de início), o Ano 1 são os meses 1..12 da
+projeção; com ``PeriodIndex``, trimestres e anos são os do calendário, então
+o primeiro e o último período podem ser parciais (coluna ``Meses``).
+"""
+import numpy as np
+
+TRIMESTRAL = "Trimestral"
+ANUAL = "Anual"
+# frequência do PeriodIndex, meses por período, períodos por ano, nome do índice
+PERIODOS = {
+    TRIMESTRAL: ("Q", 3, 4, "Trimestre"),
+    ANUAL: ("Y", 12, 1, "Ano"),
+}
+
+MESES = "Meses"
+RECEITA_LIQUIDA = "Receita Líquida"
+
+# ordem das linhas do demonstrativo (as que existirem no DataFrame)
+LINHAS_DRE = (
+    "Receita Bruta",
+    "Impostos",
+    "Receita Líquida",
+    "Custo Total",
+    "Repasse Médico",
+    "Custos do Razão",
+    "Lucro Bruto",
+    "Despesas Operacionais",
+    "EBITDA",
+    "Depreciação",
+    "Resultado Operacional",
+    "Lucro Acumulado",
+    "EBITDA Acumulado",
+)
+
+# margem (% da receita líquida) -> coluna
+MARGENS = {
+    "Margem Bruta (%)": "Lucro Bruto",
+    "Margem EBITDA (%)": "EBITDA",
+    "Margem Operacional (%)": "Resultado Operacional",
+}
+# crescimento contra o mesmo período do ano anterior -> coluna
+CRESCIMENTO = {
+    "Receita Bruta a/a (%)": "Receita Bruta",
+    "Lucro Bruto a/a (%)": "Lucro Bruto",
+    "EBITDA a/a (%)": "EBITDA",
+}
+
+
+def segmentos(indice, periodo=ANUAL):
+    """(chaves, inícios) dos períodos no eixo de meses ``indice``.
+
+    ``chaves`` é o índice dos períodos (``PeriodIndex`` trimestral/anual ou
+    inteiros 1-based) e ``inicios`` a posição do primeiro mês de cada um.
+    """
+    import pandas as pd
+
+    freq, tamanho, _, nome = PERIODOS[periodo]
+    if isinstance(indice, pd.PeriodIndex):
+        chaves = indice.asfreq(freq)
+        codigos = chaves.asi8
+    else:
+        codigos = chaves = (np.asarray(indice, dtype=np.int64) - 1) // tamanho + 1
+    inicios = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]])
+    return pd.Index(chaves[inicios], name=nome), inicios
+
+
+def _percentual(numerador, denominador):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denominador != 0, numerador / denominador * 100, np.nan)
+
+
+def agrupar(df, periodo=ANUAL, saldos=None):
+    """DRE de ``df`` (meses nas linhas) por trimestre ou ano.
+
+    Colunas numéricas de ``df`` são somadas no período, exceto ``saldos``
+    (padrão: as que têm "Acumulado" no nome), que ficam com o último mês.
+    Acrescenta ``Meses`` (meses do período), as ``MARGENS`` e o
+    ``CRESCIMENTO`` cujas colunas existirem; o crescimento só é calculado
+    entre períodos completos de mesmo tamanho (NaN nos demais).
+    """
+    import pandas as pd
+
+    _, tamanho, por_ano, _ = PERIODOS[periodo]
+    chaves, inicios = segmentos(df.index, periodo)
+    fins = np.r_[inicios[1:], len(df)]
+    saldos = [c for c in df.columns if "Acumulado" in c] if saldos is None else list(saldos)
+
+    valores = df.to_numpy(dtype=float)
+    resultado = pd.DataFrame(np.add.reduceat(valores, inicios, axis=0), index=chaves, columns=df.columns)
+    for coluna in saldos:
+        resultado[coluna] = valores[fins - 1, df.columns.get_loc(coluna)]
+    meses = fins - inicios
+    resultado.insert(0, MESES, meses)
+
+    if RECEITA_LIQUIDA in resultado:
+        base = resultado[RECEITA_LIQUIDA].to_numpy()
+        for nome, coluna in MARGENS.items():
+            if coluna in resultado:
+                resultado[nome] = _percentual(resultado[coluna].to_numpy(), base)
+
+    completo = meses == tamanho
+    comparavel = np.zeros(len(resultado), dtype=bool)
+    comparavel[por_ano:] = completo[por_ano:] & completo[:-por_ano]
+    for nome, coluna in CRESCIMENTO.items():
+        if coluna in resultado:
+            atual = resultado[coluna].to_numpy()
+            anterior = np.r_[np.full(por_ano, np.nan), atual[:-por_ano]][:len(atual)]
+            variacao = _percentual(atual - anterior, np.abs(anterior))
+            resultado[nome] = np.where(comparavel, variacao, np.nan)
+    return resultado
+
+
+def demonstrativo(df, periodo=ANUAL, saldos=None):
+    """DRE no layout de demonstrativo: linhas da DRE e um período por coluna.
+
+    Mesmos números de ``agrupar``, na ordem de ``LINHAS_DRE`` seguida das
+    margens e do crescimento; colunas com os rótulos de exibição.
+    """
+    from dre.calendario import rotulos_meses
+
+    agrupado = agrupar(df, periodo, saldos)
+    indicadores = tuple(MARGENS) + tuple(CRESCIMENTO)
+    linhas = [c for c in LINHAS_DRE + indicadores if c in agrupado]
+    linhas += [c for c in agrupado.columns if c not in linhas and c != MESES]
+    tabela = agrupado[linhas].T
+    tabela.columns = rotulos_meses(agrupado.index)
+    return tabela
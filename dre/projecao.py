@@ -0,0 +1,350 @@
+"""Motor vetorizado de projeção da DRE.
+
+Todas as séries são calculadas de uma vez em arrays 2-D (serviços × meses),
+sem laços mês a mês: a quantidade usa crescimento composto em forma fechada
+limitado por ``qtd_maxima``, e preço/custo são corrigidos pela inflação mensal.
+Fatores mensais de volume (sazonalidade, dias úteis) entram numa única
+multiplicação depois do teto (``aplicar_fatores``).
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from dre.custos import custos_operacionais
+from dre.impostos import (
+    ALIQUOTA_UNICA,
+    FAIXAS,
+    IMPOSTO_FAIXA,
+    IMPOSTO_UNICO,
+    aliquota_mensal as aliquota,
+)
+
+INFLACAO_ANUAL = 0.13
+
+# Campos esperados em cada ``params[tipo]``
+CAMPOS = (
+    "valor_venda_base",
+    "custo_unitario_base",
+    "qtd_inicial",
+    "qtd_maxima",
+    "repasse_percentual",
+    "crescimento_percentual",
+    "investimento_inicial",
+)
+
+# Valores iniciais de cada campo nas páginas (e nos campos vazios das tabelas)
+PADRAO = {
+    "valor_venda_base": 100.0,
+    "custo_unitario_base": 20.0,
+    "qtd_inicial": 100,
+    "qtd_maxima": 500,
+    "repasse_percentual": 30.0,
+    "crescimento_percentual": 5.0,
+    "investimento_inicial": 10000.0,
+}
+
+# Campos opcionais de ``params[tipo]`` (texto), lidos por outros módulos
+# (ex.: o perfil de ``dre.sazonalidade``)
+OPCIONAIS = ("sazonalidade",)
+
+# Colunas do ``df_agg`` consolidado (teste3.py) por série da ``Projecao``
+COLUNAS_AGG = {
+    "receita_bruta": "Receita Bruta",
+    "custo_total": "Custo Total",
+    "repasse": "Repasse Médico",
+    "impostos": "Impostos",
+    "receita_liquida": "Receita Líquida",
+    "lucro_bruto": "Lucro Bruto",
+    "lucro_acumulado": "Lucro Acumulado",
+}
+
+
+@dataclass
+class Projecao:
+    """Resultado da projeção; séries no formato (serviços × meses)."""
+
+    tipos: list
+    quantidade: np.ndarray
+    valor_venda: np.ndarray
+    custo_unitario: np.ndarray
+    receita_bruta: np.ndarray
+    custo_total: np.ndarray
+    repasse: np.ndarray
+    impostos: np.ndarray
+    receita_liquida: np.ndarray
+    lucro_bruto: np.ndarray
+    lucro_acumulado: np.ndarray
+    aliquota: np.ndarray  # alíquota efetiva de cada mês (RBT12 da própria linha)
+    investimento: np.ndarray
+    payback: np.ndarray  # mês (1-based) do payback; 0 = não atingido
+
+    @property
+    def meses(self):
+        return self.receita_bruta.shape[1]
+
+    def aliquota_efetiva(self):
+        """Imposto total / receita total de cada linha no horizonte todo."""
+        receita = self.receita_bruta.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(receita > 0, self.impostos.sum(axis=1) / receita, 0.0)
+
+
+def taxa_mensal(taxa_anual):
+    return (1 + taxa_anual) ** (1 / 12) - 1
+
+
+def colunas(params, campos=CAMPOS):
+    """``params`` (dict tipo -> campos) como um array float por campo."""
+    return {
+        campo: np.array([float(p[campo]) for p in params.values()], dtype=float)
+        for campo in campos
+    }
+
+
+def params_de_tabela(tabela, coluna_id="tipo"):
+    """``params`` a partir de um DataFrame com uma linha por serviço.
+
+    As colunas são ``coluna_id`` e ``CAMPOS`` (o layout do CSV de ``dre.lote``),
+    mais as de ``OPCIONAIS`` que existirem. Linhas sem identificação são
+    ignoradas, campos vazios assumem ``PADRAO`` (opcionais vazios ficam de
+    fora) e, com identificação repetida, vale a última linha.
+    """
+    faltando = [c for c in (coluna_id,) + CAMPOS if c not in tabela.columns]
+    if faltando:
+        raise ValueError(f"colunas ausentes na tabela de serviços: {', '.join(faltando)}")
+
+    ids = tabela[coluna_id].astype("string").str.strip()
+    validas = (ids.notna() & (ids != "")).to_numpy(dtype=bool)
+    valores = tabela.loc[validas, list(CAMPOS)].astype(float).fillna(PADRAO)
+    params = dict(zip(ids[validas], valores.to_dict("records")))
+    for opcional in OPCIONAIS:
+        if opcional in tabela.columns:
+            for tipo, valor in zip(ids[validas], tabela.loc[validas, opcional]):
+                if isinstance(valor, str) and valor.strip():
+                    params[tipo][opcional] = valor.strip()
+    return params
+
+
+def tabela_de_params(params, coluna_id="tipo"):
+    """Inverso de ``params_de_tabela``: DataFrame com uma linha por serviço."""
+    import pandas as pd
+
+    opcionais = tuple(o for o in OPCIONAIS if any(o in p for p in params.values()))
+    return pd.DataFrame(
+        [
+            {coluna_id: tipo, **{c: p[c] for c in CAMPOS}, **{o: p.get(o) for o in opcionais}}
+            for tipo, p in params.items()
+        ],
+        columns=(coluna_id,) + CAMPOS + opcionais,
+    )
+
+
+def projetar_quantidades(qtd_inicial, qtd_maxima, crescimento_percentual, meses):
+    """Forma fechada de ``q = min(q * (1 + g), qtd_max)`` aplicada mês a mês.
+
+    Para t >= 1: q_t = min(q0·r^t, qtd_max·min(1, r^(t-1))), o que reproduz o
+    laço original inclusive quando q0 > qtd_max ou a taxa é negativa.
+    """
+    q0 = np.asarray(qtd_inicial, dtype=float)[:, None]
+    qmax = np.asarray(qtd_maxima, dtype=float)[:, None]
+    r = 1 + np.asarray(crescimento_percentual, dtype=float)[:, None] / 100
+    t = np.arange(meses, dtype=float)
+
+    livre = q0 * r ** t
+    teto = qmax * np.minimum(1.0, r ** np.maximum(t - 1, 0))
+    quantidade = np.minimum(livre, teto)
+    quantidade[:, 0] = q0[:, 0]
+    return quantidade
+
+
+def fator_inflacao(meses, inflacao_anual=INFLACAO_ANUAL):
+    """Fator acumulado por mês; ``inflacao_anual`` escalar -> (meses,), array (n,) -> (n × meses)."""
+    mensal = 1 + taxa_mensal(np.asarray(inflacao_anual, dtype=float))
+    return mensal[..., None] ** np.arange(meses, dtype=float)
+
+
+def mes_payback(lucro_acumulado, investimento):
+    """Primeiro mês (1-based) com acumulado >= investimento; 0 se não houver."""
+    atingiu = lucro_acumulado >= np.asarray(investimento, dtype=float)[..., None]
+    return np.where(atingiu.any(axis=-1), atingiu.argmax(axis=-1) + 1, 0)
+
+
+def apurar(receita_bruta, custo_total, repasse, aliq):
+    """Impostos, receita líquida, lucro bruto e lucro acumulado por linha.
+
+    ``aliq`` é a alíquota de cada mês, no mesmo formato de ``receita_bruta``.
+    """
+    impostos = receita_bruta * aliq
+    receita_liquida = receita_bruta - impostos
+    lucro_bruto = receita_liquida - custo_total - repasse
+    return impostos, receita_liquida, lucro_bruto, np.cumsum(lucro_bruto, axis=-1)
+
+
+def fechar(tipos, bases, investimento, tipo_imposto, aliq=None):
+    """Aplica imposto, lucro e payback sobre as séries-base de ``projetar_bases``.
+
+    Sem ``aliq``, a alíquota de cada linha sai do RBT12 da própria linha;
+    com ``aliq`` (ex.: a do consolidado, por mês), ela é aplicada a todas.
+    """
+    quantidade, valor_venda, custo_unitario, receita_bruta, custo_total, repasse = bases
+    if aliq is None:
+        aliq = aliquota(receita_bruta, tipo_imposto)
+    else:
+        aliq = np.broadcast_to(np.asarray(aliq, dtype=float), receita_bruta.shape)
+    impostos, receita_liquida, lucro_bruto, lucro_acumulado = apurar(
+        receita_bruta, custo_total, repasse, aliq
+    )
+    return Projecao(
+        tipos=tipos,
+        quantidade=quantidade,
+        valor_venda=valor_venda,
+        custo_unitario=custo_unitario,
+        receita_bruta=receita_bruta,
+        custo_total=custo_total,
+        repasse=repasse,
+        impostos=impostos,
+        receita_liquida=receita_liquida,
+        lucro_bruto=lucro_bruto,
+        lucro_acumulado=lucro_acumulado,
+        aliquota=aliq,
+        investimento=investimento,
+        payback=mes_payback(lucro_acumulado, investimento),
+    )
+
+
+def aplicar_fatores(bases, fatores):
+    """Séries-base com o volume multiplicado por ``fatores`` (serviços × meses).
+
+    Receita, custo e repasse são lineares na quantidade, então escalam junto;
+    preços unitários não mudam. ``fatores`` None devolve ``bases`` como estão.
+    """
+    if fatores is None:
+        return bases
+    quantidade, valor_venda, custo_unitario, receita_bruta, custo_total, repasse = bases
+    return (
+        quantidade * fatores, valor_venda, custo_unitario,
+        receita_bruta * fatores, custo_total * fatores, repasse * fatores,
+    )
+
+
+def projetar_bases(col, meses, inflacao_anual=INFLACAO_ANUAL, fatores=None):
+    """Séries que não dependem do imposto: quantidade, preços, receita, custo e repasse.
+
+    ``col`` mapeia cada campo de ``CAMPOS`` para um array (um valor por serviço);
+    serve o retorno de ``colunas`` ou um DataFrame com essas colunas.
+    ``inflacao_anual`` pode ser um escalar ou um array com um valor por serviço.
+    ``fatores`` (serviços × meses, opcional) ajusta o volume depois do teto.
+    """
+    def campo(nome):
+        return np.asarray(col[nome], dtype=float)
+
+    quantidade = projetar_quantidades(
+        campo("qtd_inicial"), campo("qtd_maxima"), campo("crescimento_percentual"), meses
+    )
+    inflacao = fator_inflacao(meses, inflacao_anual)
+    valor_venda = campo("valor_venda_base")[:, None] * inflacao
+    custo_unitario = campo("custo_unitario_base")[:, None] * inflacao
+
+    receita_bruta = quantidade * valor_venda
+    custo_total = quantidade * custo_unitario
+    repasse = receita_bruta * (campo("repasse_percentual")[:, None] / 100)
+    bases = quantidade, valor_venda, custo_unitario, receita_bruta, custo_total, repasse
+    return aplicar_fatores(bases, fatores)
+
+
+def projetar_colunas(tipos, col, meses, tipo_imposto, inflacao_anual=INFLACAO_ANUAL,
+                     fatores=None):
+    """Como ``projetar``, mas recebendo os parâmetros já em colunas."""
+    return fechar(
+        list(tipos),
+        projetar_bases(col, meses, inflacao_anual, fatores),
+        np.asarray(col["investimento_inicial"], dtype=float),
+        tipo_imposto,
+    )
+
+
+def projetar(params, meses, tipo_imposto, inflacao_anual=INFLACAO_ANUAL, fatores=None):
+    """Projeta todos os serviços de ``params``; o RBT12 é o de cada serviço."""
+    return projetar_colunas(
+        params, colunas(params), meses, tipo_imposto, inflacao_anual, fatores
+    )
+
+
+def fechar_consolidado(quantidade, receita_bruta, custo_total, repasse, investimento,
+                       tipo_imposto, rotulo="Total"):
+    """Fecha a DRE de séries mensais já somadas (1-D); o RBT12 é o do total."""
+    quantidade, receita_bruta, custo_total, repasse = (
+        np.asarray(a, dtype=float).reshape(1, -1)
+        for a in (quantidade, receita_bruta, custo_total, repasse)
+    )
+    # preços médios ponderados pela quantidade (informativos)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        valor_venda = np.where(quantidade > 0, receita_bruta / quantidade, 0.0)
+        custo_unitario = np.where(quantidade > 0, custo_total / quantidade, 0.0)
+
+    bases = (quantidade, valor_venda, custo_unitario, receita_bruta, custo_total, repasse)
+    return fechar([rotulo], bases, np.array([float(investimento)]), tipo_imposto)
+
+
+def consolidar(proj, tipo_imposto, rotulo="Total"):
+    """Soma os serviços mês a mês e apura o imposto sobre a receita total."""
+    return fechar_consolidado(
+        proj.quantidade.sum(axis=0),
+        proj.receita_bruta.sum(axis=0),
+        proj.custo_total.sum(axis=0),
+        proj.repasse.sum(axis=0),
+        proj.investimento.sum(),
+        tipo_imposto,
+        rotulo,
+    )
+
+
+def consolidar_lote(col, variantes, meses, tipo_imposto, inflacao_anual=INFLACAO_ANUAL,
+                    fatores=None, razao=None):
+    """Projeta ``variantes`` blocos de serviços empilhados em ``col`` e consolida cada um.
+
+    ``col`` tem ``variantes × n`` linhas (bloco i = linhas i·n .. (i+1)·n - 1).
+    ``tipo_imposto`` é um regime ou uma sequência com um regime por variante;
+    ``inflacao_anual`` é escalar ou por linha e ``fatores`` (opcional) tem
+    ``n`` linhas (repetidas em cada variante) ou uma por linha de ``col``.
+    Com ``razao`` (``dre.custos.Razao``), os custos e despesas do razão saem
+    do lucro de cada variante, que passa a ser o EBITDA (degraus pelo volume
+    da variante). Devolve, cada um com formato
+    (variantes × meses): receita bruta, lucro bruto e lucro acumulado; mais o
+    investimento total de cada variante.
+    """
+    investimento = np.asarray(col["investimento_inicial"], dtype=float)
+    n = len(investimento) // variantes
+    if fatores is not None and len(fatores) == n:
+        fatores = np.tile(fatores, (variantes, 1))
+    quantidade, _, _, receita, custo, repasse = (
+        b.reshape(variantes, n, meses).sum(axis=1)
+        for b in projetar_bases(col, meses, inflacao_anual, fatores)
+    )
+    if isinstance(tipo_imposto, (list, tuple)):
+        aliq = np.empty_like(receita)
+        for regime in set(tipo_imposto):
+            linhas = [i for i, r in enumerate(tipo_imposto) if r == regime]
+            aliq[linhas] = aliquota(receita[linhas], regime)
+    else:
+        aliq = aliquota(receita, tipo_imposto)
+    _, _, lucro, acumulado = apurar(receita, custo, repasse, aliq)
+    if razao is not None:
+        lucro = lucro - custos_operacionais(razao, quantidade)
+        acumulado = np.cumsum(lucro, axis=1)
+    return receita, lucro, acumulado, investimento.reshape(variantes, n).sum(axis=1)
+
+
+def tabela_consolidada(total, linha=0, inicio=None):
+    """DataFrame no layout do ``df_agg`` (meses nas linhas) para uma linha da projeção.
+
+    O índice é o número do mês (inteiro) ou, com ``inicio``, um ``PeriodIndex``.
+    """
+    import pandas as pd
+
+    from dre.calendario import indice_meses
+
+    return pd.DataFrame(
+        {rotulo: getattr(total, serie)[linha] for serie, rotulo in COLUNAS_AGG.items()},
+        index=indice_meses(total.meses, inicio),
+    )
@@ -0,0 +1,161 @@
+"""Formato colunar (longo) dos resultados e armazenamento em Parquet/Arrow.
+
+Uma linha por serviço × mês: ``servico`` dicionário (categórico), ``mes``
+inteiro 1-based e as séries da ``Projecao`` em float64. O armazém é um
+diretório particionado por execução e cenário (``execucao=.../cenario=...``)
+só com acréscimos: cada gravação cria um arquivo novo, então execuções
+noturnas podem ser guardadas e comparadas sem projetar de novo.
+
+Uso::
+
+    gravar(proj, "resultados", execucao="2024-05-01", cenario="base")
+    df = ler("resultados", execucao=["2024-04-30", "2024-05-01"]).to_pandas()
+"""
+import os
+import uuid
+
+import numpy as np
+
+# séries numéricas da ``Projecao`` gravadas em cada linha, na ordem
+SERIES = (
+    "quantidade",
+    "valor_venda",
+    "custo_unitario",
+    "receita_bruta",
+    "custo_total",
+    "repasse",
+    "impostos",
+    "receita_liquida",
+    "lucro_bruto",
+    "lucro_acumulado",
+)
+PARTICOES = ("execucao", "cenario")
+
+
+def colunas_longas(proj, coluna_id="servico"):
+    """Colunas do formato longo (arrays pyarrow/NumPy) de uma ``Projecao``."""
+    import pyarrow as pa
+
+    n, meses = proj.receita_bruta.shape
+    codigos = np.repeat(np.arange(n, dtype=np.int32), meses)
+    colunas = {
+        coluna_id: pa.DictionaryArray.from_arrays(codigos, pa.array(list(map(str, proj.tipos)))),
+        "mes": np.tile(np.arange(1, meses + 1, dtype=np.int16), n),
+    }
+    for serie in SERIES:
+        colunas[serie] = np.ascontiguousarray(getattr(proj, serie), dtype=np.float64).ravel()
+    colunas["payback"] = np.repeat(np.asarray(proj.payback, dtype=np.int16), meses)
+    return colunas
+
+
+def tabela_longa(proj, coluna_id="servico"):
+    """``pyarrow.Table`` do formato longo de uma ``Projecao``."""
+    import pyarrow as pa
+
+    return pa.table(colunas_longas(proj, coluna_id))
+
+
+def para_parquet(proj):
+    """Bytes Parquet do formato longo (para download ou envio)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    buffer = pa.BufferOutputStream()
+    pq.write_table(tabela_longa(proj), buffer)
+    return buffer.getvalue().to_pybytes()
+
+
+def caminho_particao(raiz, execucao, cenario="base"):
+    """Arquivo novo (nome único) na partição ``execucao``/``cenario`` do armazém."""
+    pasta = os.path.join(raiz, f"execucao={execucao}", f"cenario={cenario}")
+    os.makedirs(pasta, exist_ok=True)
+    return os.path.join(pasta, f"parte-{uuid.uuid4().hex}.parquet")
+
+
+def caminho_temporario(caminho):
+    """Temporário oculto ao lado de ``caminho``, trocado por ele com ``os.replace``.
+
+    Nomes iniciados por "." são ignorados na leitura do dataset, então um
+    processo interrompido no meio da gravação não deixa partição truncada.
+    """
+    pasta, nome = os.path.split(caminho)
+    return os.path.join(pasta, f".{nome}.tmp")
+
+
+def gravar(proj, raiz, execucao, cenario="base"):
+    """Acrescenta a projeção ao armazém e devolve o caminho do arquivo gravado."""
+    import pyarrow.parquet as pq
+
+    caminho = caminho_particao(raiz, execucao, cenario)
+    temporario = caminho_temporario(caminho)
+    pq.write_table(tabela_longa(proj), temporario)
+    os.replace(temporario, caminho)  # leitores nunca veem um arquivo pela metade
+    return caminho
+
+
+def _como_lista(valor):
+    return None if valor is None else [valor] if isinstance(valor, str) else list(valor)
+
+
+def ler(raiz, execucao=None, cenario=None, colunas=None, servicos=None):
+    """Lê o armazém (memory-mapped) filtrando partições e serviços.
+
+    ``execucao``/``cenario``/``servicos`` aceitam um valor ou uma lista; só as
+    partições pedidas são abertas. Devolve um ``pyarrow.Table`` com as
+    colunas de partição ``execucao`` e ``cenario`` além das gravadas.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+
+    particoes = ds.partitioning(pa.schema([(p, pa.string()) for p in PARTICOES]), flavor="hive")
+    dados = ds.dataset(
+        os.path.abspath(raiz), format="parquet", partitioning=particoes,
+        filesystem=fs.LocalFileSystem(use_mmap=True),
+    )
+    filtro = None
+    for campo, valores in (("execucao", execucao), ("cenario", cenario), ("servico", servicos)):
+        valores = _como_lista(valores)
+        if valores is not None:
+            condicao = ds.field(campo).isin(valores)
+            filtro = condicao if filtro is None else filtro & condicao
+    return dados.to_table(columns=colunas, filter=filtro)
+
+
+def execucoes(raiz):
+    """Execuções gravadas no armazém (nomes das partições), em ordem."""
+    if not os.path.isdir(raiz):
+        return []
+    return sorted(
+        nome.split("=", 1)[1] for nome in os.listdir(raiz) if nome.startswith("execucao=")
+    )
+
+
+def comparar(raiz, execucao_a, execucao_b, serie="lucro_acumulado", cenario="base"):
+    """DataFrame (serviço × mês) com ``serie`` das duas execuções e a diferença b − a."""
+    tabela = ler(
+        raiz, execucao=[execucao_a, execucao_b], cenario=cenario,
+        colunas=["execucao", "servico", "mes", serie],
+    )
+    df = tabela.to_pandas()
+    largo = df.pivot_table(
+        index=["servico", "mes"], columns="execucao", values=serie, observed=True
+    )
+    largo["diferenca"] = largo[execucao_b] - largo[execucao_a]
+    return largo
+
+
+def exportar_arrow(tabela, caminho):
+    """Grava ``tabela`` em Arrow IPC (Feather v2), próprio para reabrir com mmap."""
+    import pyarrow as pa
+
+    with pa.OSFile(caminho, "wb") as arquivo:
+        with pa.ipc.new_file(arquivo, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+
+
+def abrir_arrow(caminho):
+    """Reabre um arquivo de ``exportar_arrow`` por memory-map (sem cópia)."""
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(caminho, "r")).read_all()
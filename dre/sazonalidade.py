@@ -0,0 +1,144 @@
+"""Sazonalidade e calendário de dias úteis do volume mensal.
+
+Cada serviço tem um perfil de 12 multiplicadores (jan..dez, normalizados
+para média 1) e a carteira toda pode seguir um calendário de dias úteis com
+os feriados nacionais brasileiros, calculados localmente (Páscoa pelo
+algoritmo de Meeus/Jones/Butcher; nada de rede). O resultado é um array de
+fatores (serviços × meses) que a projeção aplica numa única multiplicação
+sobre quantidade, receita, custo e repasse, depois do teto de ``qtd_maxima``.
+
+Os dias úteis por mês são memoizados por (anos, calendário, peso do sábado),
+então reruns não reconstroem os calendários.
+"""
+import numpy as np
+
+from dre.cache import memoizar
+from dre.calendario import meses_do_ano, periodo_inicial
+
+SEM_SAZONALIDADE = "Sem sazonalidade"
+
+# multiplicadores de jan a dez (normalizados para média 1 ao usar)
+PERFIS = {
+    SEM_SAZONALIDADE: (1.0,) * 12,
+    "Clínica (jan/jul baixos)": (0.80, 0.95, 1.05, 1.05, 1.05, 1.00, 0.85, 1.05, 1.05, 1.05, 1.05, 0.90),
+    "Férias escolares (jan/fev/jul/dez baixos)": (0.75, 0.85, 1.10, 1.10, 1.10, 1.05, 0.80, 1.10, 1.10, 1.10, 1.05, 0.80),
+    "Verão forte (dez a mar altos)": (1.20, 1.15, 1.10, 0.95, 0.90, 0.85, 0.85, 0.90, 0.95, 1.00, 1.05, 1.20),
+}
+
+SEM_CALENDARIO = "Sem ajuste por dias úteis"
+NACIONAL = "Feriados nacionais"
+NACIONAL_FACULTATIVOS = "Nacionais + Carnaval e Corpus Christi"
+CALENDARIOS = (SEM_CALENDARIO, NACIONAL, NACIONAL_FACULTATIVOS)
+
+# feriados nacionais de data fixa (mês, dia); Consciência Negra é nacional desde 2024
+_FIXOS = ((1, 1), (4, 21), (5, 1), (9, 7), (10, 12), (11, 2), (11, 15), (12, 25))
+_CONSCIENCIA_NEGRA = (11, 20, 2024)
+# deslocamentos em dias a partir do domingo de Páscoa
+_SEXTA_SANTA = -2
+_CARNAVAL = (-48, -47)
+_CORPUS_CHRISTI = 60
+
+
+def pascoa(anos):
+    """Domingo de Páscoa (datetime64[D]) de cada ano, pelo algoritmo de Meeus."""
+    y = np.asarray(anos, dtype=np.int64)
+    a = y % 19
+    b, c = y // 100, y % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes = (h + l - 7 * m + 114) // 31
+    dia = (h + l - 7 * m + 114) % 31 + 1
+    return _datas(y, mes, dia)
+
+
+def _datas(anos, meses, dias):
+    inicio_mes = (np.asarray(anos) - 1970) * 12 + (np.asarray(meses) - 1)
+    return inicio_mes.astype("datetime64[M]").astype("datetime64[D]") + (np.asarray(dias) - 1)
+
+
+def feriados(ano_inicial, ano_final, calendario=NACIONAL):
+    """Feriados (datetime64[D], ordenados) de ``ano_inicial`` a ``ano_final``."""
+    if calendario == SEM_CALENDARIO:
+        return np.array([], dtype="datetime64[D]")
+    if calendario not in CALENDARIOS:
+        raise ValueError(f"calendário desconhecido: {calendario!r}")
+
+    anos = np.arange(ano_inicial, ano_final + 1)
+    datas = [_datas(anos, mes, dia) for mes, dia in _FIXOS]
+    mes, dia, desde = _CONSCIENCIA_NEGRA
+    datas.append(_datas(anos[anos >= desde], mes, dia))
+
+    domingo = pascoa(anos)
+    moveis = (_SEXTA_SANTA,)
+    if calendario == NACIONAL_FACULTATIVOS:
+        moveis += _CARNAVAL + (_CORPUS_CHRISTI,)
+    datas += [domingo + np.timedelta64(d, "D") for d in moveis]
+    return np.unique(np.concatenate(datas))
+
+
+@memoizar(max_entradas=64)
+def dias_uteis(ano_inicial, ano_final, calendario=NACIONAL, peso_sabado=0.0):
+    """Dias úteis de cada mês de ``ano_inicial`` a ``ano_final`` (jan..dez de cada ano).
+
+    Segunda a sexta contam 1 e sábados ``peso_sabado``, descontados os
+    feriados do ``calendario``. O array é somente leitura (fica em cache).
+    """
+    anos = ano_final - ano_inicial + 1
+    inicio = np.arange(anos * 12) + (ano_inicial - 1970) * 12
+    inicios = inicio.astype("datetime64[M]").astype("datetime64[D]")
+    fins = (inicio + 1).astype("datetime64[M]").astype("datetime64[D]")
+    dias_feriados = feriados(ano_inicial, ano_final, calendario)
+
+    dias = np.busday_count(inicios, fins, weekmask="1111100", holidays=dias_feriados).astype(float)
+    if peso_sabado:
+        dias += peso_sabado * np.busday_count(inicios, fins, weekmask="0000010", holidays=dias_feriados)
+    dias.setflags(write=False)
+    return dias
+
+
+def fator_dias_uteis(meses, inicio, calendario=NACIONAL, peso_sabado=0.0):
+    """Dias úteis de cada mês da projeção relativos à média dos anos cobertos."""
+    if calendario == SEM_CALENDARIO or inicio is None:
+        return np.ones(meses)
+    primeiro = periodo_inicial(inicio)
+    ultimo = primeiro + (meses - 1)
+    dias = dias_uteis(primeiro.year, ultimo.year, calendario, float(peso_sabado))
+    deslocamento = primeiro.month - 1
+    return dias[deslocamento:deslocamento + meses] / dias.mean()
+
+
+def perfil(nome_ou_valores):
+    """12 multiplicadores normalizados (média 1) de um nome de ``PERFIS`` ou de valores."""
+    valores = PERFIS[nome_ou_valores] if isinstance(nome_ou_valores, str) else nome_ou_valores
+    valores = np.asarray(valores, dtype=float)
+    if valores.shape != (12,):
+        raise ValueError("o perfil de sazonalidade precisa de 12 multiplicadores (jan..dez)")
+    return valores / valores.mean()
+
+
+def fatores(perfis, meses, inicio=None, calendario=SEM_CALENDARIO, peso_sabado=0.0):
+    """Fatores (serviços × meses) de volume; None quando tudo é 1 (sem ajuste).
+
+    ``perfis`` tem um item por serviço: nome de ``PERFIS``, 12 valores ou None.
+    Sem ``inicio``, o M1 é tratado como janeiro.
+    """
+    perfis = [SEM_SAZONALIDADE if p is None else p for p in perfis]
+    sem_perfil = all(isinstance(p, str) and p == SEM_SAZONALIDADE for p in perfis)
+    if sem_perfil and (calendario == SEM_CALENDARIO or inicio is None):
+        return None
+
+    tabela = np.array([perfil(p) for p in perfis]).reshape(len(perfis), 12)
+    sazonal = tabela[:, meses_do_ano(meses, inicio) - 1]
+    return sazonal * fator_dias_uteis(meses, inicio, calendario, peso_sabado)
+
+
+def fatores_params(params, meses, inicio=None, calendario=SEM_CALENDARIO, peso_sabado=0.0):
+    """``fatores`` com o perfil de ``params[tipo]["sazonalidade"]`` (opcional) de cada serviço."""
+    return fatores(
+        [p.get("sazonalidade") for p in params.values()], meses, inicio, calendario, peso_sabado
+    )
@@ -0,0 +1,114 @@
+"""Análise de sensibilidade (tornado) da DRE consolidada.
+
+Cada parâmetro de ``params`` (em todos os serviços ao mesmo tempo), a
+inflação e o regime de imposto são perturbados para baixo e para cima. Todas
+as variantes são empilhadas e avaliadas numa única projeção em lote
+(variantes × serviços × meses), em vez de uma projeção por variante.
+"""
+import numpy as np
+
+from dre.projecao import (
+    CAMPOS,
+    IMPOSTO_FAIXA,
+    IMPOSTO_UNICO,
+    INFLACAO_ANUAL,
+    colunas,
+    consolidar_lote,
+    mes_payback,
+)
+
+VARIACAO = 0.10
+INFLACAO = "inflacao_anual"
+REGIME = "tipo_imposto"
+
+ROTULOS = {
+    "valor_venda_base": "Valor de Venda",
+    "custo_unitario_base": "Custo por Unidade",
+    "qtd_inicial": "Quantidade Inicial",
+    "qtd_maxima": "Quantidade Máxima",
+    "repasse_percentual": "Repasse Médico",
+    "crescimento_percentual": "Crescimento Mensal",
+    "investimento_inicial": "Investimento Inicial",
+    INFLACAO: "Inflação Anual",
+    REGIME: "Regime de Imposto",
+}
+
+
+def _variantes(tipo_imposto):
+    """(parâmetro, sinal) de cada variante; a primeira é o caso base."""
+    variantes = [(None, 0)]
+    for parametro in CAMPOS + (INFLACAO,):
+        variantes += [(parametro, -1), (parametro, +1)]
+    variantes.append((REGIME, +1))  # o outro regime
+    return variantes
+
+
+def avaliar(params, meses, tipo_imposto, inflacao_anual=INFLACAO_ANUAL, variacao=VARIACAO,
+            fatores=None, razao=None):
+    """Lucro total e payback consolidados de cada variante, numa projeção só.
+
+    Devolve ``(variantes, lucro_total, payback)``; o payback é o mês 1-based
+    (0 = não atingido) e a variante 0 é o caso base. ``fatores`` são os
+    fatores de volume (serviços × meses), iguais em todas as variantes. Com
+    ``razao`` (``dre.custos.Razao``), o lucro é o EBITDA, a mesma base do
+    payback da aba Resumo.
+    """
+    col = colunas(params)
+    n = len(params)
+    variantes = _variantes(tipo_imposto)
+    v = len(variantes)
+
+    expandido = {campo: np.tile(col[campo], v) for campo in CAMPOS}
+    inflacao = np.full(v * n, float(inflacao_anual))
+    alternativo = IMPOSTO_FAIXA if tipo_imposto == IMPOSTO_UNICO else IMPOSTO_UNICO
+    regimes = [tipo_imposto] * v
+    for i, (parametro, sinal) in enumerate(variantes):
+        fatia = slice(i * n, (i + 1) * n)
+        fator = 1 + sinal * variacao
+        if parametro in CAMPOS:
+            expandido[parametro][fatia] *= fator
+        elif parametro == INFLACAO:
+            inflacao[fatia] *= fator
+        elif parametro == REGIME:
+            regimes[i] = alternativo
+    expandido["repasse_percentual"] = np.minimum(expandido["repasse_percentual"], 100.0)
+
+    _, lucro, acumulado, investimento = consolidar_lote(
+        expandido, v, meses, regimes, inflacao, fatores, razao
+    )
+    return variantes, lucro.sum(axis=1), mes_payback(acumulado, investimento)
+
+
+def tornado(params, meses, tipo_imposto, inflacao_anual=INFLACAO_ANUAL, variacao=VARIACAO,
+            fatores=None, razao=None):
+    """DataFrame do tornado: impacto de cada parâmetro, do maior para o menor.
+
+    Colunas ``Lucro (−)``/``Lucro (+)`` são variações do lucro total contra o
+    caso base; ``Payback (−)``/``Payback (+)`` são os meses de payback
+    (NaN = não atingido). Para o regime de imposto só há o lado "+", que
+    corresponde ao regime alternativo. ``razao`` é o de ``avaliar``.
+    """
+    import pandas as pd
+
+    variantes, lucro, payback = avaliar(
+        params, meses, tipo_imposto, inflacao_anual, variacao, fatores, razao
+    )
+    base_lucro = lucro[0]
+    payback = np.where(payback > 0, payback, np.nan)
+
+    linhas = {}
+    for (parametro, sinal), l, p in zip(variantes[1:], lucro[1:], payback[1:]):
+        linha = linhas.setdefault(ROTULOS[parametro], {
+            "Lucro (−)": 0.0, "Lucro (+)": 0.0,
+            "Payback (−)": payback[0], "Payback (+)": payback[0],
+        })
+        lado = "−" if sinal < 0 else "+"
+        linha[f"Lucro ({lado})"] = l - base_lucro
+        linha[f"Payback ({lado})"] = p
+
+    df = pd.DataFrame.from_dict(linhas, orient="index")
+    df.index.name = "Parâmetro"
+    df["Amplitude"] = (df["Lucro (+)"] - df["Lucro (−)"]).abs()
+    df.attrs["lucro_base"] = float(base_lucro)
+    df.attrs["payback_base"] = payback[0]
+    return df.sort_values("Amplitude", ascending=False)
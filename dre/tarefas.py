@@ -0,0 +1,142 @@
+"""Cálculos pesados em segundo plano, compartilhados entre sessões.
+
+A página submete uma função à ``FILA`` com uma chave (o snapshot das
+entradas) e segue desenhando; a função roda numa thread do pool (NumPy
+libera o GIL nas operações pesadas) e informa progresso e resultados
+parciais pela ``Tarefa``. Sessões que pedem a mesma chave enquanto a
+tarefa existe recebem a mesma ``Tarefa``: uma computação só, não uma por
+analista. Tarefas concluídas ficam disponíveis por ``TTL_SEGUNDOS``.
+
+O cancelamento é cooperativo: quando a última sessão interessada abandona
+a tarefa (ex.: mudou as entradas), o próximo ``Tarefa.informar`` da função
+levanta ``Cancelada``; se ela ainda estava na fila, nem começa.
+
+Uso::
+
+    def simular(tarefa, n):
+        for i in range(n):
+            ...
+            tarefa.informar((i + 1) / n, parcial=...)
+        return resultado
+
+    tarefa = FILA.submeter(chave, id_sessao, simular, n)
+    tarefa.progresso, tarefa.parcial, tarefa.concluida, tarefa.resultado()
+"""
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from dre.cache import MAX_ENTRADAS_PAGINA, TTL_SEGUNDOS
+
+TRABALHADORES = 2
+# intervalo (s) com que as páginas releem o progresso de uma tarefa
+INTERVALO_PROGRESSO = 1.0
+
+
+class Cancelada(Exception):
+    """A tarefa foi cancelada: nenhuma sessão espera mais o resultado."""
+
+
+class Tarefa:
+    """Estado de uma execução em segundo plano, lido pelas sessões interessadas."""
+
+    def __init__(self, chave):
+        self.chave = chave
+        self.progresso = 0.0
+        self.mensagem = ""
+        self.parcial = None
+        self.futuro = None
+        self.concluida_em = None
+        self._cancelar = threading.Event()
+        self._interessados = set()
+
+    def informar(self, progresso, parcial=None, mensagem=None):
+        """Chamado pela função em execução; levanta ``Cancelada`` se foi cancelada."""
+        if self._cancelar.is_set():
+            raise Cancelada(self.chave)
+        self.progresso = min(max(float(progresso), 0.0), 1.0)
+        if parcial is not None:
+            self.parcial = parcial
+        if mensagem is not None:
+            self.mensagem = mensagem
+
+    @property
+    def cancelada(self):
+        return self._cancelar.is_set()
+
+    @property
+    def concluida(self):
+        return self.futuro is not None and self.futuro.done()
+
+    @property
+    def interessados(self):
+        return len(self._interessados)
+
+    def erro(self):
+        """Exceção da função (``Cancelada`` inclusive) ou None; só após concluir."""
+        try:
+            return self.futuro.exception(timeout=0)
+        except CancelledError:
+            return Cancelada(self.chave)
+
+    def resultado(self, timeout=None):
+        """Resultado da função (espera até ``timeout``; levanta a exceção dela)."""
+        try:
+            return self.futuro.result(timeout)
+        except CancelledError:
+            raise Cancelada(self.chave) from None
+
+
+class Fila:
+    """Pool de threads com deduplicação por chave e cancelamento por abandono."""
+
+    def __init__(self, trabalhadores=TRABALHADORES, ttl=TTL_SEGUNDOS,
+                 max_concluidas=MAX_ENTRADAS_PAGINA):
+        self.ttl = ttl
+        self.max_concluidas = max_concluidas
+        self._pool = ThreadPoolExecutor(trabalhadores, thread_name_prefix="dre-tarefa")
+        self._tarefas = {}
+        self._lock = threading.Lock()
+
+    def submeter(self, chave, interessado, funcao, *args):
+        """A ``Tarefa`` de ``chave``: a existente (em andamento ou concluída com
+        sucesso) ou uma nova que roda ``funcao(tarefa, *args)``."""
+        with self._lock:
+            self._limpar()
+            tarefa = self._tarefas.get(chave)
+            if tarefa is None or tarefa.cancelada or (tarefa.concluida and tarefa.erro() is not None):
+                tarefa = Tarefa(chave)
+                tarefa.futuro = self._pool.submit(funcao, tarefa, *args)
+                tarefa.futuro.add_done_callback(lambda _: setattr(tarefa, "concluida_em", time.monotonic()))
+                self._tarefas[chave] = tarefa
+            tarefa._interessados.add(interessado)
+            return tarefa
+
+    def abandonar(self, tarefa, interessado):
+        """``interessado`` não espera mais ``tarefa``; sem interessados, ela é cancelada."""
+        with self._lock:
+            tarefa._interessados.discard(interessado)
+            if tarefa._interessados or tarefa.concluida:
+                return
+            tarefa._cancelar.set()
+            tarefa.futuro.cancel()  # ainda na fila: nem começa
+            if self._tarefas.get(tarefa.chave) is tarefa:
+                del self._tarefas[tarefa.chave]
+
+    def _limpar(self):
+        agora = time.monotonic()
+        concluidas = sorted(
+            (t for t in self._tarefas.values() if t.concluida_em is not None),
+            key=lambda t: t.concluida_em,
+        )
+        excesso = len(concluidas) - self.max_concluidas
+        for i, tarefa in enumerate(concluidas):
+            if i < excesso or agora - tarefa.concluida_em > self.ttl:
+                del self._tarefas[tarefa.chave]
+
+    def __len__(self):
+        return len(self._tarefas)
+
+
+# compartilhada por todas as sessões do processo do Streamlit
+FILA = Fila()
@@ -1,6 +1,68 @@
+from datetime import date
+
 import streamlit as st
-import pandas as pd
-from pandas.api.types import CategoricalDtype
+
+from dre.api import projetar_dre
+from dre.cache import MAX_ENTRADAS_PAGINA, TTL_SEGUNDOS, congelar
+from dre.calendario import rotulo_mes
+from dre.cenarios import (
+    cenarios_de_tabela,
+    cenarios_padrao,
+    comparar,
+    projetar_cenarios,
+    resumo_cenarios,
+    tabela_de_cenarios,
+)
+from dre.diagnostico import Diagnostico
+from dre.exibicao import (
+    FORMATO_INTEIRO,
+    FORMATO_MOEDA,
+    formato_coluna,
+    painel_diagnostico,
+    para_grafico,
+    para_tabela,
+)
+from dre.impostos import REGIMES
+from dre.periodos import ANUAL, PERIODOS, TRIMESTRAL, agrupar
+from dre.projecao import INFLACAO_ANUAL
+from dre.sazonalidade import CALENDARIOS, PERFIS, fatores_params
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS_PAGINA, ttl=TTL_SEGUNDOS, show_spinner=False)
+def gerar_projecao(snapshot, meses, tipo_imposto, inflacao_anual, inicio, calendario):
+    """Projeção memoizada pelo snapshot dos parâmetros."""
+    res = projetar_dre(
+        {tipo: dict(p) for tipo, p in snapshot}, meses, tipo_imposto, inflacao_anual,
+        inicio=inicio, calendario=calendario,
+    )
+    df = res.tabela(res.tipos[0])
+    df["Quantidade"] = df["Quantidade"].round().astype(int)
+    # DRE trimestral/anual calculada (e guardada no cache) junto com a mensal
+    periodos = {periodo: agrupar(res.tabela(), periodo) for periodo in PERIODOS}
+    return df, res.aliquota_efetiva(), res.payback(), res.acima_do_teto(), periodos
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS_PAGINA, ttl=TTL_SEGUNDOS, show_spinner=False)
+def gerar_cenarios(snapshot, cenarios, meses, tipo_imposto, inflacao_anual, inicio, calendario):
+    """DRE do serviço em cada cenário (todos de uma vez, dre/cenarios.py) e as comparações."""
+    params = {tipo: dict(p) for tipo, p in snapshot}
+    proj = projetar_cenarios(
+        params, cenarios, meses, tipo_imposto, inflacao_anual,
+        fatores_params(params, meses, inicio, calendario),
+    )
+    return (
+        resumo_cenarios(proj, inicio),
+        comparar(proj, "quantidade", inicio),
+        comparar(proj, "lucro_acumulado", inicio),
+    )
+
+
+# Instrumentação deste rerun (expander "Diagnóstico" no fim da página)
+diag = Diagnostico(
+    "teste",
+    perfil=st.session_state.get("diag_perfil", False),
+    memoria=st.session_state.get("diag_memoria", False),
+)
 
 st.title("📊 Simulador de Projeção de DRE")
 
@@ -13,7 +75,7 @@ tabs = st.tabs([
 ])
 
 # ===================== ABA RECEITAS =====================
-with tabs[0]:
+with tabs[0], diag.etapa("Aba Receitas"):
     st.header("📈 Projeção de Receitas")
 
     # ————— Inputs —————
@@ -25,100 +87,55 @@ with tabs[0]:
     repasse_percentual = st.number_input("Repasse Médico (%)", min_value=0.0, max_value=100.0, value=30.0)
     crescimento_percentual = st.number_input("Crescimento Mensal da Quantidade (%)", min_value=0.0, value=5.0)
     meses = st.slider("Período de projeção (meses)", min_value=1, max_value=60, value=12)
+    inicio = st.date_input(
+        "Mês de início da projeção", value=date.today().replace(day=1), format="DD/MM/YYYY"
+    ).replace(day=1)
+    sazonalidade = st.selectbox(
+        "Sazonalidade", list(PERFIS), help="Multiplicadores de volume por mês do ano (média 1)."
+    )
+    calendario = st.selectbox(
+        "Calendário de dias úteis", CALENDARIOS,
+        help="Ajusta o volume de cada mês pelos dias úteis (feriados nacionais) em relação à média."
+    )
     investimento_inicial = st.number_input("Investimento Inicial (R$)", min_value=0.0, value=10000.0)
-    tipo_imposto = st.radio("Tipo de Imposto", ["Imposto Único (12%)", "Por Faixa de Faturamento"])
+    tipo_imposto = st.radio("Tipo de Imposto", list(REGIMES))
+    params = {tipo_servico: {
+        "valor_venda_base": valor_venda_base,
+        "custo_unitario_base": custo_unitario_base,
+        "qtd_inicial": qtd_inicial,
+        "qtd_maxima": qtd_maxima,
+        "repasse_percentual": repasse_percentual,
+        "crescimento_percentual": crescimento_percentual,
+        "investimento_inicial": investimento_inicial,
+        "sazonalidade": sazonalidade,
+    }}
 
     if st.button("📊 Gerar Projeção"):
-        # ————— Geração dos dados —————
-        dados = []
-        quantidade = qtd_inicial
-        total_receita = 0.0
-        inflacao_anual = 0.13
-        inflacao_mensal = (1 + inflacao_anual) ** (1 / 12) - 1
-        valor_venda_mes = valor_venda_base
-        custo_unitario_mes = custo_unitario_base
-
-        for mes in range(1, meses + 1):
-            receita_bruta = quantidade * valor_venda_mes
-            custo_total = quantidade * custo_unitario_mes
-            repasse_valor = receita_bruta * (repasse_percentual / 100)
-            total_receita += receita_bruta
-
-            dados.append({
-                "Mês": f"M{mes}",
-                "Quantidade": round(quantidade),
-                "Valor Venda com Inflação (R$)": valor_venda_mes,
-                "Custo Unitário com Inflação (R$)": custo_unitario_mes,
-                "Receita Operacional Bruta (R$)": receita_bruta,
-                "Custo Total (R$)": custo_total,
-                "Repasse Médico (R$)": repasse_valor
-            })
-
-            quantidade = min(quantidade * (1 + crescimento_percentual / 100), qtd_maxima)
-            valor_venda_mes *= (1 + inflacao_mensal)
-            custo_unitario_mes *= (1 + inflacao_mensal)
-
-        # ————— Cálculo do imposto —————
-        if tipo_imposto == "Imposto Único (12%)":
-            aliquota = 0.12
-        else:
-            faixas = [
-                (0, 360000, 0.112),
-                (360000, 720000, 0.135),
-                (720000, 1800000, 0.16),
-                (1800000, 3600000, 0.21),
-                (3600000, 4800000, 0.33),
-            ]
-            aliquota = next((perc for inf, sup, perc in faixas if inf < total_receita <= sup), 0.0)
-            if aliquota == 0.0:
-                st.warning("Receita fora das faixas de tributação. Nenhum imposto calculado.")
-
-        # ————— Cálculo de lucro e payback —————
-        lucro_acumulado = 0.0
-        payback_mes = None
-        for row in dados:
-            imposto_mes = row["Receita Operacional Bruta (R$)"] * aliquota
-            receita_liquida = row["Receita Operacional Bruta (R$)"] - imposto_mes
-            lucro = receita_liquida - row["Custo Total (R$)"] - row["Repasse Médico (R$)"]
-
-            row["Impostos (R$)"] = imposto_mes
-            row["Receita Operacional Líquida (R$)"] = receita_liquida
-            row["Lucro Bruto (R$)"] = lucro
-
-            lucro_acumulado += lucro
-            row["Lucro Acumulado (R$)"] = lucro_acumulado
-            if payback_mes is None and lucro_acumulado >= investimento_inicial:
-                payback_mes = row["Mês"]
-
-        df = pd.DataFrame(dados)
-
-        # —————** AQUI FAZEMOS O TRUQUE DA ORDENAÇÃO **—————
-        month_cats = [f"M{i}" for i in range(1, meses + 1)]
-        cat_type = CategoricalDtype(categories=month_cats, ordered=True)
-        df["Mês"] = df["Mês"].astype(cat_type)
-        df = df.sort_values("Mês").set_index("Mês")
-        # ————————————————————————————————————————————
+        # ————— Projeção vetorizada e memoizada (dre/projecao.py, dre/cache.py) —————
+        with diag.etapa("Projeção", linhas=meses):
+            df, aliquota, payback, acima_teto, periodos = gerar_projecao(
+                congelar(params), meses, tipo_imposto, INFLACAO_ANUAL, inicio, calendario
+            )
+
+        total_receita = df["Receita Bruta (R$)"].sum()
+        if acima_teto:
+            st.warning("RBT12 acima do teto do Simples Nacional em algum mês; aplicada a última faixa.")
+        payback_mes = rotulo_mes(payback, inicio) if payback else None
 
         # ————— Exibição —————
         st.subheader("📋 Tabela de Projeção com Inflação de 13% a.a.")
-        st.dataframe(df.style.format({
-            "Valor Venda com Inflação (R$)": "R${:,.2f}",
-            "Custo Unitário com Inflação (R$)": "R${:,.2f}",
-            "Receita Operacional Bruta (R$)": "R${:,.2f}",
-            "Receita Operacional Líquida (R$)": "R${:,.2f}",
-            "Custo Total (R$)": "R${:,.2f}",
-            "Repasse Médico (R$)": "R${:,.2f}",
-            "Impostos (R$)": "R${:,.2f}",
-            "Lucro Bruto (R$)": "R${:,.2f}",
-            "Lucro Acumulado (R$)": "R${:,.2f}"
-        }))
+        # formatação no navegador (column_config) em vez de Styler célula a célula
+        st.dataframe(para_tabela(df), column_config={
+            coluna: st.column_config.NumberColumn(format=FORMATO_MOEDA)
+            for coluna in df.columns if coluna.endswith("(R$)")
+        })
 
         st.subheader("📈 Gráfico Comparativo")
-        st.line_chart(df[[
-            "Receita Operacional Bruta (R$)",
-            "Receita Operacional Líquida (R$)",
+        st.line_chart(para_grafico(df[[
+            "Receita Bruta (R$)",
+            "Receita Líquida (R$)",
             "Lucro Bruto (R$)"
-        ]])
+        ]]))
 
         st.subheader("📌 Resumo Anual")
         st.metric("Receita Total Bruta", f"R$ {total_receita:,.2f}")
@@ -127,48 +144,57 @@ with tabs[0]:
         st.metric("Investimento Inicial", f"R$ {investimento_inicial:,.2f}")
         st.metric("Payback", payback_mes or "Não atingido")
 
+        st.subheader("🗓️ DRE Anual")
+        config_periodos = {
+            coluna: st.column_config.NumberColumn(format=formato_coluna(coluna))
+            for coluna in periodos[ANUAL].columns
+        }
+        st.dataframe(para_tabela(periodos[ANUAL]), column_config=config_periodos)
+        with st.expander("DRE Trimestral"):
+            st.dataframe(para_tabela(periodos[TRIMESTRAL]), column_config=config_periodos)
+
 
 # ===================== ABA CENÁRIOS =====================
-with tabs[1]:
+with tabs[1], diag.etapa("Aba Cenários"):
     st.header("📊 Análise de Cenários de Crescimento")
 
-    qtd_inicial_cenario = st.number_input("Quantidade Inicial (cenários)", min_value=1, value=100)
-    crescimento_conservador = [0.25, 0.20, 0.20]
-    crescimento_otimista = [x + 0.20 for x in crescimento_conservador]
-    crescimento_pessimista = [max(x - 0.20, 0.0) for x in crescimento_conservador]
-
-    def gerar_series_crescimento(taxas_anuais):
-        meses_lbl = []
-        quantidades = []
-        quantidade = qtd_inicial_cenario
-        for ano_idx, taxa_anual in enumerate(taxas_anuais):
-            taxa_mensal = (1 + taxa_anual) ** (1/12) - 1
-            for m in range(12):
-                numero = ano_idx * 12 + m + 1
-                meses_lbl.append(f"M{numero}")
-                quantidades.append(quantidade)
-                quantidade *= (1 + taxa_mensal)
-        return meses_lbl, quantidades
-
-    meses_lbl, q_conservador = gerar_series_crescimento(crescimento_conservador)
-    _, q_otimista = gerar_series_crescimento(crescimento_otimista)
-    _, q_pessimista = gerar_series_crescimento(crescimento_pessimista)
-
-    df_cenario = pd.DataFrame({
-        "Mês": meses_lbl,
-        "Conservador": q_conservador,
-        "Otimista": q_otimista,
-        "Pessimista": q_pessimista
-    })
-
-    # ————— Mesma lógica de categorical ordering —————
-    cat_type_c = CategoricalDtype(categories=meses_lbl, ordered=True)
-    df_cenario["Mês"] = df_cenario["Mês"].astype(cat_type_c)
-    df_cenario = df_cenario.sort_values("Mês").set_index("Mês")
-    # ——————————————————————————————————————
-
-    st.subheader("📈 Gráfico de Crescimento - 3 Cenários")
-    st.line_chart(df_cenario)
-
-    st.subheader("📋 Tabela de Quantidades por Mês")
-    st.dataframe(df_cenario.style.format("{:,.0f}"))
+    # cenários sobre o serviço e as opções da aba Receitas
+    anos = -(-meses // 12)
+    st.caption(
+        "Um cenário por linha, com valores por ano em %: crescimento anual da quantidade "
+        "(em branco = o crescimento do serviço) e reajuste do preço de venda e do custo."
+    )
+    tabela_cen = st.data_editor(
+        tabela_de_cenarios(cenarios_padrao(), anos), num_rows="dynamic", hide_index=True,
+        use_container_width=True, key=f"cenarios_{anos}",
+    )
+    try:
+        cenarios = tuple(cenarios_de_tabela(tabela_cen))
+    except ValueError as erro:
+        st.error(str(erro))
+        cenarios = ()
+
+    if cenarios:
+        with diag.etapa("Cenários", linhas=len(cenarios) * meses):
+            resumo_cen, qtd_cen, acumulado_cen = gerar_cenarios(
+                congelar(params), cenarios, meses, tipo_imposto, INFLACAO_ANUAL, inicio, calendario,
+            )
+        st.subheader(f"📋 Comparação - {len(cenarios)} Cenários")
+        st.dataframe(resumo_cen, column_config={
+            coluna: st.column_config.NumberColumn(format=formato_coluna(coluna))
+            for coluna in resumo_cen.columns if coluna != "Payback"
+        })
+
+        st.subheader("📈 Lucro Acumulado por Cenário")
+        st.line_chart(para_grafico(acumulado_cen))
+
+        st.subheader("📈 Quantidade por Cenário")
+        st.line_chart(para_grafico(qtd_cen))
+
+        st.subheader("📋 Tabela de Quantidades por Mês")
+        st.dataframe(para_tabela(qtd_cen), column_config={
+            coluna: st.column_config.NumberColumn(format=FORMATO_INTEIRO) for coluna in qtd_cen.columns
+        })
+
+# ===================== DIAGNÓSTICO =====================
+painel_diagnostico(diag)
@@ -1,9 +1,107 @@
+from datetime import date
+
 import streamlit as st
+import numpy as np
 import pandas as pd
-from pandas.api.types import CategoricalDtype
+
+from dre.assets import LARGURA_LOGO, LOGO, imagem_reduzida
+from dre.api import projetar_dre
+from dre.cache import MAX_ENTRADAS_PAGINA, TTL_SEGUNDOS, congelar
+from dre.calendario import rotulo_mes
+from dre.cenarios import (
+    cenarios_de_tabela,
+    cenarios_padrao,
+    comparar,
+    projetar_cenarios,
+    resumo_cenarios,
+    tabela_de_cenarios,
+)
+from dre.diagnostico import Diagnostico
+from dre.exibicao import (
+    FORMATO_INTEIRO,
+    FORMATO_MOEDA,
+    FORMATO_PERCENTUAL,
+    LIMITE_ABAS,
+    formato_coluna,
+    painel_diagnostico,
+    para_grafico,
+    para_tabela,
+)
+from dre.financeiro import TAXA_DESCONTO, indicadores
+from dre.impostos import REGIMES
+from dre.projecao import INFLACAO_ANUAL, PADRAO, params_de_tabela, tabela_de_params
+from dre.sazonalidade import CALENDARIOS, PERFIS, SEM_SAZONALIDADE, fatores_params
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS_PAGINA, ttl=TTL_SEGUNDOS, show_spinner=False)
+def gerar_projecoes(snapshot, meses, tipo_imposto, inflacao_anual, inicio, calendario):
+    """Resultados por serviço memoizados pelo snapshot dos parâmetros.
+
+    O imposto de cada serviço usa a alíquota do RBT12 consolidado (a mesma
+    regra da aba Resumo do teste3.py), então os serviços somam o total.
+    """
+    res = projetar_dre(
+        {tipo: dict(p) for tipo, p in snapshot}, meses, tipo_imposto, inflacao_anual,
+        inicio=inicio, calendario=calendario,
+    )
+    resultados = {}
+    for i, tipo in enumerate(res.tipos):
+        df = res.tabela(tipo)
+        df.insert(0, "Tipo", tipo)
+        df["Quantidade"] = df["Quantidade"].round().astype(int)
+        resultados[tipo] = {
+            "df": df,
+            "total_receita": float(res.servicos.receita_bruta[i].sum()),
+            "total_imposto": float(res.servicos.impostos[i].sum()),
+            "aliquota": res.aliquota_efetiva(tipo),
+            "acima_teto": res.acima_do_teto(tipo),
+            "investimento": float(res.servicos.investimento[i]),
+            "payback": res.rotulo_payback(tipo),
+        }
+    return resultados
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS_PAGINA, ttl=TTL_SEGUNDOS, show_spinner=False)
+def gerar_cenarios(snapshot, cenarios, meses, tipo_imposto, inflacao_anual, inicio, calendario):
+    """DRE dos serviços em cada cenário (todos de uma vez, dre/cenarios.py) e as comparações."""
+    params = {tipo: dict(p) for tipo, p in snapshot}
+    proj = projetar_cenarios(
+        params, cenarios, meses, tipo_imposto, inflacao_anual,
+        fatores_params(params, meses, inicio, calendario),
+    )
+    return (
+        resumo_cenarios(proj, inicio),
+        comparar(proj, "quantidade", inicio),
+        comparar(proj, "lucro_acumulado", inicio),
+    )
+
+
+# Tabela de serviços do modo em lote (mesmas colunas do CSV de ``python -m dre.lote``)
+CONFIG_TABELA = {
+    "tipo": st.column_config.TextColumn("Tipo de Serviço", required=True),
+    "valor_venda_base": st.column_config.NumberColumn("Valor de Venda (R$)", min_value=0.0, format="%.2f"),
+    "custo_unitario_base": st.column_config.NumberColumn("Custo por Unidade (R$)", min_value=0.0, format="%.2f"),
+    "qtd_inicial": st.column_config.NumberColumn("Quantidade Inicial", min_value=0, step=1),
+    "qtd_maxima": st.column_config.NumberColumn("Quantidade Máxima", min_value=0, step=1),
+    "repasse_percentual": st.column_config.NumberColumn("Repasse Médico (%)", min_value=0.0, max_value=100.0),
+    "crescimento_percentual": st.column_config.NumberColumn("Crescimento Mensal (%)", min_value=0.0),
+    "investimento_inicial": st.column_config.NumberColumn("Investimento Inicial (R$)", min_value=0.0, format="%.2f"),
+    "sazonalidade": st.column_config.SelectboxColumn(
+        "Sazonalidade", options=list(PERFIS), default=SEM_SAZONALIDADE
+    ),
+}
+
+
+# Instrumentação deste rerun (expander "Diagnóstico" no fim da página)
+diag = Diagnostico(
+    "teste2",
+    perfil=st.session_state.get("diag_perfil", False),
+    memoria=st.session_state.get("diag_memoria", False),
+)
 
 # Exibe logo no topo da aplicação
-st.image("m2inova_upscayl_4x_ultrasharp.png", use_container_width=True, clamp=False, output_format="PNG")
+# (cópia reduzida e em cache por mtime, em vez do PNG 4x a cada rerun)
+st.image(imagem_reduzida(LOGO, LARGURA_LOGO), use_container_width=True)
 
 st.title("📊 Simulador de Projeção de DRE")
 
@@ -16,246 +114,248 @@ tabs = st.tabs([
 ])
 
 # ===================== ABA RECEITAS =====================
-with tabs[0]:
+with tabs[0], diag.etapa("Aba Receitas"):
     st.header("📈 Projeção de Receitas")
 
-    # Entrada de múltiplos serviços
-    servico_input = st.text_area(
-        "Tipos de Serviço (um por linha)",
-        value="Consulta",
-        help="Digite cada tipo de serviço em uma linha separada."
+    # Entrada dos serviços: um expander por serviço ou uma única tabela editável
+    modo_edicao = st.radio(
+        "Edição dos serviços", ["Individual", "Tabela (em lote)"], horizontal=True,
+        help="Para catálogos grandes: um só widget para todos os serviços, com importação de CSV."
     )
-    tipos_servico = [s.strip() for s in servico_input.splitlines() if s.strip()]
-
-    # Parâmetros de cada serviço
-    params = {}
-    for tipo in tipos_servico:
-        with st.expander(f"Parâmetros para '{tipo}'", expanded=True):
-            valor_venda_base = st.number_input(
-                f"{tipo} - Valor de Venda Inicial (R$)",
-                min_value=0.0, value=100.0, key=f"venda_{tipo}"
-            )
-            custo_unitario_base = st.number_input(
-                f"{tipo} - Custo por Unidade Inicial (R$)",
-                min_value=0.0, value=20.0, key=f"custo_{tipo}"
-            )
-            qtd_inicial = st.number_input(
-                f"{tipo} - Quantidade Inicial", min_value=0, value=100, key=f"qtd_init_{tipo}"
-            )
-            qtd_maxima = st.number_input(
-                f"{tipo} - Quantidade Máxima", min_value=0, value=500, key=f"qtd_max_{tipo}"
-            )
-            repasse_percentual = st.number_input(
-                f"{tipo} - Repasse Médico (%)", min_value=0.0,
-                max_value=100.0, value=30.0, key=f"repasse_{tipo}"
-            )
-            crescimento_percentual = st.number_input(
-                f"{tipo} - Crescimento Mensal da Quantidade (%)", min_value=0.0,
-                value=5.0, key=f"cres_{tipo}"
-            )
-            investimento_inicial = st.number_input(
-                f"{tipo} - Investimento Inicial (R$)", min_value=0.0,
-                value=10000.0, key=f"inv_{tipo}"
-            )
-            params[tipo] = {
-                "valor_venda_base": valor_venda_base,
-                "custo_unitario_base": custo_unitario_base,
-                "qtd_inicial": qtd_inicial,
-                "qtd_maxima": qtd_maxima,
-                "repasse_percentual": repasse_percentual,
-                "crescimento_percentual": crescimento_percentual,
-                "investimento_inicial": investimento_inicial
-            }
+
+    if modo_edicao == "Tabela (em lote)":
+        arquivo = st.file_uploader("Importar CSV de serviços", type="csv")
+        if arquivo is not None:
+            base = pd.read_csv(arquivo)
+        else:
+            base = tabela_de_params({"Consulta": {**PADRAO, "sazonalidade": SEM_SAZONALIDADE}})
+        tabela = st.data_editor(
+            base, num_rows="dynamic", hide_index=True, use_container_width=True,
+            column_config=CONFIG_TABELA,
+            # um arquivo novo recomeça a edição a partir dele
+            key=f"tabela_servicos_{arquivo.file_id if arquivo is not None else ''}",
+        )
+        try:
+            params = params_de_tabela(tabela)
+        except ValueError as erro:
+            st.error(str(erro))
+            params = {}
+        tipos_servico = list(params)
+        st.download_button(
+            "⬇️ Exportar CSV", tabela.to_csv(index=False), "servicos.csv", "text/csv"
+        )
+    else:
+        # Entrada de múltiplos serviços
+        servico_input = st.text_area(
+            "Tipos de Serviço (um por linha)",
+            value="Consulta",
+            help="Digite cada tipo de serviço em uma linha separada."
+        )
+        tipos_servico = [s.strip() for s in servico_input.splitlines() if s.strip()]
+
+        # Parâmetros de cada serviço
+        params = {}
+        for tipo in tipos_servico:
+            with st.expander(f"Parâmetros para '{tipo}'", expanded=True):
+                valor_venda_base = st.number_input(
+                    f"{tipo} - Valor de Venda Inicial (R$)",
+                    min_value=0.0, value=100.0, key=f"venda_{tipo}"
+                )
+                custo_unitario_base = st.number_input(
+                    f"{tipo} - Custo por Unidade Inicial (R$)",
+                    min_value=0.0, value=20.0, key=f"custo_{tipo}"
+                )
+                qtd_inicial = st.number_input(
+                    f"{tipo} - Quantidade Inicial", min_value=0, value=100, key=f"qtd_init_{tipo}"
+                )
+                qtd_maxima = st.number_input(
+                    f"{tipo} - Quantidade Máxima", min_value=0, value=500, key=f"qtd_max_{tipo}"
+                )
+                repasse_percentual = st.number_input(
+                    f"{tipo} - Repasse Médico (%)", min_value=0.0,
+                    max_value=100.0, value=30.0, key=f"repasse_{tipo}"
+                )
+                crescimento_percentual = st.number_input(
+                    f"{tipo} - Crescimento Mensal da Quantidade (%)", min_value=0.0,
+                    value=5.0, key=f"cres_{tipo}"
+                )
+                investimento_inicial = st.number_input(
+                    f"{tipo} - Investimento Inicial (R$)", min_value=0.0,
+                    value=10000.0, key=f"inv_{tipo}"
+                )
+                sazonalidade = st.selectbox(
+                    f"{tipo} - Sazonalidade", list(PERFIS), key=f"saz_{tipo}",
+                    help="Multiplicadores de volume por mês do ano (média 1)."
+                )
+                params[tipo] = {
+                    "valor_venda_base": valor_venda_base,
+                    "custo_unitario_base": custo_unitario_base,
+                    "qtd_inicial": qtd_inicial,
+                    "qtd_maxima": qtd_maxima,
+                    "repasse_percentual": repasse_percentual,
+                    "crescimento_percentual": crescimento_percentual,
+                    "investimento_inicial": investimento_inicial,
+                    "sazonalidade": sazonalidade,
+                }
 
     meses = st.slider("Período de projeção (meses)", min_value=1, max_value=60, value=12)
-    tipo_imposto = st.radio(
-        "Tipo de Imposto",
-        ["Imposto Único (12%)", "Por Faixa de Faturamento"]
+    inicio = st.date_input(
+        "Mês de início da projeção", value=date.today().replace(day=1), format="DD/MM/YYYY"
+    ).replace(day=1)
+    calendario = st.selectbox(
+        "Calendário de dias úteis", CALENDARIOS,
+        help="Ajusta o volume de cada mês pelos dias úteis (feriados nacionais) em relação à média."
     )
+    tipo_imposto = st.radio("Tipo de Imposto", list(REGIMES))
 
-    # Container para resultados
-    resultados = {}
+    # Impressão digital das entradas: a projeção salva só é refeita quando ela muda
+    chave = (congelar(params), meses, tipo_imposto, INFLACAO_ANUAL, inicio, calendario)
+    gerar = st.button("📊 Gerar Projeção")
 
-    if st.button("📊 Gerar Projeção"):
-        if not tipos_servico:
+    if not tipos_servico:
+        st.session_state.pop("projecao", None)
+        if gerar:
             st.warning("👉 Digite ao menos um Tipo de Serviço para gerar projeções.")
-        else:
-            for tipo, p in params.items():
-                # Extrai parâmetros
-                venda0 = p["valor_venda_base"]
-                custo0 = p["custo_unitario_base"]
-                qtd0 = p["qtd_inicial"]
-                qtd_max = p["qtd_maxima"]
-                repasse_pct = p["repasse_percentual"]
-                cres_pct = p["crescimento_percentual"]
-                inv0 = p["investimento_inicial"]
-                
-                dados = []
-                quantidade = qtd0
-                total_receita = 0.0
-                inflacao_anual = 0.13
-                inflacao_mensal = (1 + inflacao_anual)**(1/12) - 1
-                valor_venda_mes = venda0
-                custo_unit_mes = custo0
-
-                # Geração mensal
-                for mes in range(1, meses + 1):
-                    receita_bruta = quantidade * valor_venda_mes
-                    custo_total = quantidade * custo_unit_mes
-                    repasse_valor = receita_bruta * (repasse_pct / 100)
-                    total_receita += receita_bruta
-
-                    dados.append({
-                        "Tipo": tipo,
-                        "Mês": f"M{mes}",
-                        "Quantidade": round(quantidade),
-                        "Valor Venda (R$)": valor_venda_mes,
-                        "Custo Unitário (R$)": custo_unit_mes,
-                        "Receita Bruta (R$)": receita_bruta,
-                        "Custo Total (R$)": custo_total,
-                        "Repasse Médico (R$)": repasse_valor
-                    })
-
-                    quantidade = min(quantidade * (1 + cres_pct/100), qtd_max)
-                    valor_venda_mes *= (1 + inflacao_mensal)
-                    custo_unit_mes *= (1 + inflacao_mensal)
-
-                # Alíquota
-                if tipo_imposto == "Imposto Único (12%)":
-                    aliquota = 0.12
-                else:
-                    faixas = [
-                        (0, 360000, 0.112),
-                        (360000, 720000, 0.135),
-                        (720000, 1800000, 0.16),
-                        (1800000, 3600000, 0.21),
-                        (3600000, 4800000, 0.33),
-                    ]
-                    aliquota = next((p for inf, sup, p in faixas if inf < total_receita <= sup), 0.0)
-                    if aliquota == 0.0:
-                        st.warning(f"{tipo}: Receita fora das faixas de tributação.")
-
-                # Lucro e payback
-                lucro_acum = 0.0
-                payback = None
-                for row in dados:
-                    imp = row["Receita Bruta (R$)"] * aliquota
-                    liq = row["Receita Bruta (R$)"] - imp
-                    lucro = liq - row["Custo Total (R$)"] - row["Repasse Médico (R$)"]
-
-                    row["Impostos (R$)"] = imp
-                    row["Receita Líquida (R$)"] = liq
-                    row["Lucro Bruto (R$)"] = lucro
-
-                    lucro_acum += lucro
-                    row["Lucro Acumulado (R$)"] = lucro_acum
-                    if payback is None and lucro_acum >= inv0:
-                        payback = row["Mês"]
-
-                df = pd.DataFrame(dados)
-                # Ordenação
-                meses_cat = [f"M{i}" for i in range(1, meses+1)]
-                df["Mês"] = df["Mês"].astype(CategoricalDtype(categories=meses_cat, ordered=True))
-                df = df.sort_values("Mês").set_index("Mês")
-
-                # Resultados
-                # Armazena resultados para o resumo
-
-                resultados[tipo] = {
-                    "df": df,
-                    "total_receita": total_receita,
-                    "total_imposto": df["Impostos (R$)"].sum(),
-                    "aliquota": aliquota,
-                    "payback": payback or "Não atingido"
+    elif gerar or "projecao" in st.session_state:
+        salvo = st.session_state.get("projecao")
+        if salvo is None or salvo["chave"] != chave:
+            # Projeção memoizada: serviços inalterados vêm do cache
+            with diag.etapa("Projeção", linhas=len(params) * meses):
+                salvo = st.session_state["projecao"] = {
+                    "chave": chave,
+                    "resultados": gerar_projecoes(*chave),
                 }
 
-                # Exibição
+        resultados = salvo["resultados"]
+        if any(res["acima_teto"] for res in resultados.values()):
+            st.warning(
+                "RBT12 consolidado acima do teto do Simples Nacional em algum mês; "
+                "aplicada a última faixa."
+            )
+
+        # Só o serviço visível é desenhado: abas para poucos serviços, seletor para muitos
+        if len(resultados) <= LIMITE_ABAS:
+            visiveis = zip(resultados, st.tabs(list(resultados)))
+        else:
+            escolhido = st.selectbox("Serviço", list(resultados))
+            visiveis = [(escolhido, st.container())]
+
+        for tipo, area in visiveis:
+            res = resultados[tipo]
+            df = res["df"]
+            with area:
+                # Exibição (formatação no navegador via column_config, sem Styler)
                 st.subheader(f"Projeção: {tipo}")
-                st.dataframe(df.style.format({
-                    "Valor Venda (R$)": "R${:,.2f}",
-                    "Custo Unitário (R$)": "R${:,.2f}",
-                    "Receita Bruta (R$)": "R${:,.2f}",
-                    "Receita Líquida (R$)": "R${:,.2f}",
-                    "Custo Total (R$)": "R${:,.2f}",
-                    "Repasse Médico (R$)": "R${:,.2f}",
-                    "Impostos (R$)": "R${:,.2f}",
-                    "Lucro Bruto (R$)": "R${:,.2f}",
-                    "Lucro Acumulado (R$)": "R${:,.2f}"
-                }))
-
-                st.line_chart(df[["Receita Bruta (R$)", "Receita Líquida (R$)", "Lucro Bruto (R$)"]])
-                st.metric("Receita Total Bruta", f"R$ {total_receita:,.2f}")
-                st.metric("Imposto Total", f"R$ {df['Impostos (R$)'].sum():,.2f}")
-                st.metric("Alíquota Efetiva", f"{aliquota*100:.2f}%")
-                st.metric("Payback", payback or "Não atingido")
+                st.dataframe(para_tabela(df), column_config={
+                    coluna: st.column_config.NumberColumn(format=FORMATO_MOEDA)
+                    for coluna in df.columns if coluna.endswith("(R$)")
+                })
+
+                st.line_chart(para_grafico(
+                    df[["Receita Bruta (R$)", "Receita Líquida (R$)", "Lucro Bruto (R$)"]]
+                ))
+                m1, m2, m3, m4 = st.columns(4)
+                m1.metric("Receita Total Bruta", f"R$ {res['total_receita']:,.2f}")
+                m2.metric("Imposto Total", f"R$ {res['total_imposto']:,.2f}")
+                m3.metric("Alíquota Efetiva", f"{res['aliquota']*100:.2f}%")
+                m4.metric("Payback", res["payback"])
 
 # ===================== ABA CENÁRIOS =====================
-with tabs[1]:
+with tabs[1], diag.etapa("Aba Cenários"):
     st.header("📊 Análise de Cenários de Crescimento")
 
-    qtd_inicial_cenario = st.number_input("Quantidade Inicial (cenários)", min_value=1, value=100)
-    crescimento_conservador = [0.25, 0.20, 0.20]
-    crescimento_otimista = [x + 0.20 for x in crescimento_conservador]
-    crescimento_pessimista = [max(x - 0.20, 0.0) for x in crescimento_conservador]
-
-    def gerar_series_crescimento(taxas_anuais):
-        meses_lbl = []
-        quantidades = []
-        quantidade = qtd_inicial_cenario
-        for ano_idx, taxa_anual in enumerate(taxas_anuais):
-            taxa_mensal = (1 + taxa_anual) ** (1/12) - 1
-            for m in range(12):
-                numero = ano_idx * 12 + m + 1
-                meses_lbl.append(f"M{numero}")
-                quantidades.append(quantidade)
-                quantidade *= (1 + taxa_mensal)
-        return meses_lbl, quantidades
-
-    meses_lbl, q_conservador = gerar_series_crescimento(crescimento_conservador)
-    _, q_otimista = gerar_series_crescimento(crescimento_otimista)
-    _, q_pessimista = gerar_series_crescimento(crescimento_pessimista)
-
-    df_cenario = pd.DataFrame({
-        "Mês": meses_lbl,
-        "Conservador": q_conservador,
-        "Otimista": q_otimista,
-        "Pessimista": q_pessimista
-    })
-
-    # ————— Mesma lógica de categorical ordering —————
-    cat_type_c = CategoricalDtype(categories=meses_lbl, ordered=True)
-    df_cenario["Mês"] = df_cenario["Mês"].astype(cat_type_c)
-    df_cenario = df_cenario.sort_values("Mês").set_index("Mês")
-    # ——————————————————————————————————————
-
-    st.subheader("📈 Gráfico de Crescimento - 3 Cenários")
-    st.line_chart(df_cenario)
-
-    st.subheader("📋 Tabela de Quantidades por Mês")
-    st.dataframe(df_cenario.style.format("{:,.0f}"))
+    if "projecao" not in st.session_state:
+        st.info("Gere a projeção na aba Receitas para comparar cenários sobre os serviços.")
+    else:
+        # cenários sobre os serviços e as opções da última projeção gerada
+        snapshot_cen, meses_cen, tipo_imposto_cen, inflacao_cen, inicio_cen, calendario_cen = (
+            st.session_state["projecao"]["chave"]
+        )
+        anos = -(-meses_cen // 12)
+        st.caption(
+            "Um cenário por linha, com valores por ano em %: crescimento anual da quantidade "
+            "(em branco = o crescimento de cada serviço) e reajuste do preço de venda e do custo."
+        )
+        tabela_cen = st.data_editor(
+            tabela_de_cenarios(cenarios_padrao(), anos), num_rows="dynamic", hide_index=True,
+            use_container_width=True, key=f"cenarios_{anos}",
+        )
+        try:
+            cenarios = tuple(cenarios_de_tabela(tabela_cen))
+        except ValueError as erro:
+            st.error(str(erro))
+            cenarios = ()
+
+        if cenarios:
+            with diag.etapa("Cenários", linhas=len(cenarios) * len(snapshot_cen) * meses_cen):
+                resumo_cen, qtd_cen, acumulado_cen = gerar_cenarios(
+                    snapshot_cen, cenarios, meses_cen, tipo_imposto_cen, inflacao_cen,
+                    inicio_cen, calendario_cen,
+                )
+            st.subheader(f"📋 Comparação - {len(cenarios)} Cenários")
+            st.dataframe(resumo_cen, column_config={
+                coluna: st.column_config.NumberColumn(format=formato_coluna(coluna))
+                for coluna in resumo_cen.columns if coluna != "Payback"
+            })
+
+            st.subheader("📈 Lucro Acumulado por Cenário")
+            st.line_chart(para_grafico(acumulado_cen))
+
+            st.subheader("📈 Quantidade por Cenário")
+            st.line_chart(para_grafico(qtd_cen))
+
+            st.subheader("📋 Tabela de Quantidades por Mês")
+            st.dataframe(para_tabela(qtd_cen), column_config={
+                coluna: st.column_config.NumberColumn(format=FORMATO_INTEIRO) for coluna in qtd_cen.columns
+            })
 
 
 # ===================== ABA RESUMO =====================
-with tabs[4]:
+with tabs[4], diag.etapa("Aba Resumo"):
     st.header("📌 Resumo Consolidado de Serviços")
-    if resultados:
+    # resultados persistidos em st.session_state desde o último "Gerar Projeção"
+    if "projecao" in st.session_state:
+        resultados = st.session_state["projecao"]["resultados"]
+        inicio_proj = st.session_state["projecao"]["chave"][4]
+        taxa_desconto = st.number_input(
+            "Taxa de desconto (% a.a.)", min_value=0.0, value=TAXA_DESCONTO * 100, step=0.5
+        )
+        # VPL/TIR de todos os serviços de uma vez (um solver vetorizado para todas as séries)
+        fin = indicadores(
+            np.vstack([res["df"]["Lucro Bruto (R$)"].to_numpy() for res in resultados.values()]),
+            np.array([res["investimento"] for res in resultados.values()]),
+            taxa_desconto / 100,
+        )
         resumo = []
-        for tipo, res in resultados.items():
+        for i, (tipo, res) in enumerate(resultados.items()):
             resumo.append({
                 "Tipo": tipo,
                 "Receita Total (R$)": res["total_receita"],
                 "Imposto Total (R$)": res["total_imposto"],
                 "Alíquota (%)": res["aliquota"] * 100,
-                "Payback": res["payback"]
+                "Payback": res["payback"],
+                "VPL (R$)": fin.vpl[i],
+                "TIR a.a. (%)": fin.tir[i] * 100,
+                "TIRM a.a. (%)": fin.tirm[i] * 100,
+                "Payback Descontado": (
+                    rotulo_mes(fin.payback_descontado[i], inicio_proj)
+                    if fin.payback_descontado[i] else "Não atingido"
+                ),
             })
         df_resumo = pd.DataFrame(resumo).set_index("Tipo")
-        st.dataframe(df_resumo.style.format({
-            "Receita Total (R$)": "R${:,.2f}",
-            "Imposto Total (R$)": "R${:,.2f}",
-            "Alíquota (%)": "{:.2f}%"
-        }))
+        st.dataframe(df_resumo, column_config={
+            "Receita Total (R$)": st.column_config.NumberColumn(format=FORMATO_MOEDA),
+            "Imposto Total (R$)": st.column_config.NumberColumn(format=FORMATO_MOEDA),
+            "Alíquota (%)": st.column_config.NumberColumn(format=FORMATO_PERCENTUAL),
+            "VPL (R$)": st.column_config.NumberColumn(format=FORMATO_MOEDA),
+            "TIR a.a. (%)": st.column_config.NumberColumn(format=FORMATO_PERCENTUAL),
+            "TIRM a.a. (%)": st.column_config.NumberColumn(format=FORMATO_PERCENTUAL),
+        })
         # Gráfico comparativo de receita
         st.subheader("Comparativo de Receita por Serviço")
         st.bar_chart(df_resumo["Receita Total (R$)"])
     else:
         st.info("Gere as projeções para ver o resumo consolidado aqui.")
+
+# ===================== DIAGNÓSTICO =====================
+painel_diagnostico(diag)
@@ -1,9 +1,298 @@
+import os
+import uuid
+from datetime import date
+
 import streamlit as st
+import numpy as np
 import pandas as pd
-from pandas.api.types import CategoricalDtype
+
+from dre.api import projetar_dre
+from dre.assets import LARGURA_LOGO, LOGO, imagem_reduzida
+from dre.cache import MAX_ENTRADAS_PAGINA, TTL_SEGUNDOS, congelar
+from dre.calendario import indice_meses, rotulo_mes
+from dre.carteira import (
+    CLINICA,
+    GRUPO,
+    NIVEIS,
+    TOTAL,
+    Carteira,
+    estrutura_de_tabela,
+    tabela_de_estrutura,
+)
+from dre.cenarios import (
+    cenarios_de_tabela,
+    cenarios_padrao,
+    comparar,
+    projetar_cenarios,
+    resumo_cenarios,
+    tabela_de_cenarios,
+)
+from dre.custos import (
+    CATEGORIAS_DESPESA,
+    COLUNAS,
+    CUSTO,
+    CUSTOS_RAZAO,
+    DESPESA,
+    TIPOS,
+    compilar,
+    dre_completa,
+    juntar,
+    razao_de_tabela,
+)
+from dre.diagnostico import Diagnostico
+from dre.exibicao import (
+    FORMATO_INTEIRO,
+    FORMATO_MOEDA,
+    formato_coluna,
+    painel_diagnostico,
+    para_grafico,
+    para_tabela,
+)
+from dre.financeiro import TAXA_DESCONTO, indicadores
+from dre.impostos import REGIMES, acima_do_teto
+from dre.incremental import Projetor
+from dre.metas import buscar
+from dre.montecarlo import Distribuicao, simular
+from dre.paralelo import LIMITE_PARALELO, consolidar_paralelo
+from dre.periodos import PERIODOS, agrupar, demonstrativo
+from dre.resultados import para_parquet
+from dre.sazonalidade import CALENDARIOS, PERFIS, SEM_SAZONALIDADE, fatores_params
+from dre.sensibilidade import tornado
+from dre.tarefas import FILA, INTERVALO_PROGRESSO, Cancelada
+from dre.projecao import (
+    INFLACAO_ANUAL,
+    PADRAO,
+    colunas,
+    mes_payback,
+    params_de_tabela,
+    tabela_consolidada,
+    tabela_de_params,
+)
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS_PAGINA, ttl=TTL_SEGUNDOS, show_spinner=False)
+def gerar_periodos(df_agg, periodo):
+    """DRE trimestral/anual (períodos nas linhas) e o demonstrativo para exportar."""
+    return agrupar(df_agg, periodo), demonstrativo(df_agg, periodo)
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS_PAGINA, ttl=TTL_SEGUNDOS, show_spinner=False)
+def gerar_cenarios(snapshot, cenarios, meses, tipo_imposto, inflacao_anual, inicio, calendario):
+    """DRE dos serviços em cada cenário (todos de uma vez, dre/cenarios.py) e as comparações."""
+    params = {tipo: dict(p) for tipo, p in snapshot}
+    proj = projetar_cenarios(
+        params, cenarios, meses, tipo_imposto, inflacao_anual,
+        fatores_params(params, meses, inicio, calendario),
+    )
+    return (
+        resumo_cenarios(proj, inicio),
+        comparar(proj, "quantidade", inicio),
+        comparar(proj, "lucro_acumulado", inicio),
+    )
+
+
+def resumir_monte_carlo(res, inicio, com_tir=True):
+    """Bandas P5/P50/P95 e distribuição do payback (só o resumo sai da tarefa)."""
+    bandas = {
+        serie: pd.DataFrame(
+            {f"P{p}": valores for p, valores in zip(res.percentis, res.bandas[serie])},
+            index=indice_meses(res.meses, inicio),
+        )
+        for serie in ("receita_bruta", "lucro_acumulado")
+    }
+    dist = res.distribuicao_payback()
+    df_payback = pd.DataFrame(
+        {"Caminhos (%)": dist[1:] * 100},
+        index=indice_meses(res.meses, nome="Mês de Payback"),
+    )
+    pct_tir = res.percentis_tir() if com_tir else None
+    return bandas, df_payback, float(dist[0]), res.percentis_payback(), pct_tir
+
+
+def simular_monte_carlo(tarefa, snapshot, meses, tipo_imposto, caminhos, crescimento, inflacao,
+                        repasse, semente, inicio, calendario):
+    """Monte Carlo em segundo plano (dre/tarefas.py), com bandas parciais de tempos em tempos."""
+    params = {tipo: dict(p) for tipo, p in snapshot}
+
+    def progresso(feitos, parcial):
+        # entre parciais (dre.montecarlo.INTERVALO_PARCIAL), só a fração concluída
+        resumo = None if parcial is None else resumir_monte_carlo(parcial, inicio, com_tir=False)
+        tarefa.informar(feitos / caminhos, resumo, f"{feitos:,} de {caminhos:,} caminhos simulados")
+
+    res = simular(
+        params, meses, tipo_imposto, caminhos,
+        crescimento=Distribuicao(*crescimento),
+        inflacao=Distribuicao(*inflacao),
+        repasse=Distribuicao(*repasse),
+        semente=semente,
+        fatores=fatores_params(params, meses, inicio, calendario),
+        progresso=progresso,
+    )
+    tarefa.informar(1.0, mensagem="Calculando a TIR de cada caminho...")
+    return resumir_monte_carlo(res, inicio)
+
+
+def mostrar_monte_carlo(resumo):
+    """Bandas, distribuição do payback e percentis (resultado parcial ou final)."""
+    bandas, df_payback, sem_payback, pct_payback, pct_tir = resumo
+
+    st.markdown("**Receita Bruta consolidada — P5 / P50 / P95**")
+    st.line_chart(para_grafico(bandas["receita_bruta"]))
+    st.markdown("**Lucro Acumulado consolidado — P5 / P50 / P95**")
+    st.line_chart(para_grafico(bandas["lucro_acumulado"]))
+
+    st.markdown("**Distribuição do mês de payback**")
+    st.bar_chart(df_payback)
+    p1, p2, p3 = st.columns(3)
+    p1.metric("Caminhos sem payback", f"{sem_payback * 100:.1f}%")
+    if pct_payback:
+        p2.metric(
+            "Payback P5 / P50 / P95",
+            " / ".join(f"M{int(round(v))}" for v in pct_payback.values()),
+        )
+    if pct_tir:
+        p3.metric(
+            "TIR a.a. P5 / P50 / P95",
+            " / ".join(f"{v * 100:.1f}%" for v in pct_tir.values()),
+        )
+
+
+@st.fragment(run_every=INTERVALO_PROGRESSO)
+def acompanhar_monte_carlo(tarefa, sessao):
+    """Redesenha só este trecho enquanto a simulação roda; ao terminar, rerun da página."""
+    if tarefa.concluida:
+        st.rerun()
+    st.progress(tarefa.progresso, text=tarefa.mensagem or "Na fila...")
+    if tarefa.interessados > 1:
+        st.caption(f"Simulação compartilhada com {tarefa.interessados - 1} outra(s) sessão(ões).")
+    if st.button("⏹️ Cancelar simulação"):
+        FILA.abandonar(tarefa, sessao)
+        st.session_state.pop("monte_carlo", None)
+        st.rerun()
+    if tarefa.parcial is not None:
+        mostrar_monte_carlo(tarefa.parcial)
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS_PAGINA, ttl=TTL_SEGUNDOS, show_spinner=False)
+def gerar_tornado(snapshot, meses, tipo_imposto, inflacao_anual, inicio, calendario, variacao,
+                  df_custos, df_despesas):
+    """Tornado de todas as perturbações numa única projeção em lote, sobre o EBITDA."""
+    params = {tipo: dict(p) for tipo, p in snapshot}
+    return tornado(
+        params, meses, tipo_imposto, inflacao_anual, variacao,
+        fatores_params(params, meses, inicio, calendario), montar_razao(df_custos, df_despesas),
+    )
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS_PAGINA, ttl=TTL_SEGUNDOS, show_spinner=False)
+def gerar_meta(snapshot, meses, tipo_imposto, inflacao_anual, inicio, calendario,
+               campo, tipo, mes, lucro_alvo, df_custos, df_despesas):
+    """Busca de meta sobre o EBITDA: K candidatos por iteração numa única projeção em lote."""
+    params = {t: dict(p) for t, p in snapshot}
+    return buscar(
+        params, meses, tipo_imposto, campo,
+        mes=mes, lucro_alvo=lucro_alvo, tipo=tipo, inflacao_anual=inflacao_anual,
+        fatores=fatores_params(params, meses, inicio, calendario),
+        razao=montar_razao(df_custos, df_despesas),
+    )
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS_PAGINA, ttl=TTL_SEGUNDOS, show_spinner=False)
+def exportar_parquet(snapshot, meses, tipo_imposto, inflacao_anual, inicio, calendario):
+    """Resultado por serviço no formato longo de ``dre.resultados``, em Parquet."""
+    res = projetar_dre(
+        {tipo: dict(p) for tipo, p in snapshot}, meses, tipo_imposto, inflacao_anual,
+        inicio=inicio, calendario=calendario,
+    )
+    return para_parquet(res.servicos)
+
+
+def montar_razao(df_custos, df_despesas):
+    """``Razao`` com os lançamentos das abas Custos e Despesas."""
+    return juntar(razao_de_tabela(df_custos, CUSTO), razao_de_tabela(df_despesas, DESPESA))
+
+
+@st.cache_data(max_entries=MAX_ENTRADAS_PAGINA, ttl=TTL_SEGUNDOS, show_spinner=False)
+def compilar_razao(df_custos, df_despesas, meses, quantidade):
+    """Séries mensais densas dos lançamentos das abas Custos e Despesas."""
+    return compilar(montar_razao(df_custos, df_despesas), meses, quantidade)
+
+
+def editor_razao(colunas, chave):
+    """Tabela editável de lançamentos (linhas podem ser adicionadas/removidas)."""
+    vazio = pd.DataFrame({
+        COLUNAS[c]: pd.Series(dtype="object" if c in ("descricao", "categoria", "tipo") else "float")
+        for c in colunas
+    })
+    config = {
+        COLUNAS["categoria"]: st.column_config.SelectboxColumn(options=CATEGORIAS_DESPESA),
+        COLUNAS["tipo"]: st.column_config.SelectboxColumn(options=TIPOS, default=TIPOS[0]),
+        COLUNAS["valor"]: st.column_config.NumberColumn(min_value=0.0, format="R$ %.2f"),
+        COLUNAS["inicio"]: st.column_config.NumberColumn(min_value=1, step=1, default=1),
+        COLUNAS["fim"]: st.column_config.NumberColumn(
+            min_value=0, step=1, default=0, help="0 = até o fim da projeção"
+        ),
+        COLUNAS["reajuste"]: st.column_config.NumberColumn(default=0.0, format="%.2f%%"),
+        COLUNAS["volume"]: st.column_config.NumberColumn(
+            min_value=0.0, help="Atendimentos/mês por degrau (só para o tipo Degrau)"
+        ),
+    }
+    return st.data_editor(
+        vazio, num_rows="dynamic", use_container_width=True, key=chave,
+        column_config={nome: cfg for nome, cfg in config.items() if nome in vazio.columns},
+    )
+
+
+def colunas_moeda(df):
+    """column_config com formato de moeda em todas as colunas de ``df``."""
+    return {
+        coluna: st.column_config.NumberColumn(format=FORMATO_MOEDA) for coluna in df.columns
+    }
+
+
+def series_razao(df_custos, df_despesas):
+    """Séries do razão para a projeção salva na sessão (None sem projeção)."""
+    salvo = st.session_state.get("projecao")
+    if salvo is None:
+        return None
+    meses_proj = salvo["chave"][1]
+    return compilar_razao(df_custos, df_despesas, meses_proj, salvo["quantidade"])
+
+
+# Tabela de serviços do modo em lote (mesmas colunas do CSV de ``python -m dre.lote``)
+CONFIG_TABELA = {
+    "tipo": st.column_config.TextColumn("Tipo de Serviço", required=True),
+    "valor_venda_base": st.column_config.NumberColumn("Valor de Venda (R$)", min_value=0.0, format="%.2f"),
+    "custo_unitario_base": st.column_config.NumberColumn("Custo por Unidade (R$)", min_value=0.0, format="%.2f"),
+    "qtd_inicial": st.column_config.NumberColumn("Quantidade Inicial", min_value=0, step=1),
+    "qtd_maxima": st.column_config.NumberColumn("Quantidade Máxima", min_value=0, step=1),
+    "repasse_percentual": st.column_config.NumberColumn("Repasse Médico (%)", min_value=0.0, max_value=100.0),
+    "crescimento_percentual": st.column_config.NumberColumn("Crescimento Mensal (%)", min_value=0.0),
+    "investimento_inicial": st.column_config.NumberColumn("Investimento Inicial (R$)", min_value=0.0, format="%.2f"),
+    "sazonalidade": st.column_config.SelectboxColumn(
+        "Sazonalidade", options=list(PERFIS), default=SEM_SAZONALIDADE
+    ),
+}
+
+# Tabela da carteira: uma linha por serviço de cada clínica
+CONFIG_CARTEIRA = {
+    GRUPO: st.column_config.TextColumn("Grupo", required=True),
+    CLINICA: st.column_config.TextColumn("Clínica", required=True),
+    **CONFIG_TABELA,
+}
+NIVEIS_CARTEIRA = dict(zip(("Grupos", "Clínicas", "Serviços"), NIVEIS))
+
+
+# Instrumentação deste rerun (expander "Diagnóstico" no fim da página)
+diag = Diagnostico(
+    "teste3",
+    perfil=st.session_state.get("diag_perfil", False),
+    memoria=st.session_state.get("diag_memoria", False),
+)
 
 # Exibe logo no topo da aplicação
-st.image("m2inova_upscayl_4x_ultrasharp.png", use_container_width=True, clamp=False, output_format="PNG")
+# (cópia reduzida e em cache por mtime, em vez do PNG 4x a cada rerun)
+st.image(imagem_reduzida(LOGO, LARGURA_LOGO), use_container_width=True)
 
 st.title("📊 Simulador de Projeção de DRE")
 
@@ -12,238 +301,372 @@ tabs = st.tabs([
     "Cenários de Crescimento",
     "Custos",
     "Despesas",
-    "Resumo"
+    "Resumo",
+    "Carteira",
 ])
 
 # ===================== ABA RECEITAS =====================
-with tabs[0]:
+with tabs[0], diag.etapa("Aba Receitas"):
     st.header("📈 Projeção de Receitas")
 
-    # Entrada de múltiplos serviços
-    servico_input = st.text_area(
-        "Tipos de Serviço (um por linha)",
-        value="Consulta",
-        help="Digite cada tipo de serviço em uma linha separada."
+    # Entrada dos serviços: um expander por serviço ou uma única tabela editável
+    modo_edicao = st.radio(
+        "Edição dos serviços", ["Individual", "Tabela (em lote)"], horizontal=True,
+        help="Para catálogos grandes: um só widget para todos os serviços, com importação de CSV."
     )
-    tipos_servico = [s.strip() for s in servico_input.splitlines() if s.strip()]
-
-    # Parâmetros de cada serviço
-    params = {}
-    for tipo in tipos_servico:
-        with st.expander(f"Parâmetros para '{tipo}'", expanded=True):
-            valor_venda_base = st.number_input(
-                f"{tipo} - Valor de Venda Inicial (R$)",
-                min_value=0.0, value=100.0, key=f"venda_{tipo}"
-            )
-            custo_unitario_base = st.number_input(
-                f"{tipo} - Custo por Unidade Inicial (R$)",
-                min_value=0.0, value=20.0, key=f"custo_{tipo}"
-            )
-            qtd_inicial = st.number_input(
-                f"{tipo} - Quantidade Inicial", min_value=0, value=100, key=f"qtd_init_{tipo}"
-            )
-            qtd_maxima = st.number_input(
-                f"{tipo} - Quantidade Máxima", min_value=0, value=500, key=f"qtd_max_{tipo}"
-            )
-            repasse_percentual = st.number_input(
-                f"{tipo} - Repasse Médico (%)", min_value=0.0,
-                max_value=100.0, value=30.0, key=f"repasse_{tipo}"
-            )
-            crescimento_percentual = st.number_input(
-                f"{tipo} - Crescimento Mensal da Quantidade (%)", min_value=0.0,
-                value=5.0, key=f"cres_{tipo}"
-            )
-            investimento_inicial = st.number_input(
-                f"{tipo} - Investimento Inicial (R$)", min_value=0.0,
-                value=10000.0, key=f"inv_{tipo}"
-            )
-            params[tipo] = {
-                "valor_venda_base": valor_venda_base,
-                "custo_unitario_base": custo_unitario_base,
-                "qtd_inicial": qtd_inicial,
-                "qtd_maxima": qtd_maxima,
-                "repasse_percentual": repasse_percentual,
-                "crescimento_percentual": crescimento_percentual,
-                "investimento_inicial": investimento_inicial
-            }
+
+    if modo_edicao == "Tabela (em lote)":
+        arquivo = st.file_uploader("Importar CSV de serviços", type="csv")
+        if arquivo is not None:
+            base = pd.read_csv(arquivo)
+        else:
+            base = tabela_de_params({"Consulta": {**PADRAO, "sazonalidade": SEM_SAZONALIDADE}})
+        tabela = st.data_editor(
+            base, num_rows="dynamic", hide_index=True, use_container_width=True,
+            column_config=CONFIG_TABELA,
+            # um arquivo novo recomeça a edição a partir dele
+            key=f"tabela_servicos_{arquivo.file_id if arquivo is not None else ''}",
+        )
+        try:
+            params = params_de_tabela(tabela)
+        except ValueError as erro:
+            st.error(str(erro))
+            params = {}
+        tipos_servico = list(params)
+        st.download_button(
+            "⬇️ Exportar CSV", tabela.to_csv(index=False), "servicos.csv", "text/csv"
+        )
+    else:
+        # Entrada de múltiplos serviços
+        servico_input = st.text_area(
+            "Tipos de Serviço (um por linha)",
+            value="Consulta",
+            help="Digite cada tipo de serviço em uma linha separada."
+        )
+        tipos_servico = [s.strip() for s in servico_input.splitlines() if s.strip()]
+
+        # Parâmetros de cada serviço
+        params = {}
+        for tipo in tipos_servico:
+            with st.expander(f"Parâmetros para '{tipo}'", expanded=True):
+                valor_venda_base = st.number_input(
+                    f"{tipo} - Valor de Venda Inicial (R$)",
+                    min_value=0.0, value=100.0, key=f"venda_{tipo}"
+                )
+                custo_unitario_base = st.number_input(
+                    f"{tipo} - Custo por Unidade Inicial (R$)",
+                    min_value=0.0, value=20.0, key=f"custo_{tipo}"
+                )
+                qtd_inicial = st.number_input(
+                    f"{tipo} - Quantidade Inicial", min_value=0, value=100, key=f"qtd_init_{tipo}"
+                )
+                qtd_maxima = st.number_input(
+                    f"{tipo} - Quantidade Máxima", min_value=0, value=500, key=f"qtd_max_{tipo}"
+                )
+                repasse_percentual = st.number_input(
+                    f"{tipo} - Repasse Médico (%)", min_value=0.0,
+                    max_value=100.0, value=30.0, key=f"repasse_{tipo}"
+                )
+                crescimento_percentual = st.number_input(
+                    f"{tipo} - Crescimento Mensal da Quantidade (%)", min_value=0.0,
+                    value=5.0, key=f"cres_{tipo}"
+                )
+                investimento_inicial = st.number_input(
+                    f"{tipo} - Investimento Inicial (R$)", min_value=0.0,
+                    value=10000.0, key=f"inv_{tipo}"
+                )
+                sazonalidade = st.selectbox(
+                    f"{tipo} - Sazonalidade", list(PERFIS), key=f"saz_{tipo}",
+                    help="Multiplicadores de volume por mês do ano (média 1)."
+                )
+                params[tipo] = {
+                    "valor_venda_base": valor_venda_base,
+                    "custo_unitario_base": custo_unitario_base,
+                    "qtd_inicial": qtd_inicial,
+                    "qtd_maxima": qtd_maxima,
+                    "repasse_percentual": repasse_percentual,
+                    "crescimento_percentual": crescimento_percentual,
+                    "investimento_inicial": investimento_inicial,
+                    "sazonalidade": sazonalidade,
+                }
 
     meses = st.slider("Período de projeção (meses)", min_value=1, max_value=60, value=12)
-    tipo_imposto = st.radio(
-        "Tipo de Imposto",
-        ["Imposto Único (12%)", "Por Faixa de Faturamento"]
+    inicio = st.date_input(
+        "Mês de início da projeção", value=date.today().replace(day=1), format="DD/MM/YYYY"
+    ).replace(day=1)
+    calendario = st.selectbox(
+        "Calendário de dias úteis", CALENDARIOS,
+        help="Ajusta o volume de cada mês pelos dias úteis (feriados nacionais) em relação à média."
+    )
+    tipo_imposto = st.radio("Tipo de Imposto", list(REGIMES))
+    trabalhadores = st.number_input(
+        "Processos para a projeção", min_value=1, value=os.cpu_count() or 1, step=1,
+        help=f"Com {LIMITE_PARALELO:,} serviços ou mais, a projeção consolidada é somada em "
+             "blocos nesse número de processos (1 = sempre no processo da página).",
     )
 
-    # Container para resultados
-    resultados = {}
+    # Impressão digital das entradas: a projeção salva só é refeita quando ela muda
+    chave = (congelar(params), meses, tipo_imposto, INFLACAO_ANUAL, inicio, calendario)
+    gerar = st.button("📊 Gerar Projeção")
 
-    if st.button("📊 Gerar Projeção"):
-        if not tipos_servico:
+    if not tipos_servico:
+        st.session_state.pop("projecao", None)
+        if gerar:
             st.warning("👉 Digite ao menos um Tipo de Serviço para gerar projeções.")
-        else:
-            # Soma dos investimentos iniciais de todos os serviços
-            inv_total = sum(p["investimento_inicial"] for p in params.values())
-
-            all_dados = []
-            inflacao_anual  = 0.13
-            inflacao_mensal = (1 + inflacao_anual)**(1/12) - 1
-
-            # 1) Gera TODOS os registros mês-a-mês de cada serviço
-            for tipo, p in params.items():
-                venda0   = p["valor_venda_base"]
-                custo0   = p["custo_unitario_base"]
-                qtd0     = p["qtd_inicial"]
-                qtd_max  = p["qtd_maxima"]
-                repasse_pct = p["repasse_percentual"]
-                cres_pct = p["crescimento_percentual"]
-
-                quantidade      = qtd0
-                valor_venda_mes = venda0
-                custo_unit_mes  = custo0
-
-                for mes in range(1, meses + 1):
-                    rb = quantidade * valor_venda_mes
-                    ct = quantidade * custo_unit_mes
-                    rp = rb * repasse_pct/100
-
-                    all_dados.append({
-                        "Mês":            f"M{mes}",
-                        "Receita Bruta":  rb,
-                        "Custo Total":    ct,
-                        "Repasse Médico": rp
-                    })
-
-                    quantidade      = min(quantidade * (1 + cres_pct/100), qtd_max)
-                    valor_venda_mes *= (1 + inflacao_mensal)
-                    custo_unit_mes  *= (1 + inflacao_mensal)
-
-            # 2) DataFrame único e ordenação
-            df_all = pd.DataFrame(all_dados)
-            meses_cat = [f"M{i}" for i in range(1, meses+1)]
-            df_all["Mês"] = df_all["Mês"].astype(
-                CategoricalDtype(categories=meses_cat, ordered=True))
-            df_all = df_all.sort_values("Mês").set_index("Mês")
-
-            # 3) Agrega somando todos os serviços por mês
-            df_agg = df_all.groupby(level=0).sum()
-
-            # 4) Determina alíquota sobre a Receita Bruta TOTAL
-            total_rec = df_agg["Receita Bruta"].sum()
-            if tipo_imposto == "Imposto Único (12%)":
-                aliquota = 0.12
+    elif gerar or "projecao" in st.session_state:
+        salvo = st.session_state.get("projecao")
+        if salvo is None or salvo["chave"] != chave:
+            if len(params) >= LIMITE_PARALELO and trabalhadores > 1:
+                # 1a) Catálogo grande: cada processo soma um bloco de serviços e só
+                #     as somas mensais voltam para o df_agg (dre/paralelo.py)
+                st.session_state.pop("projetor", None)
+                with diag.etapa("Projeção (processos)", linhas=len(params) * meses):
+                    total = consolidar_paralelo(
+                        colunas(params), meses, tipo_imposto, INFLACAO_ANUAL, int(trabalhadores),
+                        fatores=fatores_params(params, meses, inicio, calendario),
+                    )
+                    df_agg = tabela_consolidada(total, inicio=inicio)
+                    aliquota = float(total.aliquota_efetiva()[0])
+                    payback_mes = int(total.payback[0])
+                    acima_teto = bool(acima_do_teto(total.receita_bruta[0], tipo_imposto))
+                    quantidade = total.quantidade[0]
+                diag.contar("projecao_processos", int(trabalhadores))
             else:
-                faixas = [
-                    (0, 360000, 0.112),
-                    (360000, 720000, 0.135),
-                    (720000, 1800000, 0.16),
-                    (1800000, 3600000, 0.21),
-                    (3600000, 4800000, 0.33),
-                ]
-                aliquota = next((p for inf, sup, p in faixas if inf < total_rec <= sup), 0.0)
-                if aliquota == 0.0:
-                    st.warning("Receita total fora das faixas de tributação.")
-
-            # 5) Calcula impostos, receita líquida, lucro bruto e acumulado
-            df_agg["Impostos"]         = df_agg["Receita Bruta"] * aliquota
-            df_agg["Receita Líquida"]  = df_agg["Receita Bruta"] - df_agg["Impostos"]
-            df_agg["Lucro Bruto"]      = (df_agg["Receita Líquida"]
-                                        - df_agg["Custo Total"]
-                                        - df_agg["Repasse Médico"])
-            df_agg["Lucro Acumulado"]  = df_agg["Lucro Bruto"].cumsum()
-
-            # 6) Identifica payback (mês em que o acumulado >= total invested)
-            payback_row = df_agg[df_agg["Lucro Acumulado"] >= inv_total]
-            payback = payback_row.index[0] if not payback_row.empty else "Não atingido"
-
-            # 7) Exibição consolidada
-            st.subheader("📊 Projeção Consolidada (Todos os Serviços)")
-            st.dataframe(df_agg.style.format({
-                "Receita Bruta":    "R${:,.2f}",
-                "Custo Total":      "R${:,.2f}",
-                "Repasse Médico":   "R${:,.2f}",
-                "Impostos":         "R${:,.2f}",
-                "Receita Líquida":  "R${:,.2f}",
-                "Lucro Bruto":      "R${:,.2f}",
-                "Lucro Acumulado":  "R${:,.2f}"
-            }))
-
-            st.subheader("📈 Séries Consolidadas por Mês")
-            st.line_chart(df_agg[[
-                "Receita Bruta",
-                "Receita Líquida",
-                "Lucro Bruto"
-            ]])
-
-            # 8) Métricas finais
-            st.metric("Receita Total Bruta", f"R$ {total_rec:,.2f}")
-            st.metric("Imposto Total",       f"R$ {df_agg['Impostos'].sum():,.2f}")
-            st.metric("Alíquota Efetiva",    f"{aliquota*100:.2f}%")
-            st.metric("Investimento Total",  f"R$ {inv_total:,.2f}")
-            st.metric("Payback",             payback)
+                # 1b) Projeção consolidada, incremental: a edição de um campo refaz só
+                #     os serviços e as etapas que dependem dele (dre/incremental.py)
+                projetor = st.session_state.setdefault("projetor", Projetor())
+                with diag.etapa("Projeção") as etapa_projecao:
+                    res = projetor.projetar(
+                        params, meses, tipo_imposto, INFLACAO_ANUAL,
+                        inicio=inicio, calendario=calendario,
+                    )
+                    df_agg, aliquota, payback_mes, acima_teto, quantidade = (
+                        res.tabela(), res.aliquota_efetiva(), res.payback(), res.acima_do_teto(),
+                        res.consolidado.quantidade[0],
+                    )
+                    etapa_projecao.linhas = projetor.ultima_avaliacao["servicos"] * meses
+                diag.contar("projecao_servicos_recalculados", projetor.ultima_avaliacao["servicos"])
+                diag.contar("projecao_mes_inicial", projetor.ultima_avaliacao["mes_inicial"])
+            salvo = st.session_state["projecao"] = {
+                "chave": chave,
+                "df_agg": df_agg,
+                "aliquota": aliquota,
+                "acima_teto": acima_teto,
+                "quantidade": quantidade,
+                "payback": rotulo_mes(payback_mes, inicio) if payback_mes else "Não atingido",
+                # Soma dos investimentos iniciais de todos os serviços
+                "inv_total": sum(p["investimento_inicial"] for p in params.values()),
+            }
+
+        # 2) Resultado salvo na sessão sobrevive aos reruns
+        df_agg = salvo["df_agg"]
+        aliquota = salvo["aliquota"]
+        payback = salvo["payback"]
+        inv_total = salvo["inv_total"]
+        total_rec = df_agg["Receita Bruta"].sum()
+        if salvo["acima_teto"]:
+            st.warning("RBT12 acima do teto do Simples Nacional em algum mês; aplicada a última faixa.")
+
+        # 3) Exibição consolidada
+        st.subheader("📊 Projeção Consolidada (Todos os Serviços)")
+        # formatação no navegador (column_config) em vez de Styler célula a célula
+        st.dataframe(para_tabela(df_agg), column_config=colunas_moeda(df_agg))
+
+        st.subheader("📈 Séries Consolidadas por Mês")
+        st.line_chart(para_grafico(df_agg[[
+            "Receita Bruta",
+            "Receita Líquida",
+            "Lucro Bruto"
+        ]]))
+
+        # 4) Métricas finais
+        st.metric("Receita Total Bruta", f"R$ {total_rec:,.2f}")
+        st.metric("Imposto Total",       f"R$ {df_agg['Impostos'].sum():,.2f}")
+        st.metric("Alíquota Efetiva",    f"{aliquota*100:.2f}%")
+        st.metric("Investimento Total",  f"R$ {inv_total:,.2f}")
+        st.metric("Payback",             payback)
+
+        with diag.etapa("Parquet por serviço"):
+            parquet = exportar_parquet(*salvo["chave"])
+        st.download_button(
+            "⬇️ Resultado por serviço (Parquet)", parquet,
+            "projecao.parquet", "application/vnd.apache.parquet",
+        )
 
 
 # ===================== ABA CENÁRIOS =====================
-with tabs[1]:
+with tabs[1], diag.etapa("Aba Cenários"):
     st.header("📊 Análise de Cenários de Crescimento")
 
-    qtd_inicial_cenario = st.number_input("Quantidade Inicial (cenários)", min_value=1, value=100)
-    crescimento_conservador = [0.25, 0.20, 0.20]
-    crescimento_otimista = [x + 0.20 for x in crescimento_conservador]
-    crescimento_pessimista = [max(x - 0.20, 0.0) for x in crescimento_conservador]
-
-    def gerar_series_crescimento(taxas_anuais):
-        meses_lbl = []
-        quantidades = []
-        quantidade = qtd_inicial_cenario
-        for ano_idx, taxa_anual in enumerate(taxas_anuais):
-            taxa_mensal = (1 + taxa_anual) ** (1/12) - 1
-            for m in range(12):
-                numero = ano_idx * 12 + m + 1
-                meses_lbl.append(f"M{numero}")
-                quantidades.append(quantidade)
-                quantidade *= (1 + taxa_mensal)
-        return meses_lbl, quantidades
-
-    meses_lbl, q_conservador = gerar_series_crescimento(crescimento_conservador)
-    _, q_otimista = gerar_series_crescimento(crescimento_otimista)
-    _, q_pessimista = gerar_series_crescimento(crescimento_pessimista)
-
-    df_cenario = pd.DataFrame({
-        "Mês": meses_lbl,
-        "Conservador": q_conservador,
-        "Otimista": q_otimista,
-        "Pessimista": q_pessimista
-    })
+    if "projecao" not in st.session_state:
+        st.info("Gere a projeção na aba Receitas para comparar cenários sobre os serviços.")
+    else:
+        # cenários sobre os serviços e as opções da última projeção gerada
+        snapshot_cen, meses_cen, tipo_imposto_cen, inflacao_cen, inicio_cen, calendario_cen = (
+            st.session_state["projecao"]["chave"]
+        )
+        anos = -(-meses_cen // 12)
+        st.caption(
+            "Um cenário por linha, com valores por ano em %: crescimento anual da quantidade "
+            "(em branco = o crescimento de cada serviço) e reajuste do preço de venda e do custo."
+        )
+        tabela_cen = st.data_editor(
+            tabela_de_cenarios(cenarios_padrao(), anos), num_rows="dynamic", hide_index=True,
+            use_container_width=True, key=f"cenarios_{anos}",
+        )
+        try:
+            cenarios = tuple(cenarios_de_tabela(tabela_cen))
+        except ValueError as erro:
+            st.error(str(erro))
+            cenarios = ()
+
+        if cenarios:
+            with diag.etapa("Cenários", linhas=len(cenarios) * len(snapshot_cen) * meses_cen):
+                resumo_cen, qtd_cen, acumulado_cen = gerar_cenarios(
+                    snapshot_cen, cenarios, meses_cen, tipo_imposto_cen, inflacao_cen,
+                    inicio_cen, calendario_cen,
+                )
+            st.subheader(f"📋 Comparação - {len(cenarios)} Cenários")
+            st.dataframe(resumo_cen, column_config={
+                coluna: st.column_config.NumberColumn(format=formato_coluna(coluna))
+                for coluna in resumo_cen.columns if coluna != "Payback"
+            })
+
+            st.subheader("📈 Lucro Acumulado por Cenário")
+            st.line_chart(para_grafico(acumulado_cen))
+
+            st.subheader("📈 Quantidade por Cenário")
+            st.line_chart(para_grafico(qtd_cen))
+
+            st.subheader("📋 Tabela de Quantidades por Mês")
+            st.dataframe(para_tabela(qtd_cen), column_config={
+                coluna: st.column_config.NumberColumn(format=FORMATO_INTEIRO) for coluna in qtd_cen.columns
+            })
+
+    # ————— Monte Carlo sobre os serviços da aba Receitas —————
+    st.subheader("🎲 Simulação de Monte Carlo")
+    mc1, mc2, mc3 = st.columns(3)
+    caminhos = mc1.select_slider(
+        "Caminhos simulados", options=[1_000, 10_000, 100_000, 1_000_000], value=10_000
+    )
+    semente = mc1.number_input("Semente", min_value=0, value=0)
+    desvio_cres = mc2.number_input("Desvio do crescimento mensal (p.p.)", min_value=0.0, value=2.0)
+    choque_repasse = mc2.number_input("Variação do repasse (± p.p.)", min_value=0.0, value=5.0)
+    inflacao_media = mc3.number_input("Inflação anual média (%)", value=INFLACAO_ANUAL * 100)
+    inflacao_desvio = mc3.number_input("Desvio da inflação anual (p.p.)", min_value=0.0, value=3.0)
+
+    chave_mc = (
+        congelar(params), meses, tipo_imposto, caminhos,
+        ("normal", 0.0, desvio_cres),
+        ("normal", inflacao_media / 100, inflacao_desvio / 100),
+        ("uniforme", -choque_repasse, choque_repasse),
+        semente,
+        inicio,
+        calendario,
+    )
+    # a simulação roda em segundo plano (dre/tarefas.py): a página segue
+    # respondendo e sessões com as mesmas entradas compartilham a mesma execução
+    sessao = st.session_state.setdefault("sessao", uuid.uuid4().hex)
+    salvo_mc = st.session_state.get("monte_carlo")
+    if st.button("🎲 Simular Monte Carlo"):
+        if not tipos_servico:
+            st.warning("👉 Digite ao menos um Tipo de Serviço na aba Receitas.")
+        else:
+            if salvo_mc is not None and salvo_mc["chave"] != chave_mc:
+                FILA.abandonar(salvo_mc["tarefa"], sessao)
+            with diag.etapa("Monte Carlo (submissão)"):
+                salvo_mc = st.session_state["monte_carlo"] = {
+                    "chave": chave_mc,
+                    "tarefa": FILA.submeter(chave_mc, sessao, simular_monte_carlo, *chave_mc),
+                }
+
+    if salvo_mc is not None and salvo_mc["chave"] != chave_mc:
+        if salvo_mc["tarefa"].concluida:
+            st.info("Parâmetros alterados desde a última simulação — clique em Simular para atualizar.")
+        else:
+            # entradas mudaram no meio da simulação: ela deixa de ser útil para esta sessão
+            FILA.abandonar(salvo_mc["tarefa"], sessao)
+            st.session_state.pop("monte_carlo")
+            salvo_mc = None
+            st.info("Parâmetros alterados — simulação em andamento cancelada. Clique em Simular.")
+
+    if salvo_mc is not None:
+        tarefa_mc = salvo_mc["tarefa"]
+        if not tarefa_mc.concluida:
+            acompanhar_monte_carlo(tarefa_mc, sessao)
+        elif isinstance(tarefa_mc.erro(), Cancelada):
+            st.info("Simulação cancelada.")
+        elif tarefa_mc.erro() is not None:
+            st.error(f"Falha na simulação: {tarefa_mc.erro()}")
+        else:
+            mostrar_monte_carlo(tarefa_mc.resultado())
 
-    # ————— Mesma lógica de categorical ordering —————
-    cat_type_c = CategoricalDtype(categories=meses_lbl, ordered=True)
-    df_cenario["Mês"] = df_cenario["Mês"].astype(cat_type_c)
-    df_cenario = df_cenario.sort_values("Mês").set_index("Mês")
-    # ——————————————————————————————————————
 
-    st.subheader("📈 Gráfico de Crescimento - 3 Cenários")
-    st.line_chart(df_cenario)
+# ===================== ABA CUSTOS =====================
+with tabs[2], diag.etapa("Aba Custos"):
+    st.header("🧾 Custos Fixos e em Degraus")
+    st.caption(
+        "Fixo: todo mês entre início e fim. Degrau: valor por degrau, um degrau a cada "
+        "'Volume por Degrau' atendimentos no mês. Pontual: só no mês de início. "
+        "Valores em moeda do M1, reajustados a cada 12 meses."
+    )
+    df_custos = editor_razao(
+        ("descricao", "tipo", "valor", "inicio", "fim", "reajuste", "volume"), "razao_custos"
+    )
+
+# ===================== ABA DESPESAS =====================
+with tabs[3], diag.etapa("Aba Despesas"):
+    st.header("🏢 Despesas Operacionais")
+    st.caption("Pessoal, aluguel, administrativas etc. Depreciação fica abaixo do EBITDA.")
+    df_despesas = editor_razao(
+        ("descricao", "categoria", "tipo", "valor", "inicio", "fim", "reajuste", "volume"),
+        "razao_despesas",
+    )
 
-    st.subheader("📋 Tabela de Quantidades por Mês")
-    st.dataframe(df_cenario.style.format("{:,.0f}"))
+series = series_razao(df_custos, df_despesas)
+for aba, grupos in ((tabs[2], ("custo",)), (tabs[3], ("despesa", "depreciacao"))):
+    with aba:
+        if series is None:
+            st.info("Gere a projeção para ver os lançamentos mês a mês.")
+        else:
+            df_mensal = pd.DataFrame(
+                {grupo.capitalize(): series[grupo] for grupo in grupos},
+                index=indice_meses(len(series["custo"]), st.session_state["projecao"]["chave"][4]),
+            )
+            st.line_chart(para_grafico(df_mensal))
+            st.metric("Total no período", f"R$ {df_mensal.to_numpy().sum():,.2f}")
 
 
 # ===================== ABA RESUMO =====================
-with tabs[4]:
+with tabs[4], diag.etapa("Aba Resumo"):
     st.header("📌 Resumo Consolidado de Indicadores")
 
-    # se a projeção não foi gerada, df_agg não existirá
-    if "df_agg" not in locals():
+    # a projeção fica em st.session_state desde o último "Gerar Projeção"
+    if "projecao" not in st.session_state:
         st.info("Gere a projeção para ver o resumo consolidado aqui.")
     else:
+        salvo = st.session_state["projecao"]
+        snapshot, meses_proj, tipo_imposto_proj, inflacao_proj, inicio_proj, calendario_proj = (
+            salvo["chave"]
+        )
+        # DRE completa: receitas da projeção + séries do razão (soma vetorial)
+        df_agg = dre_completa(salvo["df_agg"], series)
+
         # 1) Calcula totais
         total_rec       = df_agg["Receita Bruta"].sum()
         total_custo     = df_agg["Custo Total"].sum()
         total_repasse   = df_agg["Repasse Médico"].sum()
         total_imp       = df_agg["Impostos"].sum()
         total_liquida   = df_agg["Receita Líquida"].sum()
+        total_razao     = df_agg[CUSTOS_RAZAO].sum()
         total_lucro     = df_agg["Lucro Bruto"].sum()
-        investimento    = inv_total
-        payback_label   = payback
+        total_despesas  = df_agg["Despesas Operacionais"].sum()
+        total_ebitda    = df_agg["EBITDA"].sum()
+        total_result    = df_agg["Resultado Operacional"].sum()
+        investimento    = salvo["inv_total"]
+        # payback sobre o EBITDA acumulado (igual ao da aba Receitas sem lançamentos)
+        payback_mes     = int(mes_payback(df_agg["EBITDA Acumulado"].to_numpy(), investimento))
+        payback_label   = rotulo_mes(payback_mes, inicio_proj) if payback_mes else "Não atingido"
 
         # 2) Exibe as métricas principais em colunas
         c1, c2, c3 = st.columns(3)
@@ -253,8 +676,25 @@ with tabs[4]:
         c2.metric("Imposto Total",        f"R$ {total_imp:,.2f}")
         c3.metric("Lucro Bruto Total",   f"R$ {total_lucro:,.2f}")
         c3.metric("Investimento Total",  f"R$ {investimento:,.2f}")
+        c1.metric(CUSTOS_RAZAO,            f"R$ {total_razao:,.2f}")
+        c2.metric("Despesas Operacionais", f"R$ {total_despesas:,.2f}")
+        c3.metric("EBITDA",                f"R$ {total_ebitda:,.2f}")
         st.metric("Payback", payback_label)
 
+        # Indicadores financeiros sobre o EBITDA mensal (mesma base do payback)
+        taxa_desconto = st.number_input(
+            "Taxa de desconto (% a.a.)", min_value=0.0, value=TAXA_DESCONTO * 100, step=0.5
+        )
+        fin = indicadores(df_agg["EBITDA"].to_numpy(), investimento, taxa_desconto / 100)
+        pb_desc = int(fin.payback_descontado)
+        f1, f2, f3, f4 = st.columns(4)
+        f1.metric("VPL", f"R$ {float(fin.vpl):,.2f}")
+        f2.metric("TIR (a.a.)", "—" if np.isnan(fin.tir) else f"{float(fin.tir) * 100:,.2f}%")
+        f3.metric("TIRM (a.a.)", "—" if np.isnan(fin.tirm) else f"{float(fin.tirm) * 100:,.2f}%")
+        f4.metric(
+            "Payback Descontado", rotulo_mes(pb_desc, inicio_proj) if pb_desc else "Não atingido"
+        )
+
         # 3) Monta um DataFrame resumo para tabela e gráfico
         resumo_df = pd.DataFrame({
             "Valor (R$)": [
@@ -263,7 +703,11 @@ with tabs[4]:
                 total_repasse,
                 total_imp,
                 total_liquida,
+                total_razao,
                 total_lucro,
+                total_despesas,
+                total_ebitda,
+                total_result,
                 investimento
             ]
         }, index=[
@@ -272,13 +716,216 @@ with tabs[4]:
             "Repasse Médico",
             "Impostos",
             "Receita Líquida",
+            CUSTOS_RAZAO,
             "Lucro Bruto",
+            "Despesas Operacionais",
+            "EBITDA",
+            "Resultado Operacional",
             "Investimento"
         ])
 
         st.subheader("📋 Tabela Resumo Consolidado")
-        st.dataframe(resumo_df.style.format("R${:,.2f}"))
+        st.dataframe(resumo_df, column_config=colunas_moeda(resumo_df))
 
         st.subheader("📊 Comparativo de Totais")
         # remove 'Investimento' do gráfico se quiser comparar só receitas e custos
         st.bar_chart(resumo_df["Valor (R$)"])
+
+        st.subheader("📑 DRE Mensal Completa")
+        st.dataframe(para_tabela(df_agg), column_config=colunas_moeda(df_agg))
+
+        # DRE por trimestre/ano: reduções por segmento do eixo de meses (dre/periodos.py)
+        st.subheader("🗓️ DRE Trimestral e Anual")
+        periodo = st.radio("Período", list(PERIODOS), index=1, horizontal=True)
+        with diag.etapa("DRE por período", linhas=len(df_agg)):
+            df_periodo, df_demonstrativo = gerar_periodos(df_agg, periodo)
+        st.dataframe(para_tabela(df_periodo), column_config={
+            coluna: st.column_config.NumberColumn(format=formato_coluna(coluna))
+            for coluna in df_periodo.columns
+        })
+        st.bar_chart(para_grafico(df_periodo[["Receita Bruta", "EBITDA"]]), stack=False)
+        st.download_button(
+            f"⬇️ Demonstrativo {periodo.lower()} (CSV)", df_demonstrativo.to_csv(),
+            f"dre_{periodo.lower()}.csv", "text/csv",
+        )
+
+        # 4) Sensibilidade: ±variação em cada parâmetro, avaliada num único lote
+        st.subheader("🌪️ Análise de Sensibilidade")
+        variacao = st.slider("Variação aplicada a cada parâmetro (%)", 1, 50, 10)
+        with diag.etapa("Sensibilidade") as etapa:
+            df_tornado = gerar_tornado(
+                snapshot, meses_proj, tipo_imposto_proj, inflacao_proj, inicio_proj, calendario_proj,
+                variacao / 100, df_custos, df_despesas,
+            )
+            # caso base + um lado (−/+) de cada parâmetro, por serviço e mês
+            etapa.linhas = (2 * len(df_tornado) + 1) * len(snapshot) * meses_proj
+
+        # mesma base do payback acima: EBITDA (lucro bruto menos custos e despesas do razão)
+        st.markdown(f"**Impacto no EBITDA Total (base: R$ {df_tornado.attrs['lucro_base']:,.2f})**")
+        st.bar_chart(
+            df_tornado[["Lucro (−)", "Lucro (+)"]], horizontal=True, stack=True, sort=False
+        )
+
+        # payback não atingido entra como horizonte + 1 só no gráfico
+        base_pb = df_tornado.attrs["payback_base"]
+        sem_pb = meses_proj + 1
+        df_pb = df_tornado[["Payback (−)", "Payback (+)"]].fillna(sem_pb) - (
+            sem_pb if np.isnan(base_pb) else base_pb
+        )
+        rotulo_base_pb = (
+            "Não atingido" if np.isnan(base_pb) else rotulo_mes(int(base_pb), inicio_proj)
+        )
+        st.markdown(f"**Impacto no mês de Payback (base: {rotulo_base_pb})**")
+        st.bar_chart(df_pb, horizontal=True, stack=True, sort=False)
+
+        # payback como rótulo de texto (NaN = não atingido); valores formatados no navegador
+        tabela_tornado = df_tornado.assign(**{
+            coluna: [
+                "Não atingido" if np.isnan(m) else rotulo_mes(int(m), inicio_proj)
+                for m in df_tornado[coluna]
+            ]
+            for coluna in ("Payback (−)", "Payback (+)")
+        })
+        st.dataframe(tabela_tornado, column_config={
+            coluna: st.column_config.NumberColumn(format=FORMATO_MOEDA)
+            for coluna in ("Lucro (−)", "Lucro (+)", "Amplitude")
+        })
+
+        # 5) Busca de meta: valor de um parâmetro que atinge o payback/lucro desejado
+        st.subheader("🎯 Busca de Meta")
+        campos_meta = {
+            "Valor de Venda": "valor_venda_base",
+            "Crescimento Mensal": "crescimento_percentual",
+            "Repasse Médico": "repasse_percentual",
+            "Quantidade Inicial": "qtd_inicial",
+        }
+        servicos_meta = ["Todos (multiplicador)"] + [t for t, _ in snapshot]
+        with st.form("form_meta"):
+            m1, m2 = st.columns(2)
+            rotulo_campo = m1.selectbox("Parâmetro a ajustar", list(campos_meta))
+            servico_meta = m2.selectbox("Serviço", servicos_meta)
+            tipo_meta = st.radio(
+                "Meta", ["Payback no mês", "EBITDA acumulado no mês"], horizontal=True
+            )
+            m3, m4 = st.columns(2)
+            mes_meta = m3.number_input("Mês alvo", 1, meses_proj, min(12, meses_proj))
+            lucro_meta = m4.number_input(
+                "EBITDA acumulado desejado (R$)", value=float(investimento), step=1000.0,
+                disabled=tipo_meta == "Payback no mês",
+            )
+            buscar_meta = st.form_submit_button("🎯 Buscar")
+
+        if buscar_meta:
+            with diag.etapa("Busca de meta"):
+                meta = gerar_meta(
+                    snapshot, meses_proj, tipo_imposto_proj, inflacao_proj, inicio_proj,
+                    calendario_proj, campos_meta[rotulo_campo],
+                    None if servico_meta == servicos_meta[0] else servico_meta,
+                    int(mes_meta),
+                    None if tipo_meta == "Payback no mês" else float(lucro_meta),
+                    df_custos, df_despesas,
+                )
+            if meta.valor is None:
+                st.warning("Meta não alcançável dentro do intervalo de busca para esse parâmetro.")
+            elif meta.tipo is None:
+                st.success(
+                    f"Multiplique **{rotulo_campo}** de todos os serviços por "
+                    f"**{meta.valor:.4f}** (EBITDA acumulado em M{meta.mes}: "
+                    f"R$ {meta.lucro_no_mes:,.2f})."
+                )
+            else:
+                st.success(
+                    f"**{rotulo_campo}** de **{meta.tipo}**: {meta.atual:,.2f} → "
+                    f"**{meta.valor:,.2f}** (EBITDA acumulado em M{meta.mes}: "
+                    f"R$ {meta.lucro_no_mes:,.2f})."
+                )
+
+
+# ===================== ABA CARTEIRA =====================
+with tabs[5], diag.etapa("Aba Carteira"):
+    st.header("🏥 Carteira de Clínicas")
+    st.caption(
+        "Grupo → clínica → serviço. Cada clínica apura o imposto pelo próprio RBT12; "
+        "grupos e total somam as DREs das clínicas. Período, início, calendário e regime "
+        "são os da aba Receitas."
+    )
+
+    arquivo_carteira = st.file_uploader("Importar CSV da carteira", type="csv", key="csv_carteira")
+    if arquivo_carteira is not None:
+        base_carteira = pd.read_csv(arquivo_carteira)
+    else:
+        base_carteira = tabela_de_estrutura({"Grupo": {
+            "Clínica 1": {"Consulta": {**PADRAO, "sazonalidade": SEM_SAZONALIDADE}},
+        }})
+    tabela_carteira = st.data_editor(
+        base_carteira, num_rows="dynamic", hide_index=True, use_container_width=True,
+        column_config=CONFIG_CARTEIRA,
+        key=f"tabela_carteira_{arquivo_carteira.file_id if arquivo_carteira is not None else ''}",
+    )
+    try:
+        estrutura = estrutura_de_tabela(tabela_carteira)
+    except ValueError as erro:
+        st.error(str(erro))
+        estrutura = {}
+    st.download_button(
+        "⬇️ Exportar CSV", tabela_carteira.to_csv(index=False), "carteira.csv", "text/csv",
+        key="exportar_carteira",
+    )
+
+    if not estrutura:
+        st.session_state.pop("carteira", None)
+        st.info("Informe ao menos um serviço com grupo e clínica.")
+    else:
+        # a carteira vive na sessão: uma edição refaz só a clínica alterada e seus ancestrais
+        config_carteira = (meses, tipo_imposto, INFLACAO_ANUAL, inicio, calendario)
+        salvo_carteira = st.session_state.get("carteira")
+        n_servicos = sum(len(p) for clinicas in estrutura.values() for p in clinicas.values())
+        with diag.etapa("Carteira", linhas=n_servicos * meses) as etapa_carteira:
+            if salvo_carteira is None or salvo_carteira["config"] != config_carteira:
+                carteira = Carteira(
+                    estrutura, meses, tipo_imposto, INFLACAO_ANUAL,
+                    inicio=inicio, calendario=calendario,
+                )
+                recalculados = None
+                clinicas_refeitas = len(carteira.clinicas.tipos)
+                salvo_carteira = st.session_state["carteira"] = {
+                    "config": config_carteira, "carteira": carteira,
+                }
+            else:
+                carteira = salvo_carteira["carteira"]
+                recalculados = carteira.sincronizar(estrutura)
+                clinicas_refeitas = sum(len(no) == 2 for no in recalculados)
+                etapa_carteira.linhas = sum(
+                    len(carteira.estrutura[no[0]][no[1]]) for no in recalculados if len(no) == 2
+                ) * meses
+        diag.contar("carteira_clinicas_recalculadas", clinicas_refeitas)
+        if recalculados:
+            st.caption(
+                f"Recalculadas {clinicas_refeitas} de {len(carteira.clinicas.tipos)} clínicas "
+                "(e os seus grupos e o total)."
+            )
+
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Receita Total Bruta", f"R$ {carteira.total.receita_bruta.sum():,.2f}")
+        c2.metric("Lucro Acumulado", f"R$ {carteira.total.lucro_acumulado[0, -1]:,.2f}")
+        c3.metric("Investimento Total", f"R$ {carteira.total.investimento[0]:,.2f}")
+        c4.metric("Payback", carteira.rotulo_payback())
+
+        nivel = st.radio("Resumo por", list(NIVEIS_CARTEIRA), horizontal=True)
+        resumo_carteira = carteira.resumo(NIVEIS_CARTEIRA[nivel])
+        st.dataframe(resumo_carteira, column_config={
+            coluna: st.column_config.NumberColumn(format=formato_coluna(coluna))
+            for coluna in resumo_carteira.columns if coluna != "Payback"
+        })
+
+        # DRE mensal de um nó: o total, um grupo ou uma clínica
+        nos = [()] + [(g,) for g in carteira.grupos.tipos] + list(carteira.clinicas.tipos)
+        nos = {" / ".join(n) if n else TOTAL: n for n in nos}
+        no = st.selectbox("DRE mensal de", list(nos))
+        df_no = carteira.tabela(nos[no])
+        st.dataframe(para_tabela(df_no), column_config=colunas_moeda(df_no))
+        st.line_chart(para_grafico(df_no[["Receita Bruta", "Receita Líquida", "Lucro Bruto"]]))
+
+
+# ===================== DIAGNÓSTICO =====================
+painel_diagnostico(diag)